@@ -40,3 +40,24 @@ class ModelLoadingError(HTTPException):
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=detail,
         )
+
+
+class ServiceBusyError(HTTPException):
+    """Exception for submissions rejected because the job queue is full."""
+
+    def __init__(self, detail: str = "Too many resumes queued, retry later"):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=detail,
+            headers={"Retry-After": "5"},
+        )
+
+
+class FileTooLargeError(HTTPException):
+    """Exception for uploads larger than the configured limit."""
+
+    def __init__(self, detail: str):
+        super().__init__(
+            status_code=413,  # The constant was renamed in newer Starlette
+            detail=detail,
+        )
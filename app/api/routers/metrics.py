@@ -0,0 +1,20 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.services.metrics import stage_histograms
+
+router = APIRouter(tags=["📈 Monitoring"])
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """
+    📈 Pipeline stage latencies
+
+    Histograms of the time spent in each pipeline stage (rasterization,
+    preprocessing, prefill, decode, OCR, ...) across all processed resumes,
+    in the Prometheus text format.
+    """
+    return PlainTextResponse(
+        stage_histograms.render(), media_type="text/plain; version=0.0.4"
+    )
@@ -1,12 +1,14 @@
+import asyncio
 import json
 import os
 import shutil
-import sys
+import tempfile
 import time
-from typing import Annotated
+import zipfile
+from collections.abc import AsyncIterator, Iterator
+from contextlib import contextmanager
+from typing import Annotated, BinaryIO
 
-import config
-from core.settings import get_settings
 from fastapi import (
     APIRouter,
     Depends,
@@ -15,13 +17,19 @@ from fastapi import (
     Request,
     UploadFile,
 )
-from services.ocr_service import process_resume
-from services.processing import update_image_urls
+from fastapi.responses import StreamingResponse
 
-# Add parent directory to path
-sys.path.append(
-    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app import config
+from app.api.errors import (
+    FileTooLargeError,
+    ServiceBusyError,
+    UnsupportedFileTypeError,
 )
+from app.core.settings import get_settings
+from app.dependencies import get_extraction_cache, get_job_manager, get_page_cache
+from app.models.core import PipelineMode
+from app.services.jobs import Job, JobQueueFullError, run_jobs
+from app.services.ocr_service import process_resume
 
 # Create separate routers for better organization
 upload_router = APIRouter(
@@ -48,6 +56,255 @@ maintenance_router = APIRouter(
     dependencies=[Depends(get_settings)],
 )
 
+jobs_router = APIRouter(
+    prefix="/jobs",
+    tags=["⏳ Background Jobs"],
+    dependencies=[Depends(get_settings)],
+)
+
+# Extensions of the resume files the pipeline accepts
+SUPPORTED_EXTENSIONS = [".pdf", ".PDF", ".png", ".docx", ".DOCX"]
+
+# Bytes read from an upload at a time while writing it to disk
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# (file ID, saved path, skip reason) of one file of a batch
+BatchEntry = tuple[str, str | None, str | None]
+
+
+def _find_upload(file_id: str) -> str | None:
+    """Return the path of an uploaded resume, or None if there is none."""
+    for ext in SUPPORTED_EXTENSIONS:
+        potential_path = os.path.join(config.UPLOADS_DIR, f"{file_id}{ext}")
+        if os.path.exists(potential_path):
+            return potential_path
+    return None
+
+
+def _safe_filename(filename: str | None) -> str:
+    """Reduce a client-supplied file name to a base name inside its folder."""
+    name = os.path.basename((filename or "").replace("\\", "/")).strip()
+    if name in ("", ".", ".."):
+        return "unnamed_file"
+    return name
+
+
+@contextmanager
+def _open_upload(filename: str) -> Iterator[BinaryIO]:
+    """
+    Open a file in the uploads directory for writing, replacing it atomically.
+
+    The data goes to a temporary file that is moved into place when the block
+    completes, so a request still reading an earlier upload of the same name
+    never sees a partly written file, and nothing is left behind if the block
+    raises.
+
+    Args:
+        filename: Name of the upload, already passed through _safe_filename
+    """
+    os.makedirs(config.UPLOADS_DIR, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=config.UPLOADS_DIR, prefix=".upload-")
+    try:
+        with os.fdopen(fd, "wb") as buffer:
+            yield buffer
+        os.replace(tmp_path, os.path.join(config.UPLOADS_DIR, filename))
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+async def _save_upload(file: UploadFile) -> str:
+    """
+    Write an uploaded file to the uploads directory and return its path.
+
+    Args:
+        file: The uploaded file
+
+    Raises:
+        FileTooLargeError: If the file is larger than ``MAX_FILE_SIZE``
+    """
+    max_size = get_settings().MAX_FILE_SIZE
+    filename = _safe_filename(file.filename)
+    size = 0
+    with _open_upload(filename) as buffer:
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            size += len(chunk)
+            if size > max_size:
+                raise FileTooLargeError(f"{filename} is larger than {max_size} bytes")
+            buffer.write(chunk)
+    return os.path.join(config.UPLOADS_DIR, filename)
+
+
+def _skip_reason(filename: str, seen: set[str]) -> str | None:
+    """
+    Return why a file of a batch cannot be processed, or None if it can.
+
+    File IDs are derived from the file names, so a second file with the ID
+    of an earlier one is skipped instead of overwriting it.
+
+    Args:
+        filename: Name of the file
+        seen: File IDs accepted so far; the file's ID is added if accepted
+    """
+    base_filename, extension = os.path.splitext(filename)
+    if extension.lower() not in SUPPORTED_EXTENSIONS:
+        return f"Unsupported file type: {extension}"
+    if base_filename in seen:
+        return f"Duplicate file ID: {base_filename}"
+    seen.add(base_filename)
+    return None
+
+
+def _extract_zip(zip_path: str) -> list[BatchEntry]:
+    """
+    Unpack the resumes in a ZIP archive into the uploads directory.
+
+    Folders inside the archive are flattened; hidden and macOS metadata
+    files are ignored. Nothing is written unless the archive is within the
+    entry and size limits.
+
+    Args:
+        zip_path: Path to the ZIP archive
+
+    Returns:
+        (file ID, saved path, skip reason) per file, with None as the path
+        for skipped files
+
+    Raises:
+        HTTPException: If the archive has more than ``ZIP_MAX_ENTRIES``
+            entries
+        FileTooLargeError: If its resumes add up to more than
+            ``ZIP_MAX_SIZE`` bytes
+    """
+    settings = get_settings()
+    with zipfile.ZipFile(zip_path) as archive:
+        infos = archive.infolist()
+        if len(infos) > settings.ZIP_MAX_ENTRIES:
+            raise HTTPException(
+                status_code=400,
+                detail=(
+                    f"ZIP archive has more than {settings.ZIP_MAX_ENTRIES} entries"
+                ),
+            )
+
+        seen: set[str] = set()
+        members: list[tuple[str, zipfile.ZipInfo | None, str | None]] = []
+        for info in infos:
+            filename = _safe_filename(info.filename)
+            if (
+                info.is_dir()
+                or filename.startswith(".")
+                or info.filename.startswith("__MACOSX/")
+            ):
+                continue
+            error = _skip_reason(filename, seen)
+            if error is None and info.file_size > settings.MAX_FILE_SIZE:
+                error = f"{filename} is larger than {settings.MAX_FILE_SIZE} bytes"
+            members.append((filename, info if error is None else None, error))
+
+        # Reading a member stops at its declared size, so the declared sizes
+        # bound what is written to disk
+        total_size = sum(member.file_size for _, member, _ in members if member)
+        if total_size > settings.ZIP_MAX_SIZE:
+            raise FileTooLargeError(
+                f"ZIP archive unpacks to more than {settings.ZIP_MAX_SIZE} bytes"
+            )
+
+        entries: list[BatchEntry] = []
+        for filename, member, error in members:
+            file_path = None
+            if member is not None:
+                with archive.open(member) as source, _open_upload(filename) as target:
+                    shutil.copyfileobj(source, target)
+                file_path = os.path.join(config.UPLOADS_DIR, filename)
+            entries.append((os.path.splitext(filename)[0], file_path, error))
+    return entries
+
+
+async def _stream_batch(
+    entries: list[BatchEntry],
+    base_url: str,
+    annotate: bool,
+    generate_summary: bool,
+    pipeline_mode: PipelineMode | None,
+) -> AsyncIterator[str]:
+    """Run a batch of saved files and yield one NDJSON line per finished file."""
+    settings = get_settings()
+    submissions = []
+    for file_id, file_path, error in entries:
+        if file_path is None:
+            yield _ndjson_line(file_id, None, "skipped", error=error)
+            continue
+        submissions.append(
+            (
+                file_id,
+                process_resume,
+                {
+                    "file_path": file_path,
+                    "use_annotator": annotate,
+                    "generate_summary": generate_summary,
+                    "pipeline_mode": pipeline_mode,
+                    "base_url": base_url,
+                },
+            )
+        )
+
+    # Keep enough resumes in flight to fill every scheduler batch
+    async for job in run_jobs(
+        get_job_manager(),
+        submissions,
+        max_in_flight=settings.BATCH_SIZE * settings.PARALLEL_BATCHES,
+    ):
+        yield _ndjson_line(
+            job.file_id, job.job_id, job.status.value, job.result, job.error
+        )
+
+
+def _ndjson_line(
+    file_id: str,
+    job_id: str | None,
+    status: str,
+    result: dict | None = None,
+    error: str | None = None,
+) -> str:
+    """Format the outcome of one batch file as a line of NDJSON."""
+    return (
+        json.dumps(
+            {
+                "file_id": file_id,
+                "job_id": job_id,
+                "status": status,
+                "result": result,
+                "error": error,
+            }
+        )
+        + "\n"
+    )
+
+
+def _submit_job(
+    file_id: str,
+    file_path: str,
+    base_url: str,
+    annotate: bool,
+    generate_summary: bool,
+    pipeline_mode: PipelineMode | None,
+) -> Job:
+    """Queue a resume on the background workers, or reject it if they are full."""
+    try:
+        return get_job_manager().submit(
+            file_id,
+            process_resume,
+            file_path=file_path,
+            use_annotator=annotate,
+            generate_summary=generate_summary,
+            pipeline_mode=pipeline_mode,
+            # Image URLs get the proper base URL before the result is saved
+            base_url=base_url,
+        )
+    except JobQueueFullError as e:
+        raise ServiceBusyError(str(e)) from e
+
 
 @upload_router.post("/upload")
 async def upload(
@@ -64,17 +321,13 @@ async def upload(
     # Ensure uploads directory exists
     os.makedirs(config.UPLOADS_DIR, exist_ok=True)
 
-    filename = file.filename or "unnamed_file"  # Handle None case
+    filename = _safe_filename(file.filename)
     file_extension = os.path.splitext(filename)[1].lower()
     base_filename = os.path.splitext(filename)[0]
 
     # Handle PDF or PNG file
     if file_extension in [".pdf", ".PDF", ".png"]:
-        filename = file.filename or "unnamed_file"  # Handle None case
-        file_path = os.path.join(config.UPLOADS_DIR, filename)
-        with open(file_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
+        await _save_upload(file)
 
         return {
             "status": "success",
@@ -97,6 +350,7 @@ async def upload_and_process(
     file: Annotated[UploadFile, File(...)],
     annotate: bool = True,
     generate_summary: bool = True,
+    pipeline_mode: PipelineMode | None = None,
 ):
     """
     📤🔍 Upload and process resume file in one step
@@ -108,6 +362,7 @@ async def upload_and_process(
     - **annotate**: Create visual annotations of detected fields (default: True)
     - **generate_summary**: Create a professional summary of the candidate
       (default: False)
+    - **pipeline_mode**: "direct" or "agents" (default: the PIPELINE_MODE setting)
 
     Returns structured data including personal info, education, experience,
     skills, etc.
@@ -116,12 +371,12 @@ async def upload_and_process(
     os.makedirs(config.UPLOADS_DIR, exist_ok=True)
 
     start_time = time.time()
-    filename = file.filename or "unnamed_file"  # Handle None case
+    filename = _safe_filename(file.filename)
     file_extension = os.path.splitext(filename)[1].lower()
     base_filename = os.path.splitext(filename)[0]
 
     # Check if file is supported
-    if file_extension not in [".pdf", ".PDF", ".png", ".docx", ".DOCX"]:
+    if file_extension not in SUPPORTED_EXTENSIONS:
         return {
             "status": "error",
             "message": (
@@ -131,30 +386,20 @@ async def upload_and_process(
         }
 
     # Save the uploaded file
-    file_path = os.path.join(config.UPLOADS_DIR, filename)
-    with open(file_path, "wb") as buffer:
-        content = await file.read()
-        buffer.write(content)
-
-    # Process the file
+    file_path = await _save_upload(file)
+
+    # Run the pipeline on a background worker; the event loop keeps serving
+    # other requests while this one waits for its result
+    job = _submit_job(
+        base_filename,
+        file_path,
+        str(request.base_url),
+        annotate,
+        generate_summary,
+        pipeline_mode,
+    )
     try:
-        # Process the resume with optional summary generation
-        result = process_resume(
-            file_path=file_path,
-            use_annotator=annotate,
-            generate_summary=generate_summary,
-        )
-
-        # Update image URLs with proper base URL
-        base_url = str(request.base_url)
-        result = update_image_urls(result, base_url)
-
-        # Save updated result
-        json_file_path = os.path.join(config.EXTRACTION_DIR, f"{base_filename}.json")
-        with open(json_file_path, "w", encoding="utf-8") as f:
-            json.dump(result, f, indent=4, ensure_ascii=False)
-
-        return result
+        return await asyncio.wrap_future(job.future)
 
     except Exception as e:
         return {
@@ -167,12 +412,105 @@ async def upload_and_process(
         }
 
 
+@upload_router.post("/batch")
+async def upload_batch(
+    request: Request,
+    files: Annotated[list[UploadFile], File(...)],
+    annotate: bool = True,
+    generate_summary: bool = True,
+    pipeline_mode: PipelineMode | None = None,
+):
+    """
+    📦 Upload and process many resumes in one request
+
+    Saves every file, runs them through the pipeline and streams back one
+    JSON line per file (`application/x-ndjson`) as soon as it has finished,
+    in completion order. Unsupported files are reported as `skipped`.
+
+    Parameters:
+    - **files**: PDF, PNG or DOCX resume files
+    - **annotate**: Create visual annotations of detected fields (default: True)
+    - **generate_summary**: Create a professional summary of the candidate
+      (default: True)
+    - **pipeline_mode**: "direct" or "agents" (default: the PIPELINE_MODE setting)
+    """
+    seen: set[str] = set()
+    entries: list[BatchEntry] = []
+    for file in files:
+        filename = _safe_filename(file.filename)
+        file_path = None
+        error = _skip_reason(filename, seen)
+        if error is None:
+            try:
+                file_path = await _save_upload(file)
+            except FileTooLargeError as e:
+                error = e.detail
+        entries.append((os.path.splitext(filename)[0], file_path, error))
+
+    return StreamingResponse(
+        _stream_batch(
+            entries, str(request.base_url), annotate, generate_summary, pipeline_mode
+        ),
+        media_type="application/x-ndjson",
+    )
+
+
+@upload_router.post("/batch/zip")
+async def upload_zip(
+    request: Request,
+    annotate: bool = True,
+    generate_summary: bool = True,
+    pipeline_mode: PipelineMode | None = None,
+):
+    """
+    📦 Process every resume in a ZIP archive
+
+    Send the archive as the raw request body (`Content-Type:
+    application/zip`); it is streamed to disk rather than held in memory.
+    Results are streamed back like for `/resumes/batch`.
+
+    Parameters:
+    - **annotate**: Create visual annotations of detected fields (default: True)
+    - **generate_summary**: Create a professional summary of the candidate
+      (default: True)
+    - **pipeline_mode**: "direct" or "agents" (default: the PIPELINE_MODE setting)
+    """
+    max_size = get_settings().ZIP_MAX_SIZE
+    fd, zip_path = tempfile.mkstemp(suffix=".zip")
+    try:
+        size = 0
+        with os.fdopen(fd, "wb") as buffer:
+            async for chunk in request.stream():
+                size += len(chunk)
+                if size > max_size:
+                    raise FileTooLargeError(
+                        f"ZIP archive is larger than {max_size} bytes"
+                    )
+                buffer.write(chunk)
+        entries = await asyncio.to_thread(_extract_zip, zip_path)
+    except zipfile.BadZipFile as e:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid ZIP archive: {str(e)}",
+        ) from e
+    finally:
+        os.remove(zip_path)
+
+    return StreamingResponse(
+        _stream_batch(
+            entries, str(request.base_url), annotate, generate_summary, pipeline_mode
+        ),
+        media_type="application/x-ndjson",
+    )
+
+
 @processing_router.post("/process")
 async def process(
     request: Request,
     file_id: str,
     annotate: bool = True,
     generate_summary: bool = True,
+    pipeline_mode: PipelineMode | None = None,
 ):
     """
     🔍 Process uploaded resume for data extraction
@@ -184,6 +522,7 @@ async def process(
     - **annotate**: Create visual annotations of detected fields (default: True)
     - **generate_summary**: Create a professional summary of the candidate
       (default: False)
+    - **pipeline_mode**: "direct" or "agents" (default: the PIPELINE_MODE setting)
 
     Returns structured data including personal information, education, work
     experience, skills, etc.
@@ -192,12 +531,7 @@ async def process(
     base_url = str(request.base_url)
 
     # First check if there's a file with that ID plus known extensions
-    file_path = None
-    for ext in [".pdf", ".PDF", ".png", ".docx", ".DOCX"]:
-        potential_path = os.path.join(config.UPLOADS_DIR, f"{file_id}{ext}")
-        if os.path.exists(potential_path):
-            file_path = potential_path
-            break
+    file_path = _find_upload(file_id)
 
     # Verify file exists
     if not file_path:
@@ -206,24 +540,13 @@ async def process(
             detail=f"File not found for ID: {file_id}",
         )
 
+    # Run the pipeline on a background worker; the event loop keeps serving
+    # other requests while this one waits for its result
+    job = _submit_job(
+        file_id, file_path, base_url, annotate, generate_summary, pipeline_mode
+    )
     try:
-        # Process the resume with optional summary generation
-        result = process_resume(
-            file_path=file_path,
-            use_annotator=annotate,
-            generate_summary=generate_summary,
-        )
-
-        # Update image URLs
-        result = update_image_urls(result, base_url)
-
-        # Update the JSON file with the updated URLs
-        json_file_path = os.path.join(config.EXTRACTION_DIR, f"{file_id}.json")
-        if os.path.exists(json_file_path):
-            with open(json_file_path, "w", encoding="utf-8") as f:
-                json.dump(result, f, indent=4, ensure_ascii=False)
-
-        return result
+        return await asyncio.wrap_future(job.future)
 
     except Exception as e:
         return {
@@ -300,6 +623,7 @@ async def cleanup_storage():
     - Extraction results
     - Annotations
     - Logs
+    - Extraction cache
 
     Returns information about the cleanup operation.
     """
@@ -336,6 +660,14 @@ async def cleanup_storage():
         except Exception as e:
             result["errors"].append({"directory": dir_name, "error": str(e)})
 
+    # Drop cached extractions so they are not served for deleted files
+    try:
+        get_extraction_cache().clear()
+        get_page_cache().clear()
+        result["directories_cleaned"].append("cache")
+    except Exception as e:
+        result["errors"].append({"directory": "cache", "error": str(e)})
+
     return {
         "status": ("success" if not result["errors"] else "partial_success"),
         "message": (
@@ -348,9 +680,153 @@ async def cleanup_storage():
     }
 
 
+@maintenance_router.get("/cache/stats")
+async def cache_stats():
+    """
+    📈 Extraction cache statistics
+
+    Repeated uploads of the same file (with the same options) are served from
+    a content-addressed cache instead of running the model again, and pages
+    seen before in other documents are served from the page cache.
+
+    Returns hit/miss/eviction counters and the current size of both caches.
+    """
+    return {
+        "status": "success",
+        "message": "Cache statistics retrieved successfully",
+        "data": {
+            "documents": get_extraction_cache().stats(),
+            "pages": get_page_cache().stats(),
+        },
+    }
+
+
+@jobs_router.post("", status_code=202)
+async def submit_job(
+    request: Request,
+    file_id: str,
+    annotate: bool = True,
+    generate_summary: bool = True,
+    pipeline_mode: PipelineMode | None = None,
+):
+    """
+    ⏳ Queue an uploaded resume for background processing
+
+    Returns immediately with a job ID; poll `/jobs/{job_id}` for progress and
+    the result.
+
+    Parameters:
+    - **file_id**: ID of resume file to process
+    - **annotate**: Create visual annotations of detected fields (default: True)
+    - **generate_summary**: Create a professional summary of the candidate
+      (default: True)
+    - **pipeline_mode**: "direct" or "agents" (default: the PIPELINE_MODE setting)
+
+    Returns 503 when the job queue is full.
+    """
+    file_path = _find_upload(file_id)
+    if not file_path:
+        raise HTTPException(
+            status_code=404,
+            detail=f"File not found for ID: {file_id}",
+        )
+
+    job = _submit_job(
+        file_id,
+        file_path,
+        str(request.base_url),
+        annotate,
+        generate_summary,
+        pipeline_mode,
+    )
+    return {
+        "status": "success",
+        "message": "Job queued successfully",
+        "data": job.to_dict(),
+    }
+
+
+@jobs_router.post("/upload", status_code=202)
+async def upload_and_submit_job(
+    request: Request,
+    file: Annotated[UploadFile, File(...)],
+    annotate: bool = True,
+    generate_summary: bool = True,
+    pipeline_mode: PipelineMode | None = None,
+):
+    """
+    📤⏳ Upload a resume and queue it for background processing
+
+    Same as `/jobs`, for a file that has not been uploaded yet.
+
+    Parameters:
+    - **file**: PDF, PNG or DOCX resume file
+    - **annotate**: Create visual annotations of detected fields (default: True)
+    - **generate_summary**: Create a professional summary of the candidate
+      (default: True)
+    - **pipeline_mode**: "direct" or "agents" (default: the PIPELINE_MODE setting)
+    """
+    filename = _safe_filename(file.filename)
+    file_extension = os.path.splitext(filename)[1].lower()
+    if file_extension not in SUPPORTED_EXTENSIONS:
+        raise UnsupportedFileTypeError(file_extension)
+
+    file_path = await _save_upload(file)
+    job = _submit_job(
+        os.path.splitext(filename)[0],
+        file_path,
+        str(request.base_url),
+        annotate,
+        generate_summary,
+        pipeline_mode,
+    )
+    return {
+        "status": "success",
+        "message": "Job queued successfully",
+        "data": job.to_dict(),
+    }
+
+
+@jobs_router.get("/{job_id}")
+async def get_job(job_id: str):
+    """
+    ⏳ Job status, progress and result
+
+    Returns the job's status (`queued`, `running`, `completed` or `failed`),
+    the number of pages extracted so far and, once it has completed, the
+    same result `/resumes/process` returns.
+    """
+    job = get_job_manager().get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Job not found: {job_id}",
+        )
+    return {
+        "status": "success",
+        "message": "Job retrieved successfully",
+        "data": job.to_dict(),
+    }
+
+
+@jobs_router.get("")
+async def job_queue_stats():
+    """
+    ⏳ Background worker load
+
+    Returns the number of queued and running jobs and the pool limits.
+    """
+    return {
+        "status": "success",
+        "message": "Job statistics retrieved successfully",
+        "data": get_job_manager().stats(),
+    }
+
+
 # Create a combined router for easier inclusion in the main app
 router = APIRouter()
 router.include_router(upload_router)
 router.include_router(processing_router)
 router.include_router(results_router)
 router.include_router(maintenance_router)
+router.include_router(jobs_router)
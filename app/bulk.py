@@ -0,0 +1,196 @@
+"""
+Run the extraction pipeline over many resumes, without the API.
+
+Results are appended to a JSONL file, one line per resume. The content
+hashes of completed resumes are checkpointed next to it, so an interrupted
+run picks up where it stopped when started again with the same output.
+
+Usage:
+    python -m app.bulk storage/backfill --output results.jsonl
+    python -m app.bulk --manifest resumes.txt --output results.jsonl --workers 2
+"""
+
+import argparse
+import multiprocessing
+import os
+import queue
+import sys
+from collections.abc import Iterator
+from typing import Any
+
+from app.models.core import PipelineMode
+from app.services.bulk import (
+    Checkpoint,
+    ResultWriter,
+    discover_inputs,
+    hash_inputs,
+    process_inputs,
+    read_manifest,
+    shard_inputs,
+)
+
+
+def _process_file(
+    file_path: str,
+    use_annotator: bool,
+    generate_summary: bool,
+    pipeline_mode: PipelineMode | None,
+) -> dict[str, Any]:
+    """Run process_resume on one file."""
+    # Imported here so worker processes can pick their GPU before torch loads
+    from app.services.ocr_service import process_resume
+
+    return process_resume(
+        file_path,
+        use_annotator=use_annotator,
+        generate_summary=generate_summary,
+        pipeline_mode=pipeline_mode,
+    )
+
+
+def _run_inputs(
+    inputs: list[tuple[str, str]], options: dict[str, Any], concurrency: int
+) -> Iterator[dict[str, Any]]:
+    """Process inputs in this process."""
+    return process_inputs(
+        inputs, lambda path: _process_file(path, **options), concurrency
+    )
+
+
+def _shard_worker(
+    inputs: list[tuple[str, str]],
+    options: dict[str, Any],
+    concurrency: int,
+    device: str | None,
+    results: multiprocessing.Queue,
+) -> None:
+    """Worker process: run one shard and send its records to the parent."""
+    if device is not None:
+        os.environ["CUDA_VISIBLE_DEVICES"] = device
+    try:
+        for record in _run_inputs(inputs, options, concurrency):
+            results.put(record)
+    except Exception as e:
+        print(f"Worker failed: {str(e)}", file=sys.stderr)
+    finally:
+        results.put(None)
+
+
+def _run_sharded(
+    inputs: list[tuple[str, str]],
+    options: dict[str, Any],
+    concurrency: int,
+    workers: int,
+    devices: list[str],
+) -> Iterator[dict[str, Any]]:
+    """Split inputs across worker processes and yield their records."""
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    processes = []
+    for index, shard in enumerate(shard_inputs(inputs, workers)):
+        if not shard:
+            continue
+        device = devices[index % len(devices)] if devices else None
+        process = context.Process(
+            target=_shard_worker,
+            args=(shard, options, concurrency, device, results),
+            name=f"bulk-shard-{index}",
+        )
+        process.start()
+        processes.append(process)
+
+    running = len(processes)
+    while running:
+        try:
+            record = results.get(timeout=5)
+        except queue.Empty:
+            # A worker killed without sending its sentinel
+            running = min(running, sum(p.is_alive() for p in processes))
+            continue
+        if record is None:
+            running -= 1
+        else:
+            yield record
+    for process in processes:
+        process.join()
+
+
+def main() -> None:
+    """Parse the command line and run the bulk job."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("paths", nargs="*", help="Resume files or directories")
+    parser.add_argument("--manifest", help="File listing one resume path per line")
+    parser.add_argument("--output", required=True, help="JSONL file to append to")
+    parser.add_argument(
+        "--checkpoint", help="Checkpoint file (default: OUTPUT.checkpoint)"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=1, help="Worker processes (shards)"
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=0,
+        help="Resumes in flight per worker (default: BATCH_SIZE * PARALLEL_BATCHES)",
+    )
+    parser.add_argument(
+        "--devices", default="", help="Comma-separated GPU ids, one per worker"
+    )
+    parser.add_argument("--annotate", action="store_true")
+    parser.add_argument("--no-summary", action="store_true")
+    parser.add_argument(
+        "--pipeline-mode", choices=[mode.value for mode in PipelineMode]
+    )
+    args = parser.parse_args()
+
+    paths = list(args.paths)
+    if args.manifest:
+        paths += read_manifest(args.manifest)
+    if not paths:
+        parser.error("give resume paths, directories or --manifest")
+
+    from app.core.settings import get_settings
+
+    settings = get_settings()
+    concurrency = args.concurrency or settings.BATCH_SIZE * settings.PARALLEL_BATCHES
+    options = {
+        "use_annotator": args.annotate,
+        "generate_summary": not args.no_summary,
+        "pipeline_mode": args.pipeline_mode,
+    }
+
+    checkpoint = Checkpoint(args.checkpoint or f"{args.output}.checkpoint")
+    inputs, skipped = hash_inputs(discover_inputs(paths), checkpoint)
+    print(f"{len(inputs)} resumes to process, {skipped} already done or duplicates")
+    if not inputs:
+        return
+
+    if args.workers > 1:
+        devices = [d.strip() for d in args.devices.split(",") if d.strip()]
+        records = _run_sharded(inputs, options, concurrency, args.workers, devices)
+    else:
+        records = _run_inputs(inputs, options, concurrency)
+
+    writer = ResultWriter(args.output, checkpoint)
+    try:
+        for record in records:
+            writer.write(record)
+            meter = writer.meter
+            print(
+                f"[{meter.resumes}/{len(inputs)}] {record['status']:<9} "
+                f"{os.path.basename(record['path'])} | "
+                f"{meter.pages_per_sec:.2f} pages/s, "
+                f"{meter.resumes_per_min:.1f} resumes/min"
+            )
+    finally:
+        writer.close()
+
+    print(
+        f"Done: {writer.meter.resumes - writer.failed} completed, "
+        f"{writer.failed} failed, {len(inputs) - writer.meter.resumes} not run "
+        f"in {writer.meter.elapsed:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
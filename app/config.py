@@ -11,12 +11,17 @@ PREDICTIONS_DIR = os.path.join(STORAGE_DIR, "predictions")
 EXTRACTION_DIR = os.path.join(PREDICTIONS_DIR, "extraction_results")
 LOGS_DIR = os.path.join(PREDICTIONS_DIR, "logs")
 ANNOTATIONS_DIR = os.path.join(PREDICTIONS_DIR, "annotations")
+CACHE_DIR = os.path.join(STORAGE_DIR, "cache")
+EXTRACTION_CACHE_DIR = os.path.join(CACHE_DIR, "documents")
+PAGE_CACHE_DIR = os.path.join(CACHE_DIR, "pages")
 
 # Create necessary directories
 os.makedirs(UPLOADS_DIR, exist_ok=True)
 os.makedirs(EXTRACTION_DIR, exist_ok=True)
 os.makedirs(LOGS_DIR, exist_ok=True)
 os.makedirs(ANNOTATIONS_DIR, exist_ok=True)
+os.makedirs(EXTRACTION_CACHE_DIR, exist_ok=True)
+os.makedirs(PAGE_CACHE_DIR, exist_ok=True)
 
 SYSTEM_PROMPT = """
 Act as an advanced Resume/CV analysis assistant. Analyze the provided
@@ -98,6 +103,61 @@ Format your response as JSON:
 }
 """
 
+# JSON schemas mirroring the output formats above, used for constrained decoding.
+# Values are not length-limited, so long ones come through whole; the output
+# is bounded by the generation budget.
+_STRING = {"type": "string"}
+
+RESUME_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "PersonalInfo": {
+            "type": "object",
+            "properties": {
+                "Name": _STRING,
+                "Email": _STRING,
+                "Phone": _STRING,
+                "Location": _STRING,
+            },
+        },
+        "Education": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "Degree": _STRING,
+                    "Institution": _STRING,
+                    "GradDate": _STRING,
+                },
+            },
+        },
+        "WorkExperience": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "JobTitle": _STRING,
+                    "Company": _STRING,
+                    "Duration": _STRING,
+                    "Responsibilities": _STRING,
+                },
+            },
+        },
+        "Skills": {
+            "type": "object",
+            "properties": {
+                "TechnicalSkills": {"type": "array", "items": _STRING},
+                "Languages": {"type": "array", "items": _STRING},
+            },
+        },
+    },
+}
+
+SUMMARY_SCHEMA = {
+    "type": "object",
+    "properties": {"Summary": _STRING},
+}
+
 # Field colors for annotation
 FIELD_COLORS = {
     "Name": (0, 0, 255),  # Blue
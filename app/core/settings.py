@@ -2,18 +2,45 @@ from functools import lru_cache
 
 from pydantic_settings import BaseSettings
 
+from app.models.core import PipelineMode
+
 
 class Settings(BaseSettings):
     """Application settings."""
 
     APP_NAME: str = "Resume Parser AI"
+    MODEL_PATH: str = "/app/hf_models/Qwen2.5-VL-7B-Instruct"
     USE_GPU: bool = True
     BATCH_SIZE: int = 3
     PARALLEL_BATCHES: int = 1
+    BATCH_MAX_WAIT_MS: float = 20.0
+    PREFETCH_BATCHES: int = 1
+    PAGE_LOOKAHEAD: int = 4
+    JSON_EARLY_STOP: bool = True
+    CONSTRAINED_DECODING: bool = True
+    PREFIX_CACHE_MODE: bool = False
+    PREFIX_CACHE_MAX_ENTRIES: int = 4
+    PIPELINE_MODE: PipelineMode = PipelineMode.DIRECT
     ENABLE_ANNOTATION: bool = True
+    OCR_READER_POOL_SIZE: int = 1
+    OCR_WARMUP: bool = True
+    TEXT_LAYER_MODE: bool = True
+    TEXT_LAYER_MIN_CHARS: int = 200
+    CONTACT_RULES_MODE: bool = True
+    VISION_MIN_PIXELS: int = 256 * 28 * 28
+    VISION_MAX_PIXELS: int = 1600 * 960
+    EXTRACTION_CACHE_MODE: bool = True
+    EXTRACTION_CACHE_MAX_MB: int = 1024
+    PAGE_CACHE_MODE: bool = True
+    PAGE_CACHE_MAX_MB: int = 256
+    JOB_WORKERS: int = 0  # 0: BATCH_SIZE * PARALLEL_BATCHES
+    JOB_QUEUE_SIZE: int = 100
+    JOB_HISTORY: int = 1000
     DEBUG: bool = False
     ALLOWED_ORIGINS: str = "*"
     MAX_FILE_SIZE: int = 10_000_000  # 10 MB
+    ZIP_MAX_ENTRIES: int = 1000
+    ZIP_MAX_SIZE: int = 1_000_000_000  # 1 GB, uncompressed
 
     class Config:
         env_file = ".env"
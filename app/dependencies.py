@@ -1,5 +1,4 @@
 import os
-import sys
 from functools import lru_cache
 
 import torch
@@ -9,11 +8,12 @@ from transformers import (
     Qwen2_5_VLForConditionalGeneration,
 )
 
+from app import config
 from app.core.settings import get_settings
-
-sys.path.append(
-    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-)
+from app.services.cache import ExtractionCache
+from app.services.jobs import JobManager
+from app.services.prefix_cache import PrefixCache
+from app.services.scheduler import InferenceScheduler, QwenBackend
 
 
 @lru_cache
@@ -27,7 +27,7 @@ def get_model_and_processor():
     )
 
     # Use the pre-downloaded model path in hf_models directory
-    model_name = "/app/hf_models/Qwen2.5-VL-7B-Instruct"
+    model_name = settings.MODEL_PATH
 
     print(f"Loading model from: {model_name}")
     model = Qwen2_5_VLForConditionalGeneration.from_pretrained(
@@ -49,6 +49,60 @@ def get_model_and_processor():
     return model, processor
 
 
+@lru_cache
+def get_inference_scheduler() -> InferenceScheduler:
+    """Create the shared scheduler that batches generation across requests."""
+    settings = get_settings()
+    model, processor = get_model_and_processor()
+    prefix_cache = None
+    if settings.PREFIX_CACHE_MODE:
+        prefix_cache = PrefixCache(max_entries=settings.PREFIX_CACHE_MAX_ENTRIES)
+    return InferenceScheduler(
+        QwenBackend(
+            model,
+            processor,
+            stop_at_json_end=settings.JSON_EARLY_STOP,
+            prefix_cache=prefix_cache,
+        ),
+        max_batch_size=settings.BATCH_SIZE,
+        max_wait_ms=settings.BATCH_MAX_WAIT_MS,
+        num_workers=settings.PARALLEL_BATCHES,
+        prefetch_batches=settings.PREFETCH_BATCHES,
+    )
+
+
+@lru_cache
+def get_extraction_cache() -> ExtractionCache:
+    """Create the shared on-disk cache of extraction results."""
+    settings = get_settings()
+    return ExtractionCache(
+        config.EXTRACTION_CACHE_DIR,
+        max_bytes=settings.EXTRACTION_CACHE_MAX_MB * 1024 * 1024,
+    )
+
+
+@lru_cache
+def get_page_cache() -> ExtractionCache:
+    """Create the shared on-disk cache of per-page model outputs."""
+    settings = get_settings()
+    return ExtractionCache(
+        config.PAGE_CACHE_DIR, max_bytes=settings.PAGE_CACHE_MAX_MB * 1024 * 1024
+    )
+
+
+@lru_cache
+def get_job_manager() -> JobManager:
+    """Create the shared pool of background workers that run the pipeline."""
+    settings = get_settings()
+    # By default run enough resumes at once to fill every scheduler batch
+    return JobManager(
+        max_workers=settings.JOB_WORKERS
+        or settings.BATCH_SIZE * settings.PARALLEL_BATCHES,
+        max_queued=settings.JOB_QUEUE_SIZE,
+        max_finished=settings.JOB_HISTORY,
+    )
+
+
 def get_autogen_config():
     """Get configuration for AutoGen agents."""
     ollama_base_url = os.environ.get(
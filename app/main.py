@@ -1,24 +1,28 @@
 import gc
 import os
 import shutil
-import sys
 
-# Add parent directory to path
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-import config
 import torch
 import uvicorn
-from api.routers import resumes
-from dependencies import get_model_and_processor
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.docs import get_swagger_ui_html
 from fastapi.responses import ORJSONResponse, RedirectResponse
 from fastapi.staticfiles import StaticFiles
 
+from app import config
+from app.api.routers import metrics, resumes
+from app.core.settings import get_settings
+from app.dependencies import get_model_and_processor
+from app.services.ocr_pool import get_reader_pool, ocr_uses_gpu
+
 # First, preload the model before creating the FastAPI app
 model, processor = get_model_and_processor()
 
+# Load the annotator's OCR readers now rather than in the first request
+if get_settings().ENABLE_ANNOTATION and get_settings().OCR_WARMUP:
+    get_reader_pool().warm(gpu=ocr_uses_gpu())
+
 # Clear GPU memory on startup
 torch.cuda.empty_cache()
 torch.backends.cudnn.benchmark = True
@@ -62,6 +66,7 @@ app.add_middleware(
 
 # Include routers
 app.include_router(resumes.router, prefix="/api")
+app.include_router(metrics.router)
 
 # Mount static files for annotations
 app.mount(
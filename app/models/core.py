@@ -1,4 +1,4 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum
 
 
@@ -9,6 +9,13 @@ class FileType(str, Enum):
     PNG = "png"
 
 
+class PipelineMode(str, Enum):
+    """How process_resume chains extraction, summary and annotation."""
+
+    DIRECT = "direct"
+    AGENTS = "agents"
+
+
 class ProcessingStatus(str, Enum):
     """Status of invoice processing."""
 
@@ -17,6 +24,15 @@ class ProcessingStatus(str, Enum):
     PENDING = "pending"
 
 
+class JobStatus(str, Enum):
+    """Lifecycle of a background processing job."""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
 @dataclass
 class ProcessingMetrics:
     """Metrics for invoice processing."""
@@ -26,6 +42,7 @@ class ProcessingMetrics:
     total_execution_time: float | None = None
     ocr_time: float | None = None
     annotation_time: float | None = None
+    stage_times: dict[str, float] = field(default_factory=dict)
 
     def calculate_total_time(self):
         """Calculate total execution time."""
@@ -33,6 +50,25 @@ class ProcessingMetrics:
             self.total_execution_time = self.end_time - self.start_time
         return self.total_execution_time
 
+    def add_stage_time(self, stage: str, seconds: float) -> None:
+        """Accumulate time spent in a pipeline stage."""
+        self.stage_times[stage] = self.stage_times.get(stage, 0.0) + seconds
+
+    def to_dict(self) -> dict:
+        """Return the timings in seconds, rounded for the API response."""
+
+        def _round(seconds: float | None) -> float | None:
+            return None if seconds is None else round(seconds, 4)
+
+        return {
+            "total_execution_time": _round(self.total_execution_time),
+            "ocr_time": _round(self.ocr_time),
+            "annotation_time": _round(self.annotation_time),
+            "stage_times": {
+                stage: _round(seconds) for stage, seconds in self.stage_times.items()
+            },
+        }
+
 
 @dataclass
 class ProcessingResult:
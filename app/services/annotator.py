@@ -1,22 +1,23 @@
 import json
 import os
 import re
-import sys
+from collections import defaultdict
+from collections.abc import Iterator
+from contextlib import contextmanager
 from difflib import SequenceMatcher
 
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-import config
 import cv2
-import easyocr
-import fitz  # PyMuPDF
 import numpy as np
-from core.settings import get_settings
+from rapidfuzz import fuzz, process
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
 
-sys.path.append(
-    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-)
+from app import config
+from app.core.settings import get_settings
+from app.services.document import open_document
+from app.services.metrics import timed
+from app.services.ocr_pool import DEFAULT_LANGUAGES, get_reader_pool, ocr_uses_gpu
+from app.services.text_layer import extract_word_locations
 
 
 class ResumeAnnotator:
@@ -27,10 +28,18 @@ class ResumeAnnotator:
         self.json_data = json_data
         self.field_coordinates: dict[str, tuple[float, float, float, float]] = {}
         self.is_pdf = file_path.lower().endswith((".pdf", ".PDF"))
-        self.images = self._load_images()
+        # Pages are rendered one at a time, when they are annotated
+        with open_document(file_path) as document:
+            self.page_count = document.page_count
         self.img_height: int | None = None
         self.img_width: int | None = None
-        self.reader = easyocr.Reader(["en"], gpu=self._is_gpu_available())
+        # Born-digital PDF pages are located from their text layer, not OCR
+        settings = get_settings()
+        self.use_text_layer = self.is_pdf and settings.TEXT_LAYER_MODE
+        self.text_layer_min_chars = settings.TEXT_LAYER_MIN_CHARS
+        # Readers are borrowed from the process-wide pool for each page
+        self.ocr_languages = DEFAULT_LANGUAGES
+        self.ocr_gpu = ocr_uses_gpu()
         self.tfidf_vectorizer = TfidfVectorizer(analyzer="char_wb", ngram_range=(2, 4))
         self.field_colors = config.FIELD_COLORS
         self.default_color = config.DEFAULT_COLOR
@@ -39,41 +48,25 @@ class ResumeAnnotator:
         # Fields we want to annotate
         self.annotate_fields = ["Name", "Email", "Phone", "Location", "JobTitle"]
 
-    def _is_gpu_available(self):
-        """Check if GPU is available for OCR."""
-        try:
-            settings = get_settings()
-            if not settings.USE_GPU:
-                return False
-
-            import torch
-
-            return torch.cuda.is_available()
-        except ImportError:
-            return False
-
-    def _load_images(self):
-        """Load image(s) from file."""
-        if not self.is_pdf:
-            img = cv2.imread(self.file_path)
-            if img is None:
-                raise ValueError(f"Could not read image at {self.file_path}")
-            return [img]
-        else:
-            return self._convert_pdf_to_images()
-
-    def _convert_pdf_to_images(self) -> list:
-        """Convert PDF pages to images."""
-        doc = fitz.open(self.file_path)
-        imgs = []
-        for page in doc:
-            pix = page.get_pixmap(matrix=fitz.Matrix(2, 2))
-            np_img = np.frombuffer(pix.tobytes("png"), np.uint8)
-            img = cv2.imdecode(np_img, cv2.IMREAD_COLOR)
-            if img is not None:
-                imgs.append(img)
-        doc.close()
-        return imgs
+    @contextmanager
+    def page(self, index: int) -> Iterator[np.ndarray]:
+        """
+        Render one page for the duration of the block.
+
+        The image is released when the block exits, so annotating a document
+        holds a single page in memory at a time.
+
+        Args:
+            index: Zero-based page index
+
+        Yields:
+            BGR image of the page
+        """
+        with open_document(self.file_path) as document:
+            try:
+                yield document.page_image(index)
+            finally:
+                document.release_page(index)
 
     @staticmethod
     def normalize_bbox(bbox, w, h):
@@ -90,11 +83,34 @@ class ResumeAnnotator:
             int(norm_bbox[3] * h),
         )
 
+    def locate_text(self, image, page_index: int | None = None) -> dict:
+        """
+        Find text locations on a page, from its text layer when it has one.
+
+        Args:
+            image: BGR image of the page, read with OCR for scanned pages
+            page_index: Zero-based index of the page in the PDF
+
+        Returns:
+            Lowercased text mapped to normalized (x1, y1, x2, y2) boxes
+        """
+        if self.use_text_layer and page_index is not None:
+            with open_document(self.file_path) as document, timed("text_layer"):
+                locs = extract_word_locations(
+                    document.page(page_index), self.text_layer_min_chars
+                )
+            if locs is not None:
+                return locs
+        return self.find_text_locations(image)
+
+    @timed("ocr")
     def find_text_locations(self, image) -> dict:
         """Find text locations in the image using OCR."""
         h, w = image.shape[:2]
         locs = {}
-        for det in self.reader.readtext(image):
+        with get_reader_pool().reader(self.ocr_languages, self.ocr_gpu) as reader:
+            detections = reader.readtext(image)
+        for det in detections:
             bbox, text = det[0], det[1].lower()
             x1, y1 = min(bbox[0][0], bbox[3][0]), min(bbox[0][1], bbox[1][1])
             x2, y2 = max(bbox[1][0], bbox[2][0]), max(bbox[2][1], bbox[3][1])
@@ -151,15 +167,105 @@ class ResumeAnnotator:
         target = target.lower().strip()
         if target in candidates:
             return target, candidates[target], 1.0
+        cand_texts = list(candidates)
+        if not cand_texts:
+            return None, None, 0.0
+        bounds = self._sequence_bounds([target], cand_texts, field_type)[0]
+        best, score = self._best_sequence_match(target, cand_texts, bounds, field_type)
+        if best is None:
+            return None, None, 0.0
+        return cand_texts[best], candidates[cand_texts[best]], score
+
+    def _sequence_bounds(
+        self, targets: list[str], candidates: list[str], field_type: str
+    ) -> np.ndarray:
+        """
+        Bound the similarity of every target and candidate in one batched call.
+
+        rapidfuzz's normalized Indel similarity uses difflib's 2*M/T formula,
+        but counts the longest common subsequence, which is never shorter than
+        difflib's matching blocks. With the Email and Phone boosts applied, it
+        is an upper bound on the score _boost_similarity gives the same pair.
+
+        Args:
+            targets: Field values of one field type
+            candidates: Text found on the page
+            field_type: Field type deciding preprocessing and boosting
+
+        Returns:
+            Matrix of upper bounds in [0, 1], one row per target
+        """
+        clean_targets = [self._preprocess_field(t, field_type) for t in targets]
+        clean_cands = [self._preprocess_field(c, field_type) for c in candidates]
+        # float64, as float32 rounding could put a bound below the exact score
+        scores = (
+            process.cdist(
+                clean_targets, clean_cands, scorer=fuzz.ratio, dtype=np.float64
+            )
+            / 100
+        )
+
+        if field_type == "Email":
+            both_emails = np.outer(
+                ["@" in t for t in clean_targets], ["@" in c for c in clean_cands]
+            )
+            scores = np.where(both_emails, np.maximum(scores, 0.8), scores)
+        elif field_type == "Phone":
+            # Compare the digits only
+            target_digits = ["".join(re.findall(r"\d", t)) for t in clean_targets]
+            cand_digits = ["".join(re.findall(r"\d", c)) for c in clean_cands]
+            digit_scores = (
+                process.cdist(
+                    target_digits, cand_digits, scorer=fuzz.ratio, dtype=np.float64
+                )
+                / 100
+            )
+            similar = (digit_scores > 0.7) & np.outer(
+                [bool(d) for d in target_digits], [bool(d) for d in cand_digits]
+            )
+            scores = np.where(
+                similar, np.maximum(scores, 0.75 + digit_scores * 0.2), scores
+            )
+        return scores
+
+    def _best_sequence_match(
+        self,
+        target: str,
+        candidates: list[str],
+        bounds: np.ndarray,
+        field_type: str,
+        min_score: float = 0.0,
+    ) -> tuple[int | None, float]:
+        """
+        Find the candidate with the best difflib similarity to a target.
+
+        Candidates are scored in order with SequenceMatcher and
+        _boost_similarity, so ties go to the first one as before. Candidates
+        whose bound is below min_score or the best score so far are skipped.
+
+        Args:
+            target: Field value
+            candidates: Text found on the page
+            bounds: Upper bounds from _sequence_bounds for this target
+            field_type: Field type deciding preprocessing and boosting
+            min_score: Score a candidate must be able to reach to be scored
+
+        Returns:
+            Index of the best candidate, or None if none scores above 0, and
+            its score
+        """
         clean_target = self._preprocess_field(target, field_type)
-        best, best_score, best_coords = None, 0.0, None
-        for cand, coords in candidates.items():
-            clean_cand = self._preprocess_field(cand, field_type)
+        best, best_score = None, 0.0
+        # The slack keeps float rounding in the bounds from skipping a match
+        for i in np.flatnonzero(bounds + 1e-9 >= min_score):
+            if bounds[i] + 1e-9 < best_score:
+                continue
+            clean_cand = self._preprocess_field(candidates[i], field_type)
             ratio = SequenceMatcher(None, clean_target, clean_cand).ratio()
             ratio = self._boost_similarity(clean_target, clean_cand, ratio, field_type)
             if ratio > best_score:
-                best, best_score, best_coords = cand, ratio, coords
-        return best, best_coords, best_score
+                best, best_score = int(i), ratio
+        return best, best_score
 
     def _preprocess_field(self, text: str, field_type: str) -> str:
         """Preprocess field text for matching."""
@@ -235,28 +341,31 @@ class ResumeAnnotator:
         box_thickness: int = 2,
         text_size: float = 0.4,
     ):
-        """Annotate the document with field bounding boxes."""
-        results = self.process_document()
+        """Annotate the document page by page; returns the written image paths."""
         os.makedirs(output_dir, exist_ok=True)
         base = os.path.splitext(os.path.basename(self.file_path))[0]
-        annotated_images = []
-        for page in results:
-            idx = page["page"]
-            annotated = self._annotate_image(
-                self.images[idx],
-                page["coordinates"],
-                box_thickness,
-                text_size,
-            )
-            annotated_images.append(annotated)
+        output_paths = []
+        for idx in range(self.page_count):
+            with self.page(idx) as image:
+                page = self._process_page(idx, image)
+                annotated = self._annotate_image(
+                    image,
+                    page["coordinates"],
+                    box_thickness,
+                    text_size,
+                )
             fname = (
                 f"{base}_page{idx + 1}.png"
-                if len(self.images) > 1
+                if self.page_count > 1
                 else f"{base}_annotated.png"
             )
-            cv2.imwrite(os.path.join(output_dir, fname), annotated)
-        return annotated_images
+            output_path = os.path.join(output_dir, fname)
+            with timed("persistence"):
+                cv2.imwrite(output_path, annotated)
+            output_paths.append(output_path)
+        return output_paths
 
+    @timed("drawing")
     def _annotate_image(self, image, field_coords, box_thickness, text_size):
         """Annotate a single image with field bounding boxes."""
         img_copy = image.copy()
@@ -290,36 +399,42 @@ class ResumeAnnotator:
     def process_document(self):
         """Process the document to find field coordinates."""
         results = []
-        for idx, img in enumerate(self.images):
-            self.img_height, self.img_width = img.shape[:2]
-            locs = self.find_text_locations(img)
-
-            # For multi-page PDFs, we need to get the page-specific JSON data
-            if self.is_pdf and len(self.images) > 1:
-                page_key = f"page{idx + 1}"
-                if "pages" in self.json_data and page_key in self.json_data["pages"]:
-                    page_json = self.json_data["pages"][page_key]
-                else:
-                    page_json = self.json_data
+        for idx in range(self.page_count):
+            with self.page(idx) as img:
+                results.append(self._process_page(idx, img))
+        return results
+
+    def _process_page(self, idx, img):
+        """Find the field coordinates on one page image."""
+        self.img_height, self.img_width = img.shape[:2]
+        locs = self.locate_text(img, idx)
+
+        # For multi-page PDFs, we need to get the page-specific JSON data
+        if self.is_pdf and self.page_count > 1:
+            page_key = f"page{idx + 1}"
+            if "pages" in self.json_data and page_key in self.json_data["pages"]:
+                page_json = self.json_data["pages"][page_key]
             else:
                 page_json = self.json_data
+        else:
+            page_json = self.json_data
 
-            # Flatten the JSON data for this page
-            flat_json = self._flatten_json(page_json)
+        # Flatten the JSON data for this page
+        flat_json = self._flatten_json(page_json)
 
-            self.field_coordinates = self._match_fields(locs, flat_json)
-            results.append(
-                {
-                    "page": idx,
-                    "coordinates": self.field_coordinates.copy(),
-                    "dimensions": (self.img_width, self.img_height),
-                }
-            )
-        return results
+        self.field_coordinates = self._match_fields(locs, flat_json)
+        return {
+            "page": idx,
+            "coordinates": self.field_coordinates.copy(),
+            "dimensions": (self.img_width, self.img_height),
+        }
 
+    @timed("matching")
     def _match_fields(self, text_locations: dict, flat_json: dict) -> dict:
         """Match fields in the JSON data to text locations."""
         coords = {}
+        # Sequence-matched fields are bounded together, one matrix per type
+        sequence_fields: dict[str, list[tuple[str, str]]] = defaultdict(list)
 
         for field, val in flat_json.items():
             # Only process the fields we want to annotate
@@ -336,19 +451,32 @@ class ResumeAnnotator:
                 continue
 
             # Determine which matching method to use based on field type
-            if field_type in self.tfidf_fields:
-                _, coord, score = self.find_tfidf_match(val_str, text_locations)
-            elif field_type in self.sequence_matcher_fields:
-                _, coord, score = self.find_sequence_match(
-                    val_str, text_locations, field_type
-                )
-            else:
-                _, coord, score = self.find_tfidf_match(val_str, text_locations)
+            if field_type in self.sequence_matcher_fields:
+                sequence_fields[field_type].append((field, val_str))
+                continue
+            _, coord, score = self.find_tfidf_match(val_str, text_locations)
 
             # Only include fields with a good match score
             if score >= 0.7 and coord:
                 coords[field] = coord
-        return coords
+
+        cand_texts = list(text_locations)
+        for field_type, fields in sequence_fields.items():
+            if not cand_texts:
+                break
+            bounds = self._sequence_bounds(
+                [val_str for _, val_str in fields], cand_texts, field_type
+            )
+            for (field, val_str), row in zip(fields, bounds, strict=True):
+                best, score = self._best_sequence_match(
+                    val_str, cand_texts, row, field_type, min_score=0.7
+                )
+                coord = text_locations[cand_texts[best]] if best is not None else None
+                if score >= 0.7 and coord:
+                    coords[field] = coord
+
+        # Keep the fields in data order, as they are drawn
+        return {field: coords[field] for field in flat_json if field in coords}
 
     def annotate_page(
         self,
@@ -357,15 +485,17 @@ class ResumeAnnotator:
         output_path,
         box_thickness=2,
         text_size=0.6,
+        page_index=None,
     ):
         """Annotate a single page."""
         original_json = self.json_data
         self.json_data = page_json
-        locs = self.find_text_locations(image)
+        locs = self.locate_text(image, page_index)
         flat_json = self._flatten_json(page_json)
         field_coords = self._match_fields(locs, flat_json)
         annotated = self._annotate_image(image, field_coords, box_thickness, text_size)
-        cv2.imwrite(output_path, annotated)
+        with timed("persistence"):
+            cv2.imwrite(output_path, annotated)
         self.json_data = original_json
         return annotated
 
@@ -381,32 +511,44 @@ def annotate_resume(file_path: str, json_file: str, output_dir: str) -> None:
     """
     with open(json_file) as f:
         json_data = json.load(f)
+    annotate_resume_data(file_path, json_data, output_dir)
+
+
+@timed("annotation")
+def annotate_resume_data(file_path: str, json_data: dict, output_dir: str) -> None:
+    """
+    Annotate a resume file using extracted data held in memory.
+
+    The data is only read, so other stages can use it at the same time.
+
+    Args:
+        file_path: Path to the resume file (PDF or PNG)
+        json_data: Extracted resume data
+        output_dir: Directory to save annotated images
+    """
     os.makedirs(output_dir, exist_ok=True)
 
     if "pages" in json_data:
         if file_path.lower().endswith((".pdf", ".PDF")):
             try:
-                doc = fitz.open(file_path)
+                # Each page is rendered from the shared document only while
+                # it is annotated, then released
                 annotator = ResumeAnnotator(
                     file_path, {}
                 )  # Will override JSON per page
-                for page_num in range(len(doc)):
+                for page_num in range(annotator.page_count):
                     page_key = f"page{page_num + 1}"
                     if page_key not in json_data["pages"]:
                         continue
                     page_data = json_data["pages"][page_key]
-                    page = doc.load_page(page_num)
-                    pix = page.get_pixmap(matrix=fitz.Matrix(2, 2))
-                    img = cv2.imdecode(
-                        np.frombuffer(pix.tobytes("png"), np.uint8),
-                        cv2.IMREAD_COLOR,
-                    )
                     base = os.path.splitext(os.path.basename(file_path))[0]
                     output_path = os.path.join(
                         output_dir, f"{base}_page{page_num + 1}.png"
                     )
-                    annotator.annotate_page(img, page_data, output_path)
-                doc.close()
+                    with annotator.page(page_num) as img:
+                        annotator.annotate_page(
+                            img, page_data, output_path, page_index=page_num
+                        )
             except Exception as e:
                 print(f"Error annotating multi-page PDF: {e}")
                 ResumeAnnotator(file_path, json_data).annotate_document(output_dir)
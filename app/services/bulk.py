@@ -0,0 +1,257 @@
+import json
+import os
+import threading
+import time
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import as_completed
+from typing import Any, TextIO
+
+from app.services.cache import file_sha256
+from app.services.jobs import JobManager
+
+# Resume files picked up when walking a directory
+SUPPORTED_EXTENSIONS = (".pdf", ".png")
+
+
+def read_manifest(manifest_path: str) -> list[str]:
+    """
+    Read the resume paths listed in a manifest file.
+
+    The manifest has one path per line; relative paths are resolved against
+    the manifest's folder. Blank lines and lines starting with ``#`` are
+    ignored.
+
+    Args:
+        manifest_path: Path to the manifest file
+
+    Returns:
+        Absolute paths, in manifest order
+    """
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    paths = []
+    with open(manifest_path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                paths.append(os.path.abspath(os.path.join(base_dir, line)))
+    return paths
+
+
+def discover_inputs(paths: Iterable[str]) -> list[str]:
+    """
+    Expand files and directories into the resume files to process.
+
+    Directories are walked recursively and only files with a supported
+    extension are kept; files given directly are always kept. Duplicate
+    paths are dropped.
+
+    Args:
+        paths: Files and directories
+
+    Returns:
+        Absolute file paths, directories expanded in sorted order
+    """
+    found: dict[str, None] = {}
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    if name.lower().endswith(SUPPORTED_EXTENSIONS):
+                        found[os.path.abspath(os.path.join(root, name))] = None
+        else:
+            found[os.path.abspath(path)] = None
+    return list(found)
+
+
+def shard_inputs(
+    inputs: list[tuple[str, str]], num_shards: int
+) -> list[list[tuple[str, str]]]:
+    """
+    Split (path, content hash) pairs into shards by content hash.
+
+    The same file always lands in the same shard, whatever else is in the
+    input.
+
+    Args:
+        inputs: (path, SHA-256 of the contents) per file
+        num_shards: Number of shards
+
+    Returns:
+        One list of inputs per shard
+    """
+    shards: list[list[tuple[str, str]]] = [[] for _ in range(max(1, num_shards))]
+    for path, sha256 in inputs:
+        shards[int(sha256, 16) % len(shards)].append((path, sha256))
+    return shards
+
+
+class Checkpoint:
+    """Append-only record of the files a bulk run has finished."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.done: set[str] = set()
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.done = {line.strip() for line in f if line.strip()}
+        self._file: TextIO | None = None
+
+    def __contains__(self, sha256: str) -> bool:
+        return sha256 in self.done
+
+    def add(self, sha256: str) -> None:
+        """Mark a file as finished; survives the process being killed."""
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")  # noqa: SIM115
+        self._file.write(sha256 + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.done.add(sha256)
+
+    def close(self) -> None:
+        """Close the checkpoint file."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class ThroughputMeter:
+    """Running resumes-per-minute and pages-per-second of a bulk run."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.resumes = 0
+        self.pages = 0
+
+    def add(self, pages: int) -> None:
+        """Count one finished resume with the given number of pages."""
+        self.resumes += 1
+        self.pages += pages
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds since the run started."""
+        return max(time.perf_counter() - self.started, 1e-9)
+
+    @property
+    def pages_per_sec(self) -> float:
+        """Pages finished per second."""
+        return self.pages / self.elapsed
+
+    @property
+    def resumes_per_min(self) -> float:
+        """Resumes finished per minute."""
+        return self.resumes * 60 / self.elapsed
+
+
+def hash_inputs(
+    paths: Iterable[str], checkpoint: Checkpoint
+) -> tuple[list[tuple[str, str]], int]:
+    """
+    Hash the input files and drop the ones already in the checkpoint.
+
+    Files with the same contents are processed once.
+
+    Args:
+        paths: Resume file paths
+        checkpoint: Checkpoint of the run
+
+    Returns:
+        Tuple of ((path, SHA-256) per file still to process, number of files
+        skipped)
+    """
+    todo: dict[str, str] = {}
+    skipped = 0
+    for path in paths:
+        sha256 = file_sha256(path)
+        if sha256 in checkpoint or sha256 in todo:
+            skipped += 1
+        else:
+            todo[sha256] = path
+    return [(path, sha256) for sha256, path in todo.items()], skipped
+
+
+def process_inputs(
+    inputs: list[tuple[str, str]],
+    process_fn: Callable[[str], dict[str, Any]],
+    concurrency: int,
+) -> Iterator[dict[str, Any]]:
+    """
+    Run files through the pipeline and yield a record for each as it finishes.
+
+    ``concurrency`` files are processed at once, so the inference scheduler
+    can batch their pages together.
+
+    Args:
+        inputs: (path, SHA-256) per file
+        process_fn: Function running the pipeline on one file path
+        concurrency: Number of files processed at the same time
+
+    Yields:
+        Result records with path, sha256, status, pages, result and error
+    """
+    manager = JobManager(
+        max_workers=concurrency, max_queued=len(inputs), max_finished=0
+    )
+    try:
+        jobs = {
+            manager.submit(os.path.basename(path), process_fn, path).future: (
+                path,
+                sha256,
+            )
+            for path, sha256 in inputs
+        }
+        for future in as_completed(jobs):
+            path, sha256 = jobs[future]
+            record: dict[str, Any] = {"path": path, "sha256": sha256}
+            try:
+                result = future.result()
+            except Exception as e:
+                record.update(status="failed", pages=0, result=None, error=str(e))
+            else:
+                record.update(
+                    status="completed",
+                    pages=len(result.get("pages", [])),
+                    result=result,
+                    error=None,
+                )
+            yield record
+    finally:
+        manager.shutdown(wait=False)
+
+
+class ResultWriter:
+    """Write bulk results to JSONL and checkpoint the completed files."""
+
+    def __init__(self, output_path: str, checkpoint: Checkpoint):
+        self.checkpoint = checkpoint
+        self.meter = ThroughputMeter()
+        self.failed = 0
+        self._lock = threading.Lock()
+        self._file = open(output_path, "a", encoding="utf-8")  # noqa: SIM115
+
+    def write(self, record: dict[str, Any]) -> None:
+        """
+        Append one result record.
+
+        The record is on disk before its file is checkpointed, so an
+        interrupted run may repeat a file but never loses one. Failed files
+        are not checkpointed and are retried by the next run.
+
+        Args:
+            record: Result record from process_inputs
+        """
+        with self._lock:
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._file.flush()
+            if record["status"] == "completed":
+                self.checkpoint.add(record["sha256"])
+            else:
+                self.failed += 1
+            self.meter.add(record["pages"])
+
+    def close(self) -> None:
+        """Close the output and checkpoint files."""
+        self._file.close()
+        self.checkpoint.close()
@@ -0,0 +1,199 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Any
+
+RESULT_FILE = "result.json"
+FILES_DIR = "files"
+
+
+def file_sha256(file_path: str, chunk_size: int = 1 << 20) -> str:
+    """
+    Hash a file's contents without loading it into memory at once.
+
+    Args:
+        file_path: Path to the file
+        chunk_size: Number of bytes read per step
+
+    Returns:
+        Hex SHA-256 digest of the file contents
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def make_cache_key(content_hash: str, **parts: Any) -> str:
+    """
+    Combine a content hash with everything else that affects the result.
+
+    Args:
+        content_hash: Hash of the input (file bytes, page content, ...)
+        **parts: Prompt version, model id, processing options, ...
+
+    Returns:
+        Hex SHA-256 digest identifying the cache entry
+    """
+    payload = json.dumps(
+        {"content": content_hash, **parts}, sort_keys=True, default=str
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ExtractionCache:
+    """Size-bounded LRU cache of JSON results (and their files) on disk."""
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        # Entry key -> size in bytes, least recently used first
+        self._entries: OrderedDict[str, int] = OrderedDict()
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load()
+
+    def get(self, key: str) -> tuple[dict[str, Any], dict[str, str]] | None:
+        """
+        Look up a cached result.
+
+        Args:
+            key: Cache key from make_cache_key
+
+        Returns:
+            Tuple of (stored value, name -> path of stored files), or None
+        """
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+
+            entry_dir = self._entry_dir(key)
+            result_path = os.path.join(entry_dir, RESULT_FILE)
+            try:
+                with open(result_path, encoding="utf-8") as f:
+                    value = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                # Entry was removed or damaged behind our back
+                self._remove(key)
+                self.misses += 1
+                return None
+
+            # Touch the entry so the LRU order survives restarts
+            os.utime(result_path)
+            self._entries.move_to_end(key)
+            self.hits += 1
+
+            files_dir = os.path.join(entry_dir, FILES_DIR)
+            files = {}
+            if os.path.isdir(files_dir):
+                files = {
+                    name: os.path.join(files_dir, name)
+                    for name in sorted(os.listdir(files_dir))
+                }
+            return value, files
+
+    def put(
+        self,
+        key: str,
+        value: dict[str, Any],
+        files: dict[str, str] | None = None,
+    ) -> None:
+        """
+        Store a result, evicting least recently used entries if needed.
+
+        Args:
+            key: Cache key from make_cache_key
+            value: JSON-serializable result
+            files: Optional name -> path of files to keep with the result
+        """
+        # Build the entry next to its final location and move it in at once,
+        # so readers never see a half-written entry
+        tmp_dir = os.path.join(self.cache_dir, f".tmp-{uuid.uuid4().hex}")
+        os.makedirs(tmp_dir)
+        try:
+            with open(os.path.join(tmp_dir, RESULT_FILE), "w", encoding="utf-8") as f:
+                json.dump(value, f, ensure_ascii=False)
+            for name, path in (files or {}).items():
+                if os.path.isfile(path):
+                    os.makedirs(os.path.join(tmp_dir, FILES_DIR), exist_ok=True)
+                    shutil.copyfile(path, os.path.join(tmp_dir, FILES_DIR, name))
+            size = _dir_size(tmp_dir)
+
+            with self._lock:
+                if key in self._entries:
+                    self._remove(key)
+                os.replace(tmp_dir, self._entry_dir(key))
+                self._entries[key] = size
+                self._evict()
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    def clear(self) -> None:
+        """Remove every entry from the cache."""
+        with self._lock:
+            for key in list(self._entries):
+                self._remove(key)
+
+    def stats(self) -> dict[str, int]:
+        """Return hit/miss counters and the current cache size."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "size_bytes": sum(self._entries.values()),
+                "max_bytes": self.max_bytes,
+            }
+
+    def _entry_dir(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key)
+
+    def _load(self) -> None:
+        """Index existing entries, oldest access first."""
+        found = []
+        for name in os.listdir(self.cache_dir):
+            entry_dir = os.path.join(self.cache_dir, name)
+            if name.startswith(".tmp-"):
+                # Left over from an interrupted put
+                shutil.rmtree(entry_dir, ignore_errors=True)
+                continue
+            result_path = os.path.join(entry_dir, RESULT_FILE)
+            if os.path.isfile(result_path):
+                found.append((os.path.getmtime(result_path), name, entry_dir))
+        for _, name, entry_dir in sorted(found):
+            self._entries[name] = _dir_size(entry_dir)
+        with self._lock:
+            self._evict()
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until the cache fits its budget."""
+        total = sum(self._entries.values())
+        while self._entries and total > self.max_bytes:
+            key, size = next(iter(self._entries.items()))
+            self._remove(key)
+            self.evictions += 1
+            total -= size
+
+    def _remove(self, key: str) -> None:
+        self._entries.pop(key, None)
+        shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+
+
+def _dir_size(path: str) -> int:
+    """Return the total size of the files below a directory."""
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(path)
+        for name in names
+    )
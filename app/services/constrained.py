@@ -0,0 +1,319 @@
+import copy
+import itertools
+import json
+from collections.abc import Generator, Iterable
+from dataclasses import dataclass
+from typing import Any
+
+import torch
+from transformers import LogitsProcessor
+
+
+@dataclass(frozen=True)
+class LiteralStep:
+    """Text the output must contain verbatim."""
+
+    text: str
+
+
+@dataclass(frozen=True)
+class ChoiceStep:
+    """One of several texts; the grammar is told which one was taken."""
+
+    options: tuple[str, ...]
+
+
+@dataclass(frozen=True)
+class StringStep:
+    """Body of a JSON string, ended by an unescaped double quote."""
+
+    # None when the schema sets no maxLength
+    max_length: int | None
+
+
+Step = LiteralStep | ChoiceStep | StringStep
+
+
+def omit_schema_fields(schema: dict[str, Any], fields: Iterable[str]) -> dict[str, Any]:
+    """
+    Drop properties from a JSON schema at any depth.
+
+    Args:
+        schema: JSON schema (e.g. config.RESUME_SCHEMA)
+        fields: Property names the model no longer needs to produce
+
+    Returns:
+        Copy of the schema without those properties
+    """
+    fields = set(fields)
+    schema = copy.deepcopy(schema)
+    stack = [schema]
+    while stack:
+        node = stack.pop()
+        if "properties" in node:
+            for name in fields & set(node["properties"]):
+                del node["properties"][name]
+            stack.extend(node["properties"].values())
+        if "items" in node:
+            stack.append(node["items"])
+    return schema
+
+
+def _prefix(schema: dict[str, Any]) -> str:
+    """Return the fixed text every value of this schema starts with."""
+    kind = schema["type"]
+    if kind == "string":
+        return '"'
+    if kind == "array":
+        return "["
+    if kind == "object":
+        properties = schema.get("properties", {})
+        if not properties:
+            return "{}"
+        name, first = next(iter(properties.items()))
+        return "{" + json.dumps(name) + ":" + _prefix(first)
+    raise ValueError(f"Unsupported schema type: {kind}")
+
+
+def schema_steps(
+    schema: dict[str, Any], prefixed: bool = False
+) -> Generator[Step, int | None, None]:
+    """
+    Walk a JSON schema as the sequence of steps of its compact serialization.
+
+    Objects produce their properties in schema order without whitespace.
+    Strings and arrays are only bounded when maxLength / maxItems is set.
+    After a ChoiceStep the caller sends the index of the option taken.
+
+    Args:
+        schema: Subset of JSON schema: object (properties), array (items,
+            maxItems) and string (maxLength)
+        prefixed: Whether the value's fixed prefix was already produced
+
+    Yields:
+        Steps describing what the output may contain next
+    """
+    if not prefixed:
+        yield LiteralStep(_prefix(schema))
+
+    kind = schema["type"]
+    if kind == "string":
+        yield StringStep(schema.get("maxLength"))
+    elif kind == "object":
+        properties = list(schema.get("properties", {}).items())
+        if not properties:
+            return
+        yield from schema_steps(properties[0][1], prefixed=True)
+        for name, value in properties[1:]:
+            yield LiteralStep("," + json.dumps(name) + ":")
+            yield from schema_steps(value)
+        yield LiteralStep("}")
+    elif kind == "array":
+        item = schema["items"]
+        separator = ""
+        max_items = schema.get("maxItems")
+        for _ in itertools.count() if max_items is None else range(max_items):
+            choice = yield ChoiceStep(("]", separator + _prefix(item)))
+            if choice == 0:
+                return
+            yield from schema_steps(item, prefixed=True)
+            separator = ","
+        yield LiteralStep("]")
+
+
+class SchemaMatcher:
+    """Track how far generated text has progressed through a schema."""
+
+    def __init__(self, schema: dict[str, Any]):
+        self._steps = schema_steps(schema)
+        self._lookahead: Step | None = None
+        self.step: Step | None = None
+        self.matched = ""
+        self.done = False
+        self._advance(next(self._steps))
+
+    def feed(self, text: str) -> None:
+        """
+        Consume generated text.
+
+        Args:
+            text: Newly generated text
+
+        Raises:
+            ValueError: If the text cannot continue the schema
+        """
+        for char in text:
+            step = self.step
+            if step is None:
+                raise ValueError("Output is already complete")
+            if isinstance(step, StringStep):
+                if char == '"':
+                    self._advance(self._pull(None))
+                elif char == "\\" or ord(char) < 0x20:
+                    raise ValueError(f"Unsupported character in string: {char!r}")
+                elif (
+                    step.max_length is not None and len(self.matched) >= step.max_length
+                ):
+                    raise ValueError("String exceeds maxLength")
+                else:
+                    self.matched += char
+            elif isinstance(step, LiteralStep):
+                if step.text[len(self.matched)] != char:
+                    raise ValueError(f"Expected {step.text!r}, got {char!r}")
+                self.matched += char
+                if self.matched == step.text:
+                    self._advance(self._lookahead_or_pull())
+            else:
+                self.matched += char
+                live = [o for o in step.options if o.startswith(self.matched)]
+                if not live:
+                    raise ValueError(f"Expected one of {step.options!r}")
+                if self.matched in step.options:
+                    self._advance(self._pull(step.options.index(self.matched)))
+
+    def remaining(self) -> list[str]:
+        """Return the texts that may follow for a literal or choice step."""
+        if isinstance(self.step, LiteralStep):
+            return [self.step.text[len(self.matched) :]]
+        if isinstance(self.step, ChoiceStep):
+            return [
+                option[len(self.matched) :]
+                for option in self.step.options
+                if option.startswith(self.matched)
+            ]
+        return []
+
+    def _pull(self, value: int | None) -> Step | None:
+        try:
+            return self._steps.send(value)
+        except StopIteration:
+            return None
+
+    def _lookahead_or_pull(self) -> Step | None:
+        step, self._lookahead = self._lookahead, None
+        return step if step is not None else self._pull(None)
+
+    def _advance(self, step: Step | None) -> None:
+        """Make a step current, joining runs of literal text into one."""
+        while isinstance(step, LiteralStep) and self._lookahead is None:
+            following = self._pull(None)
+            if isinstance(following, LiteralStep):
+                step = LiteralStep(step.text + following.text)
+            else:
+                self._lookahead = following
+                break
+        self.step = step
+        self.matched = ""
+        self.done = step is None
+
+
+class TokenIndex:
+    """Decoded text of every vocabulary token, prepared for masking."""
+
+    def __init__(self, tokenizer: Any):
+        special_ids = set(tokenizer.all_special_ids)
+        self.texts = [tokenizer.decode([i]) for i in range(len(tokenizer))]
+        self.by_text: dict[str, int] = {}
+        for token_id, text in enumerate(self.texts):
+            if text and token_id not in special_ids:
+                self.by_text.setdefault(text, token_id)
+        self.max_length = max(len(text) for text in self.by_text)
+
+        # Tokens allowed inside a JSON string body, and their lengths
+        self.body_mask = torch.tensor(
+            [
+                bool(text)
+                and token_id not in special_ids
+                and '"' not in text
+                and "\\" not in text
+                and all(ord(char) >= 0x20 for char in text)
+                for token_id, text in enumerate(self.texts)
+            ]
+        )
+        self.lengths = torch.tensor([len(text) for text in self.texts])
+        self.quote_id = self.by_text['"']
+
+    def longest_prefix(self, text: str) -> int | None:
+        """Return the token covering the longest possible prefix of text."""
+        for end in range(min(len(text), self.max_length), 0, -1):
+            token_id = self.by_text.get(text[:end])
+            if token_id is not None:
+                return token_id
+        return None
+
+
+# Tokenizer id -> (tokenizer, index); keeping the tokenizer pins its id
+_token_indexes: dict[int, tuple[Any, TokenIndex]] = {}
+
+
+def get_token_index(tokenizer: Any) -> TokenIndex:
+    """Build the token index for a tokenizer once per process."""
+    if id(tokenizer) not in _token_indexes:
+        _token_indexes[id(tokenizer)] = (tokenizer, TokenIndex(tokenizer))
+    return _token_indexes[id(tokenizer)][1]
+
+
+class JsonSchemaLogitsProcessor(LogitsProcessor):
+    """
+    Restrict generation to compact JSON matching a schema.
+
+    Wherever the schema fixes the text (braces, keys, separators), only the
+    token covering the longest part of it is allowed, so the structure is
+    decided without the model and without whitespace. Inside strings, only
+    tokens that cannot break the JSON are allowed. Sequences whose schema
+    is None are left unconstrained.
+    """
+
+    def __init__(
+        self,
+        tokenizer: Any,
+        schemas: list[dict[str, Any] | None],
+        eos_token_ids: Iterable[int],
+    ):
+        self.index = get_token_index(tokenizer)
+        self.matchers = [
+            SchemaMatcher(schema) if schema is not None else None for schema in schemas
+        ]
+        self.eos_token_ids = list(eos_token_ids)
+        self._prompt_length: int | None = None
+
+    def __call__(
+        self, input_ids: torch.LongTensor, scores: torch.FloatTensor
+    ) -> torch.Tensor:
+        """Mask the scores of every token the schema does not allow."""
+        if self._prompt_length is None:
+            self._prompt_length = input_ids.shape[1]
+        has_new_token = input_ids.shape[1] > self._prompt_length
+
+        allowed = torch.zeros_like(scores, dtype=torch.bool)
+        for row, matcher in enumerate(self.matchers):
+            if matcher is not None and has_new_token and not matcher.done:
+                token_id = int(input_ids[row, -1])
+                try:
+                    matcher.feed(self.index.texts[token_id])
+                except (ValueError, IndexError):
+                    # Should not happen; fall back to unconstrained decoding
+                    self.matchers[row] = matcher = None
+            self._allow(allowed[row], matcher)
+        return scores.masked_fill(~allowed, float("-inf"))
+
+    def _allow(self, allowed: torch.Tensor, matcher: SchemaMatcher | None) -> None:
+        """Set the allowed tokens of one sequence."""
+        if matcher is None:
+            allowed[:] = True
+        elif matcher.done:
+            allowed[self.eos_token_ids] = True
+        elif isinstance(matcher.step, StringStep):
+            index = self.index
+            vocab_size = len(index.texts)
+            body = index.body_mask
+            if matcher.step.max_length is not None:
+                room = matcher.step.max_length - len(matcher.matched)
+                body = body & (index.lengths <= room)
+            allowed[:vocab_size] = body.to(allowed.device)
+            allowed[index.quote_id] = True
+        else:
+            for text in matcher.remaining():
+                token_id = self.index.longest_prefix(text)
+                if token_id is not None:
+                    allowed[token_id] = True
@@ -0,0 +1,177 @@
+import os
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+import cv2
+import fitz  # PyMuPDF
+import numpy as np
+
+from app.services.metrics import timed
+from app.services.rendering import pixmap_to_bgr
+
+# Document opened by the request the current thread (or task) works on
+_active_document: ContextVar["DocumentContext | None"] = ContextVar(
+    "active_document", default=None
+)
+
+
+class DocumentContext:
+    """Resume file opened once and shared by the pipeline stages of a request."""
+
+    def __init__(self, file_path: str):
+        self.file_path = os.path.abspath(file_path)
+        self.is_pdf = self.file_path.lower().endswith(".pdf")
+        self._lock = threading.RLock()
+        self._doc: fitz.Document | None = None
+        self._image: np.ndarray | None = None
+        self._page_sizes: list[tuple[int, int]] | None = None
+        # (page index, zoom) -> rendered BGR page
+        self._rasters: dict[tuple[int, float], np.ndarray] = {}
+
+    @property
+    def doc(self) -> fitz.Document:
+        """Open PDF document, opened on first use."""
+        with self._lock:
+            if self._doc is None:
+                self._doc = fitz.open(self.file_path)
+            return self._doc
+
+    @property
+    def page_count(self) -> int:
+        """Number of pages (1 for image files)."""
+        return len(self.doc) if self.is_pdf else 1
+
+    def page(self, index: int) -> fitz.Page:
+        """Load one page of the PDF."""
+        with self._lock:
+            return self.doc.load_page(index)
+
+    def page_size(self, index: int) -> tuple[int, int]:
+        """
+        Return the size of a page.
+
+        Args:
+            index: Zero-based page index
+
+        Returns:
+            Tuple of (width, height), in PDF points for PDFs and in pixels
+            for image files
+        """
+        with self._lock:
+            if self._page_sizes is None:
+                if self.is_pdf:
+                    self._page_sizes = [
+                        (int(page.rect.width), int(page.rect.height))
+                        for page in self.doc
+                    ]
+                else:
+                    height, width = self._load_image().shape[:2]
+                    self._page_sizes = [(width, height)]
+            return self._page_sizes[index]
+
+    def page_image(self, index: int, zoom: float = 2.0) -> np.ndarray:
+        """
+        Return a page as a BGR image, rendering PDF pages at most once.
+
+        Callers must not draw on the returned array; it is shared by every
+        stage of the request.
+
+        Args:
+            index: Zero-based page index
+            zoom: Scale factor applied to the PDF page's native resolution
+                (ignored for image files)
+
+        Returns:
+            BGR image of the page
+        """
+        if not self.is_pdf:
+            return self._load_image()
+        with self._lock:
+            image = self._rasters.get((index, zoom))
+            if image is None:
+                with timed("rasterization"):
+                    pix = self.doc.load_page(index).get_pixmap(
+                        matrix=fitz.Matrix(zoom, zoom), colorspace=fitz.csRGB
+                    )
+                    image = pixmap_to_bgr(pix)
+                self._rasters[(index, zoom)] = image
+            return image
+
+    def release_page(self, index: int) -> None:
+        """Drop the cached renders of a PDF page, at every zoom."""
+        with self._lock:
+            for key in [key for key in self._rasters if key[0] == index]:
+                del self._rasters[key]
+
+    def close(self) -> None:
+        """Close the PDF and drop every cached page image."""
+        with self._lock:
+            if self._doc is not None:
+                self._doc.close()
+                self._doc = None
+            self._image = None
+            self._page_sizes = None
+            self._rasters.clear()
+
+    def _load_image(self) -> np.ndarray:
+        """Decode an image file once."""
+        with self._lock:
+            if self._image is None:
+                with timed("rasterization"):
+                    image = cv2.imread(self.file_path)
+                if image is None:
+                    raise ValueError(f"Could not read image at {self.file_path}")
+                self._image = image
+            return self._image
+
+    def __enter__(self) -> "DocumentContext":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+@contextmanager
+def document_scope(file_path: str) -> Iterator[DocumentContext]:
+    """
+    Open a resume for one request and share it with every stage it runs.
+
+    Stages that call :func:`open_document` for the same file inside the
+    block (in this thread, or in threads started with a copy of its
+    context) reuse this document. It is closed, and its page images are
+    released, when the block exits.
+
+    Args:
+        file_path: Path to the resume file
+
+    Yields:
+        Document context of the request
+    """
+    document = DocumentContext(file_path)
+    token = _active_document.set(document)
+    try:
+        yield document
+    finally:
+        _active_document.reset(token)
+        document.close()
+
+
+@contextmanager
+def open_document(file_path: str) -> Iterator[DocumentContext]:
+    """
+    Use the request's open document, or open the file just for this block.
+
+    Args:
+        file_path: Path to the resume file
+
+    Yields:
+        Document context for the file
+    """
+    document = _active_document.get()
+    if document is not None and document.file_path == os.path.abspath(file_path):
+        yield document
+    else:
+        with DocumentContext(file_path) as document:
+            yield document
@@ -0,0 +1,416 @@
+import contextlib
+import hashlib
+import time
+from collections.abc import Iterable
+from dataclasses import dataclass
+from typing import Any
+
+import torch
+from PIL import Image
+from qwen_vl_utils import process_vision_info
+from transformers import LogitsProcessorList, StoppingCriteria, StoppingCriteriaList
+
+from app.services.constrained import JsonSchemaLogitsProcessor
+from app.services.metrics import record_stage, timed
+from app.services.prefix_cache import (
+    PrefixCache,
+    generate_with_prefix,
+    prompt_prefix_length,
+    shared_prefix_length,
+)
+
+
+def omit_prompt_fields(prompt: str, fields: Iterable[str]) -> str:
+    """
+    Drop fields from the extraction prompt's field list and JSON template.
+
+    Args:
+        prompt: Extraction prompt (e.g. config.SYSTEM_PROMPT)
+        fields: Field keys the model no longer needs to produce
+
+    Returns:
+        Prompt without the lines describing those fields
+    """
+    markers = [m for field in fields for m in (f"({field})", f'"{field}":')]
+    if not markers:
+        return prompt
+    return "\n".join(
+        line
+        for line in prompt.split("\n")
+        if not any(marker in line for marker in markers)
+    )
+
+
+def build_page_messages(
+    image: Any, prompt: str, min_pixels: int, max_pixels: int
+) -> list[dict[str, Any]]:
+    """
+    Build the chat messages for extracting data from one page image.
+
+    Args:
+        image: Page image (PIL image or path to an image file)
+        prompt: Instruction text sent before the image
+        min_pixels: Lower bound of the vision-token budget, in pixels
+        max_pixels: Upper bound of the vision-token budget, in pixels
+
+    Returns:
+        Chat messages in the format expected by the processor
+    """
+    # The instruction comes first so every page shares the same prompt prefix
+    return [
+        {
+            "role": "user",
+            "content": [
+                {"type": "text", "text": prompt},
+                {
+                    "type": "image",
+                    "image": image,
+                    "min_pixels": min_pixels,
+                    "max_pixels": max_pixels,
+                },
+            ],
+        }
+    ]
+
+
+def build_text_messages(
+    page_text: str, prompt: str, label: str = "Resume text"
+) -> list[dict[str, Any]]:
+    """
+    Build text-only chat messages for a page with an embedded text layer.
+
+    Args:
+        page_text: Text extracted from the page
+        prompt: Instruction text sent before the page text
+        label: Heading placed between the instruction and the page text
+
+    Returns:
+        Chat messages in the format expected by the processor
+    """
+    return [
+        {
+            "role": "user",
+            "content": [
+                {"type": "text", "text": prompt},
+                {"type": "text", "text": f"\n\n{label}:\n{page_text}"},
+            ],
+        }
+    ]
+
+
+def hash_messages(messages: list[dict[str, Any]]) -> str:
+    """
+    Hash chat messages, including the pixels of in-memory images.
+
+    Two pages that produce the same model input hash to the same value, no
+    matter which document they came from.
+
+    Args:
+        messages: Chat messages as built by build_page_messages or
+            build_text_messages
+
+    Returns:
+        Hex SHA-256 digest of the messages
+    """
+    digest = hashlib.sha256()
+    for message in messages:
+        digest.update(message["role"].encode("utf-8") + b"\0")
+        for part in message["content"]:
+            for name, value in sorted(part.items()):
+                digest.update(name.encode("utf-8") + b"\0")
+                if isinstance(value, Image.Image):
+                    digest.update(f"{value.mode}{value.size}".encode())
+                    digest.update(value.tobytes())
+                else:
+                    digest.update(str(value).encode("utf-8"))
+                digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class JsonScanState:
+    """Incremental brace tracker for one generated sequence."""
+
+    def __init__(self):
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.closed = False
+
+    def feed(self, text: str) -> bool:
+        """
+        Consume newly generated text.
+
+        Braces only count outside JSON strings, and only once the first
+        ``{`` has been seen, so prose or code fences around the object are
+        ignored.
+
+        Args:
+            text: Text of the newly generated token(s)
+
+        Returns:
+            True once the first top-level object has been closed
+        """
+        for char in text:
+            if self.closed:
+                break
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == "\\":
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"' and self.depth:
+                self.in_string = True
+            elif char == "{":
+                self.depth += 1
+            elif char == "}" and self.depth:
+                self.depth -= 1
+                self.closed = self.depth == 0
+        return self.closed
+
+
+class JsonObjectStoppingCriteria(StoppingCriteria):
+    """Stop each sequence as soon as its top-level JSON object closes."""
+
+    def __init__(self, tokenizer: Any, batch_size: int):
+        self.tokenizer = tokenizer
+        self.states = [JsonScanState() for _ in range(batch_size)]
+        self._token_text: dict[int, str] = {}
+
+    def __call__(
+        self, input_ids: torch.LongTensor, scores: Any, **kwargs: Any
+    ) -> torch.Tensor:
+        """Feed the newest token of every sequence to its brace tracker."""
+        done = []
+        for row, state in zip(input_ids, self.states, strict=True):
+            if not state.closed:
+                state.feed(self._decode(int(row[-1])))
+            done.append(state.closed)
+        return torch.tensor(done, dtype=torch.bool, device=input_ids.device)
+
+    def _decode(self, token_id: int) -> str:
+        # Braces and quotes are ASCII, so decoding tokens one at a time is
+        # exact for them even where a multi-byte character spans two tokens
+        if token_id not in self._token_text:
+            self._token_text[token_id] = self.tokenizer.decode([token_id])
+        return self._token_text[token_id]
+
+
+class FirstTokenTimer(StoppingCriteria):
+    """Note when the first new token is out, i.e. when prefill has finished."""
+
+    def __init__(self):
+        self.first_token_at: float | None = None
+
+    def __call__(
+        self, input_ids: torch.LongTensor, scores: Any, **kwargs: Any
+    ) -> torch.Tensor:
+        """Record the time of the first call; never stops generation."""
+        if self.first_token_at is None:
+            # Wait for the token itself, not just for the kernels to be queued
+            input_ids[:, -1].cpu()
+            self.first_token_at = time.perf_counter()
+        return torch.zeros(
+            input_ids.shape[0], dtype=torch.bool, device=input_ids.device
+        )
+
+
+@dataclass
+class PreparedBatch:
+    """Padded model inputs for several conversations, built on the CPU."""
+
+    messages_batch: list[list[dict[str, Any]]]
+    text_prompts: list[str]
+    inputs: Any
+
+
+@timed("preprocessing")
+def prepare_batch(
+    processor: Any, messages_batch: list[list[dict[str, Any]]]
+) -> PreparedBatch:
+    """
+    Render the chat template, load the images and tokenize a batch.
+
+    This is the CPU part of generation; it does not touch the model and can
+    run while the model is busy with another batch.
+
+    Args:
+        processor: Processor matching the model
+        messages_batch: One list of chat messages per sequence
+
+    Returns:
+        Left-padded processor outputs and the rendered prompts
+    """
+    text_prompts = [
+        processor.apply_chat_template(
+            messages, tokenize=False, add_generation_prompt=True
+        )
+        for messages in messages_batch
+    ]
+    image_inputs, video_inputs = process_vision_info(messages_batch)
+    inputs = processor(
+        text=text_prompts,
+        images=image_inputs,
+        videos=video_inputs,
+        padding=True,
+        padding_side="left",
+        return_tensors="pt",
+    )
+    return PreparedBatch(messages_batch, text_prompts, inputs)
+
+
+def generate_batch(
+    model: Any,
+    processor: Any,
+    messages_batch: list[list[dict[str, Any]]],
+    max_new_tokens: int = 1024,
+    stop_at_json_end: bool = True,
+    json_schemas: list[dict[str, Any] | None] | None = None,
+    prefix_cache: PrefixCache | None = None,
+) -> list[str]:
+    """
+    Run a single padded generate call for several conversations.
+
+    Args:
+        model: Loaded vision-language model
+        processor: Matching processor
+        messages_batch: One list of chat messages per sequence
+        max_new_tokens: Generation budget per sequence
+        stop_at_json_end: Stop each sequence once its JSON object closes
+            instead of decoding whatever the model appends after it
+        json_schemas: Optional JSON schema per conversation; sequences with
+            a schema are decoded as compact JSON matching it
+        prefix_cache: Optional cache of instruction-prefix key/value states;
+            when given, only the tokens after the shared instruction are
+            prefilled
+
+    Returns:
+        Decoded output text for each conversation, in input order
+    """
+    return generate_prepared(
+        model,
+        processor,
+        prepare_batch(processor, messages_batch),
+        max_new_tokens,
+        stop_at_json_end=stop_at_json_end,
+        json_schemas=json_schemas,
+        prefix_cache=prefix_cache,
+    )
+
+
+def generate_prepared(
+    model: Any,
+    processor: Any,
+    batch: PreparedBatch,
+    max_new_tokens: int = 1024,
+    stop_at_json_end: bool = True,
+    json_schemas: list[dict[str, Any] | None] | None = None,
+    prefix_cache: PrefixCache | None = None,
+) -> list[str]:
+    """
+    Run a single padded generate call for a batch built by prepare_batch.
+
+    Args:
+        model: Loaded vision-language model
+        processor: Matching processor
+        batch: Prepared model inputs
+        max_new_tokens: Generation budget per sequence
+        stop_at_json_end: See generate_batch
+        json_schemas: See generate_batch
+        prefix_cache: See generate_batch
+
+    Returns:
+        Decoded output text for each conversation, in input order
+    """
+    messages_batch = batch.messages_batch
+    text_prompts = batch.text_prompts
+    inputs = batch.inputs.to(model.device)
+
+    stopping_criteria = StoppingCriteriaList()
+    if stop_at_json_end:
+        stopping_criteria.append(
+            JsonObjectStoppingCriteria(processor.tokenizer, len(messages_batch))
+        )
+    # Splits the generate call into prefill and decode time
+    first_token_timer = FirstTokenTimer()
+    stopping_criteria.append(first_token_timer)
+    logits_processor = None
+    if json_schemas and any(schema is not None for schema in json_schemas):
+        eos_token_id = model.generation_config.eos_token_id
+        eos_token_ids = (
+            eos_token_id if isinstance(eos_token_id, list) else [eos_token_id]
+        )
+        logits_processor = LogitsProcessorList(
+            [
+                JsonSchemaLogitsProcessor(
+                    processor.tokenizer, json_schemas, eos_token_ids
+                )
+            ]
+        )
+    generate_kwargs = {
+        "max_new_tokens": max_new_tokens,
+        "stopping_criteria": stopping_criteria,
+        "logits_processor": logits_processor,
+    }
+    prefix_length = 0
+    if prefix_cache is not None:
+        prefix_length = _instruction_prefix_length(
+            processor.tokenizer, messages_batch, text_prompts, inputs
+        )
+    # With a prefix cache, rotary offsets pass through the shared model, so
+    # its generate calls (with or without a cached prefix) run one at a time
+    lock = (
+        prefix_cache.generate_lock
+        if prefix_cache is not None
+        else contextlib.nullcontext()
+    )
+    with lock:
+        started = time.perf_counter()
+        if prefix_cache is not None and prefix_length:
+            generated_ids_trimmed = list(
+                generate_with_prefix(
+                    model, inputs, prefix_length, prefix_cache, **generate_kwargs
+                )
+            )
+        else:
+            generated_ids = model.generate(**inputs, **generate_kwargs)
+            # Left padding keeps every prompt the same length, so one slice
+            # trims all
+            generated_ids_trimmed = [
+                out_ids[len(in_ids) :]
+                for in_ids, out_ids in zip(
+                    inputs.input_ids, generated_ids, strict=False
+                )
+            ]
+        # Prefill ends with the first new token; everything after is decode
+        finished = time.perf_counter()
+    # Unset when nothing was generated; count it all as prefill then
+    first_token_at = first_token_timer.first_token_at
+    if first_token_at is None:
+        first_token_at = finished
+    record_stage("prefill", first_token_at - started)
+    record_stage("decode", finished - first_token_at)
+    return processor.batch_decode(
+        generated_ids_trimmed,
+        skip_special_tokens=True,
+        clean_up_tokenization_spaces=True,
+    )
+
+
+def _instruction_prefix_length(
+    tokenizer: Any,
+    messages_batch: list[list[dict[str, Any]]],
+    text_prompts: list[str],
+    inputs: Any,
+) -> int:
+    """Count the leading tokens that all conversations share, up to the page."""
+    limits = []
+    for messages, text_prompt in zip(messages_batch, text_prompts, strict=True):
+        first = messages[0]["content"][0]
+        if not isinstance(first, dict) or first.get("type") != "text":
+            return 0
+        limits.append(prompt_prefix_length(tokenizer, text_prompt, first["text"]))
+    return shared_prefix_length(
+        inputs["input_ids"], inputs["attention_mask"], min(limits)
+    )
@@ -0,0 +1,249 @@
+import asyncio
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from collections.abc import AsyncIterator, Callable, Iterable
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any
+
+from app.models.core import JobStatus
+
+# Job the current worker thread is running, for progress reports
+_active_job: ContextVar["Job | None"] = ContextVar("active_job", default=None)
+
+
+class JobQueueFullError(RuntimeError):
+    """Raised when a job is submitted while the job queue is full."""
+
+
+@dataclass
+class Job:
+    """A resume run through the pipeline by a background worker."""
+
+    file_id: str
+    job_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    status: JobStatus = JobStatus.QUEUED
+    created_at: float = field(default_factory=time.time)
+    started_at: float | None = None
+    finished_at: float | None = None
+    pages_done: int = 0
+    pages_total: int | None = None
+    result: Any = None
+    error: str | None = None
+    # Resolved by the worker that runs the job
+    future: Future = field(default_factory=Future, repr=False)
+
+    @property
+    def finished(self) -> bool:
+        """Whether the job has completed or failed."""
+        return self.status in (JobStatus.COMPLETED, JobStatus.FAILED)
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return the job's status, progress and result for the API."""
+
+        def _timestamp(seconds: float | None) -> str | None:
+            if seconds is None:
+                return None
+            return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(seconds))
+
+        return {
+            "job_id": self.job_id,
+            "file_id": self.file_id,
+            "status": self.status.value,
+            "created_at": _timestamp(self.created_at),
+            "started_at": _timestamp(self.started_at),
+            "finished_at": _timestamp(self.finished_at),
+            "progress": {
+                "pages_done": self.pages_done,
+                "pages_total": self.pages_total,
+            },
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class JobManager:
+    """
+    Run pipeline jobs on a bounded pool of background worker threads.
+
+    ``submit`` returns as soon as the job is queued, so request handlers do
+    not block while the model works. At most ``max_workers`` jobs run at the
+    same time and at most ``max_queued`` more wait for a worker; further
+    submissions are rejected with :class:`JobQueueFullError`. The newest
+    ``max_finished`` finished jobs are kept for status queries.
+    """
+
+    def __init__(
+        self, max_workers: int = 1, max_queued: int = 100, max_finished: int = 1000
+    ):
+        self.max_workers = max(1, max_workers)
+        self.max_queued = max(0, max_queued)
+        self.max_finished = max(0, max_finished)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="resume-job"
+        )
+        self._lock = threading.Lock()
+        self._jobs: OrderedDict[str, Job] = OrderedDict()
+        self._unfinished = 0
+
+    def submit(
+        self, file_id: str, fn: Callable[..., Any], *args: Any, **kwargs: Any
+    ) -> Job:
+        """
+        Queue a pipeline run.
+
+        Args:
+            file_id: ID of the resume the job processes
+            fn: Function running the pipeline (e.g. process_resume)
+            *args: Positional arguments for fn
+            **kwargs: Keyword arguments for fn
+
+        Returns:
+            The queued job; its ``future`` resolves to fn's return value
+
+        Raises:
+            JobQueueFullError: If every worker is busy and the queue is full
+        """
+        with self._lock:
+            if self._unfinished >= self.max_workers + self.max_queued:
+                raise JobQueueFullError(
+                    f"Job queue is full ({self.max_queued} jobs waiting)"
+                )
+            job = Job(file_id=file_id)
+            self._jobs[job.job_id] = job
+            self._unfinished += 1
+            self._prune()
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        """Return a job by ID, or None if it is unknown or was pruned."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def stats(self) -> dict[str, int]:
+        """Return the number of queued and running jobs and the pool limits."""
+        with self._lock:
+            running = sum(
+                job.status == JobStatus.RUNNING for job in self._jobs.values()
+            )
+            return {
+                "queued": self._unfinished - running,
+                "running": running,
+                "workers": self.max_workers,
+                "max_queued": self.max_queued,
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the workers, optionally after the queued jobs have run."""
+        self._executor.shutdown(wait=wait)
+
+    def _run(
+        self,
+        job: Job,
+        fn: Callable[..., Any],
+        args: tuple[Any, ...],
+        kwargs: dict[str, Any],
+    ) -> None:
+        """Run one job on a worker thread and record its outcome."""
+        if not job.future.set_running_or_notify_cancel():
+            # Cancelled while queued, e.g. by a client that went away
+            self._finish(job, JobStatus.FAILED, error="Job was cancelled")
+            return
+        with self._lock:
+            job.status = JobStatus.RUNNING
+            job.started_at = time.time()
+        token = _active_job.set(job)
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            self._finish(job, JobStatus.FAILED, error=str(e))
+            job.future.set_exception(e)
+            return
+        finally:
+            _active_job.reset(token)
+        self._finish(job, JobStatus.COMPLETED, result=result)
+        job.future.set_result(result)
+
+    def _finish(
+        self, job: Job, status: JobStatus, result: Any = None, error: str | None = None
+    ) -> None:
+        """Mark a job as finished."""
+        with self._lock:
+            job.status = status
+            job.result = result
+            job.error = error
+            job.finished_at = time.time()
+            self._unfinished -= 1
+            self._prune()
+
+    def _prune(self) -> None:
+        """Forget the oldest finished jobs beyond max_finished."""
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[: max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job_id]
+
+
+async def run_jobs(
+    manager: JobManager,
+    submissions: Iterable[tuple[str, Callable[..., Any], dict[str, Any]]],
+    max_in_flight: int,
+    retry_interval: float = 0.5,
+) -> AsyncIterator[Job]:
+    """
+    Run many jobs and yield each one as soon as it has finished.
+
+    At most ``max_in_flight`` of the jobs are submitted at a time, so a large
+    batch does not fill the shared queue; while the queue is full because of
+    other clients, submission waits for a job to finish and tries again.
+
+    Args:
+        manager: Job manager running the jobs
+        submissions: (file_id, fn, keyword arguments) of each job
+        max_in_flight: Maximum number of the jobs queued or running at once
+        retry_interval: Seconds to wait before retrying a rejected submission
+            when none of the jobs is in flight
+
+    Yields:
+        Finished jobs, in completion order
+    """
+    pending = deque(submissions)
+    in_flight: dict[asyncio.Future, Job] = {}
+    while pending or in_flight:
+        while pending and len(in_flight) < max(1, max_in_flight):
+            file_id, fn, kwargs = pending[0]
+            try:
+                job = manager.submit(file_id, fn, **kwargs)
+            except JobQueueFullError:
+                break
+            pending.popleft()
+            in_flight[asyncio.wrap_future(job.future)] = job
+
+        if not in_flight:
+            await asyncio.sleep(retry_interval)
+            continue
+        done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+        for future in done:
+            # The outcome is recorded on the job; retrieving it here only
+            # keeps asyncio from reporting it as never retrieved
+            future.exception()
+            yield in_flight.pop(future)
+
+
+def report_progress(pages_done: int, pages_total: int) -> None:
+    """
+    Record how many pages of the running job have been extracted.
+
+    Does nothing outside a job, e.g. when the pipeline is called directly.
+
+    Args:
+        pages_done: Pages whose extraction has finished
+        pages_total: Pages in the document
+    """
+    job = _active_job.get()
+    if job is not None:
+        job.pages_done = pages_done
+        job.pages_total = pages_total
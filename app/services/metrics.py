@@ -0,0 +1,155 @@
+import bisect
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from app.models.core import ProcessingMetrics
+
+# Upper bounds in seconds; model stages of long documents can take minutes
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+    120.0,
+)
+
+# Metrics of the request(s) the current thread works for; a scheduler worker
+# running a batch works for every request in it
+_active_metrics: ContextVar[tuple[ProcessingMetrics, ...]] = ContextVar(
+    "active_metrics", default=()
+)
+_metrics_lock = threading.Lock()
+
+
+class StageHistograms:
+    """Latency histograms of the pipeline stages, in Prometheus text format."""
+
+    def __init__(
+        self,
+        name: str = "resume_parser_stage_duration_seconds",
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        # Stage -> (per-bucket counts, sum of observations, observation count)
+        self._stages: dict[str, tuple[list[int], float, int]] = {}
+
+    def observe(self, stage: str, seconds: float) -> None:
+        """Add one duration to the histogram of a stage."""
+        with self._lock:
+            counts, total, count = self._stages.get(
+                stage, ([0] * len(self.buckets), 0.0, 0)
+            )
+            index = bisect.bisect_left(self.buckets, seconds)
+            if index < len(counts):
+                counts[index] += 1
+            self._stages[stage] = (counts, total + seconds, count + 1)
+
+    def render(self) -> str:
+        """
+        Render every histogram in the Prometheus text exposition format.
+
+        Returns:
+            Metric families as text, with cumulative bucket counts
+        """
+        lines = [
+            f"# HELP {self.name} Time spent in each resume pipeline stage.",
+            f"# TYPE {self.name} histogram",
+        ]
+        with self._lock:
+            stages = {
+                stage: (list(counts), total, count)
+                for stage, (counts, total, count) in self._stages.items()
+            }
+        for stage, (counts, total, count) in sorted(stages.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts, strict=True):
+                cumulative += bucket_count
+                lines.append(
+                    f'{self.name}_bucket{{stage="{stage}",le="{bound}"}} {cumulative}'
+                )
+            lines.append(f'{self.name}_bucket{{stage="{stage}",le="+Inf"}} {count}')
+            lines.append(f'{self.name}_sum{{stage="{stage}"}} {total}')
+            lines.append(f'{self.name}_count{{stage="{stage}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+    def clear(self) -> None:
+        """Drop every observation."""
+        with self._lock:
+            self._stages.clear()
+
+
+stage_histograms = StageHistograms()
+
+
+def current_metrics() -> tuple[ProcessingMetrics, ...]:
+    """Return the metrics of the request(s) the current thread works for."""
+    return _active_metrics.get()
+
+
+@contextmanager
+def metrics_scope(*metrics: ProcessingMetrics) -> Iterator[None]:
+    """
+    Attribute the stages timed inside the block to the given requests.
+
+    Args:
+        *metrics: Metrics of the requests the block works for
+
+    Yields:
+        None
+    """
+    # A request with several pages in one batch is counted once
+    unique = tuple({id(m): m for m in metrics}.values())
+    token = _active_metrics.set(unique)
+    try:
+        yield
+    finally:
+        _active_metrics.reset(token)
+
+
+def record_stage(stage: str, seconds: float) -> None:
+    """
+    Record the duration of a pipeline stage.
+
+    The duration goes into the stage's histogram and into the metrics of
+    every request the current thread works for.
+
+    Args:
+        stage: Stage name (e.g. "rasterization", "prefill", "ocr")
+        seconds: Time spent in the stage
+    """
+    stage_histograms.observe(stage, seconds)
+    with _metrics_lock:
+        for metrics in _active_metrics.get():
+            metrics.add_stage_time(stage, seconds)
+
+
+@contextmanager
+def timed(stage: str) -> Iterator[None]:
+    """
+    Time a block (or, used as a decorator, a function) as a pipeline stage.
+
+    Args:
+        stage: Stage name
+
+    Yields:
+        None
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - started)
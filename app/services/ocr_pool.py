@@ -0,0 +1,126 @@
+import threading
+from collections import defaultdict
+from collections.abc import Iterator, Sequence
+from contextlib import ExitStack, contextmanager
+from functools import lru_cache
+from typing import Any
+
+import easyocr
+import numpy as np
+
+from app.core.settings import get_settings
+
+# Languages the annotator reads
+DEFAULT_LANGUAGES = ("en",)
+
+ReaderKey = tuple[tuple[str, ...], bool]
+
+
+class ReaderPool:
+    """
+    Process-wide pool of loaded EasyOCR readers.
+
+    Building a reader loads the CRAFT detector and the recognizer weights
+    from disk, which takes seconds and a few hundred MB. The pool builds up
+    to ``size`` readers per (languages, device) key, the first time they
+    are needed, and lends each one to a single caller at a time; a caller
+    finding every reader of its key busy waits until one is returned.
+    """
+
+    def __init__(self, size: int = 1):
+        self.size = max(1, size)
+        self._cond = threading.Condition()
+        self._idle: dict[ReaderKey, list[Any]] = defaultdict(list)
+        self._built: dict[ReaderKey, int] = defaultdict(int)
+
+    @contextmanager
+    def reader(
+        self, languages: Sequence[str] = DEFAULT_LANGUAGES, gpu: bool = False
+    ) -> Iterator[Any]:
+        """
+        Borrow a reader for the duration of the block.
+
+        Args:
+            languages: EasyOCR language codes
+            gpu: Whether the reader runs on the GPU
+
+        Yields:
+            An easyocr.Reader used by no other thread until the block exits
+        """
+        key = (tuple(languages), gpu)
+        reader = self._acquire(key)
+        try:
+            yield reader
+        finally:
+            with self._cond:
+                self._idle[key].append(reader)
+                self._cond.notify()
+
+    def warm(
+        self, languages: Sequence[str] = DEFAULT_LANGUAGES, gpu: bool = False
+    ) -> None:
+        """Build every reader of a key now and run each once on a blank page."""
+        blank = np.full((64, 64, 3), 255, dtype=np.uint8)
+        with ExitStack() as stack:
+            for _ in range(self.size):
+                stack.enter_context(self.reader(languages, gpu)).readtext(blank)
+
+    def stats(self) -> dict[str, Any]:
+        """Return the pool size and the readers built per key."""
+        with self._cond:
+            return {
+                "size": self.size,
+                "readers": {
+                    f"{'+'.join(languages)}/{'gpu' if gpu else 'cpu'}": {
+                        "built": built,
+                        "idle": len(self._idle[(languages, gpu)]),
+                    }
+                    for (languages, gpu), built in self._built.items()
+                },
+            }
+
+    def clear(self) -> None:
+        """Drop every idle reader, releasing its memory; borrowed ones are kept."""
+        with self._cond:
+            for key, idle in self._idle.items():
+                self._built[key] -= len(idle)
+                idle.clear()
+            self._cond.notify_all()
+
+    def _acquire(self, key: ReaderKey) -> Any:
+        """Take an idle reader, build a new one, or wait for one."""
+        with self._cond:
+            while not self._idle[key] and self._built[key] >= self.size:
+                self._cond.wait()
+            if self._idle[key]:
+                return self._idle[key].pop()
+            self._built[key] += 1
+
+        # Build outside the lock; other keys and idle readers stay available
+        try:
+            return easyocr.Reader(list(key[0]), gpu=key[1])
+        except Exception:
+            with self._cond:
+                self._built[key] -= 1
+                self._cond.notify()
+            raise
+
+
+def ocr_uses_gpu() -> bool:
+    """Check if OCR should run on the GPU."""
+    try:
+        settings = get_settings()
+        if not settings.USE_GPU:
+            return False
+
+        import torch
+
+        return torch.cuda.is_available()
+    except ImportError:
+        return False
+
+
+@lru_cache
+def get_reader_pool() -> ReaderPool:
+    """Create the process-wide pool of EasyOCR readers."""
+    return ReaderPool(size=get_settings().OCR_READER_POOL_SIZE)
@@ -1,25 +1,52 @@
+import contextlib
+import contextvars
+import hashlib
 import json
 import os
 import re
-import sys
+import shutil
 import tempfile
 import time
+from collections import deque
+from collections.abc import Iterable
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import Any
 
-import config
 import cv2
 import fitz  # PyMuPDF
 from autogen import AssistantAgent, UserProxyAgent, register_function
-from dependencies import get_model_and_processor
-from qwen_vl_utils import process_vision_info
-from services.processing import validate_cv_data
-
-from app.dependencies import get_autogen_config
-from app.services.annotator import annotate_resume
-
-sys.path.append(
-    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from PIL import Image
+
+from app import config
+from app.core.settings import get_settings
+from app.dependencies import (
+    get_autogen_config,
+    get_extraction_cache,
+    get_inference_scheduler,
+    get_page_cache,
+)
+from app.models.core import PipelineMode, ProcessingMetrics
+from app.services.annotator import annotate_resume, annotate_resume_data
+from app.services.cache import ExtractionCache, file_sha256, make_cache_key
+from app.services.constrained import omit_schema_fields
+from app.services.document import DocumentContext, document_scope, open_document
+from app.services.inference import (
+    build_page_messages,
+    build_text_messages,
+    hash_messages,
+    omit_prompt_fields,
+)
+from app.services.jobs import report_progress
+from app.services.metrics import metrics_scope, record_stage, timed
+from app.services.processing import (
+    extract_contact_info,
+    merge_contact_info,
+    update_image_urls,
+    validate_cv_data,
 )
+from app.services.rendering import render_page
+from app.services.scheduler import InferenceScheduler
+from app.services.text_layer import extract_page_text, has_usable_text
 
 
 def doc_parser(file_path: str) -> str:
@@ -33,6 +60,30 @@ def doc_parser(file_path: str) -> str:
     Returns:
         JSON string with extracted data
     """
+    extracted_data = extract_resume_data(file_path)
+    if isinstance(extracted_data, str):
+        return extracted_data
+
+    # Save the result to the extraction folder for the next tool call
+    base_filename = os.path.splitext(os.path.basename(file_path))[0]
+    extraction_file = os.path.join(config.EXTRACTION_DIR, f"{base_filename}.json")
+    _write_json_atomic(extraction_file, extracted_data)
+    return json.dumps(extracted_data, indent=4, ensure_ascii=False)
+
+
+@timed("extraction")
+def extract_resume_data(file_path: str) -> dict[str, Any] | str:
+    """
+    Extract structured data from the resume document.
+    For multi-page PDFs, keep each page's data separate.
+
+    Args:
+        file_path: Path to the resume file (PDF, PNG, or DOCX)
+
+    Returns:
+        Extracted data in the pages structure, or the raw model output if it
+        contains no usable JSON
+    """
     # Ensure we have an absolute path
     file_path = os.path.abspath(file_path)
 
@@ -40,8 +91,9 @@ def doc_parser(file_path: str) -> str:
     if not os.path.isfile(file_path):
         raise FileNotFoundError(f"File not found: {file_path}")
 
-    # Get model and processor
-    model, processor = get_model_and_processor()
+    # Generation goes through the shared scheduler that owns the model
+    scheduler = get_inference_scheduler()
+    settings = get_settings()
 
     # Handle DOCX files by converting to PDF first
     if file_path.lower().endswith((".docx", ".DOCX")):
@@ -54,7 +106,7 @@ def doc_parser(file_path: str) -> str:
                 raise NotImplementedError("DOCX processing not yet implemented")
 
             # Process the PDF file
-            doc_result = doc_parser(tmp_pdf_path)
+            doc_result = extract_resume_data(tmp_pdf_path)
 
             # Clean up temp file
             if os.path.exists(tmp_pdf_path):
@@ -69,82 +121,23 @@ def doc_parser(file_path: str) -> str:
     # Check if the file is a PDF with multiple pages
     if file_path.lower().endswith((".pdf", ".PDF")):
         try:
-            doc = fitz.open(file_path)
-            # If multiple pages, process each one separately
-            if len(doc) > 1:
-                all_pages_data: dict[str, dict[str, Any]] = {"pages": {}}
-
-                # Create a temp directory for page images
-                with tempfile.TemporaryDirectory() as temp_dir:
-                    # Convert each page to image and process
-                    for page_num in range(len(doc)):
-                        page = doc.load_page(page_num)
-                        zoom = 2.0
-                        mat = fitz.Matrix(zoom, zoom)
-                        pix = page.get_pixmap(matrix=mat)
-
-                        # Save page as image in temp directory
-                        temp_img_path = os.path.join(temp_dir, f"page{page_num}.png")
-                        pix.save(temp_img_path)
-
-                        # Verify temp image was created successfully
-                        if not os.path.isfile(temp_img_path):
-                            raise FileNotFoundError(
-                                f"Failed to create temporary image: {temp_img_path}"
-                            )
-
-                        # Process this page with VLM
-                        page_messages = [
-                            {
-                                "role": "user",
-                                "content": [
-                                    {
-                                        "type": "image",
-                                        "image": temp_img_path,
-                                        "resized_height": 1600,
-                                        "resized_width": 960,
-                                    },
-                                    {
-                                        "type": "text",
-                                        "text": config.SYSTEM_PROMPT,
-                                    },
-                                ],
-                            }
-                        ]
+            with open_document(file_path) as document:
+                # If multiple pages, process each one separately
+                if document.page_count > 1:
+                    all_pages_data: dict[str, dict[str, Any]] = {"pages": {}}
 
-                        text_prompt = processor.apply_chat_template(
-                            page_messages,
-                            tokenize=False,
-                            add_generation_prompt=True,
-                        )
-                        image_inputs, video_inputs = process_vision_info(page_messages)
-                        inputs = processor(
-                            text=[text_prompt],
-                            images=image_inputs,
-                            videos=video_inputs,
-                            padding=True,
-                            return_tensors="pt",
-                        )
-                        inputs = inputs.to("cuda")
-                        generated_ids = model.generate(**inputs, max_new_tokens=1024)
-                        generated_ids_trimmed = [
-                            out_ids[len(in_ids) :]
-                            for in_ids, out_ids in zip(
-                                inputs.input_ids, generated_ids, strict=False
-                            )
-                        ]
-                        output_text = processor.batch_decode(
-                            generated_ids_trimmed,
-                            skip_special_tokens=True,
-                            clean_up_tokenization_spaces=True,
-                        )[0]
+                    # Generate all pages in batches and split them back out per page
+                    page_outputs = _generate_pdf_pages(scheduler, document)
 
+                    for page_num, (output_text, contact) in enumerate(page_outputs):
                         # Extract JSON from page
                         json_match = re.search(r"\{.*\}", output_text, re.DOTALL)
                         if json_match:
                             json_str = json_match.group(0)
                             try:
-                                page_data = json.loads(json_str)
+                                with timed("json_parse"):
+                                    page_data = json.loads(json_str)
+                                merge_contact_info(page_data, contact)
 
                                 # For the first page, save personal info
                                 if page_num == 0:
@@ -153,7 +146,6 @@ def doc_parser(file_path: str) -> str:
                                         page_data
                                     )
                                 else:
-                                  
                                     if (
                                         "pages" in all_pages_data
                                         and "page1" in all_pages_data["pages"]
@@ -171,105 +163,24 @@ def doc_parser(file_path: str) -> str:
                                     "error": "Invalid JSON returned for this page"
                                 }
 
-                # Save multi-page result to extraction folder
-                base_filename = os.path.splitext(os.path.basename(file_path))[0]
-                extraction_file = os.path.join(
-                    config.EXTRACTION_DIR, f"{base_filename}.json"
-                )
+                    # Validate the extracted data
+                    with timed("validation"):
+                        return validate_cv_data(all_pages_data)
 
-                # Validate the extracted data
-                validated_data = validate_cv_data(all_pages_data)
-
-                # Save validated result
-                with open(extraction_file, "w", encoding="utf-8") as f:
-                    json.dump(
-                        validated_data,
-                        f,
-                        indent=4,
-                        ensure_ascii=False,
-                    )
-                return json.dumps(validated_data, indent=4, ensure_ascii=False)
-
-            else:  # for a single-page PDF
-                # Create a temp directory for the page image
-                with tempfile.TemporaryDirectory() as temp_dir:
-                    # Convert the page to image
-                    page = doc.load_page(0)  # Get the first (only) page
-                    zoom = 2.0
-                    mat = fitz.Matrix(zoom, zoom)
-                    pix = page.get_pixmap(matrix=mat)
-
-                    # Save page as image in temp directory
-                    temp_img_path = os.path.join(temp_dir, "page0.png")
-                    pix.save(temp_img_path)
-
-                    # Process this image with VLM
-                    messages = [
-                        {
-                            "role": "user",
-                            "content": [
-                                {
-                                    "type": "image",
-                                    "image": temp_img_path,
-                                    "resized_height": 1600,
-                                    "resized_width": 960,
-                                },
-                                {
-                                    "type": "text",
-                                    "text": config.SYSTEM_PROMPT,
-                                },
-                            ],
-                        }
-                    ]
-
-                    # Process with VLM
-                    text_prompt = processor.apply_chat_template(
-                        messages, tokenize=False, add_generation_prompt=True
-                    )
-                    image_inputs, video_inputs = process_vision_info(messages)
-                    inputs = processor(
-                        text=[text_prompt],
-                        images=image_inputs,
-                        videos=video_inputs,
-                        padding=True,
-                        return_tensors="pt",
-                    )
-                    inputs = inputs.to("cuda")
-                    generated_ids = model.generate(**inputs, max_new_tokens=1024)
-                    generated_ids_trimmed = [
-                        out_ids[len(in_ids) :]
-                        for in_ids, out_ids in zip(
-                            inputs.input_ids, generated_ids, strict=False
-                        )
-                    ]
-                    output_text = processor.batch_decode(
-                        generated_ids_trimmed,
-                        skip_special_tokens=True,
-                        clean_up_tokenization_spaces=True,
-                    )[0]
+                else:  # for a single-page PDF
+                    # Build the prompt from the text layer or the rendered page
+                    output_text, contact = _generate_pdf_pages(scheduler, document)[0]
 
                     # Extract JSON from response
                     json_match = re.search(r"\{.*\}", output_text, re.DOTALL)
                     if json_match:
                         json_str = json_match.group(0)
                         try:
-                            data = json.loads(json_str)
+                            with timed("json_parse"):
+                                data = json.loads(json_str)
+                            merge_contact_info(data, contact)
                             # Wrap in a pages structure for consistency
-                            single_page_data = {"pages": {"page1": data}}
-
-                            base_filename = os.path.splitext(
-                                os.path.basename(file_path)
-                            )[0]
-                            extraction_file = os.path.join(
-                                config.EXTRACTION_DIR, f"{base_filename}.json"
-                            )
-                            with open(extraction_file, "w", encoding="utf-8") as f:
-                                json.dump(
-                                    single_page_data, f, indent=4, ensure_ascii=False
-                                )
-                            return json.dumps(
-                                single_page_data, indent=4, ensure_ascii=False
-                            )
+                            return {"pages": {"page1": data}}
                         except json.JSONDecodeError:
                             return output_text
                     else:
@@ -279,81 +190,240 @@ def doc_parser(file_path: str) -> str:
             # Continue with regular processing as fallback
 
     # Regular processing for single page documents (image)
-    messages = [
-        {
-            "role": "user",
-            "content": [
-                {
-                    "type": "image",
-                    "image": file_path,
-                    "resized_height": 1600,
-                    "resized_width": 960,
-                },
-                {"type": "text", "text": config.SYSTEM_PROMPT},
-            ],
-        }
-    ]
-
-    text_prompt = processor.apply_chat_template(
-        messages, tokenize=False, add_generation_prompt=True
-    )
-    image_inputs, video_inputs = process_vision_info(messages)
-    inputs = processor(
-        text=[text_prompt],
-        images=image_inputs,
-        videos=video_inputs,
-        padding=True,
-        return_tensors="pt",
+    with open_document(file_path) as document:
+        image = Image.fromarray(cv2.cvtColor(document.page_image(0), cv2.COLOR_BGR2RGB))
+    messages = build_page_messages(
+        image,
+        config.SYSTEM_PROMPT,
+        settings.VISION_MIN_PIXELS,
+        settings.VISION_MAX_PIXELS,
     )
-    inputs = inputs.to("cuda")
-    generated_ids = model.generate(**inputs, max_new_tokens=1024)
-    generated_ids_trimmed = [
-        out_ids[len(in_ids) :]
-        for in_ids, out_ids in zip(inputs.input_ids, generated_ids, strict=False)
-    ]
-    output_text = processor.batch_decode(
-        generated_ids_trimmed,
-        skip_special_tokens=True,
-        clean_up_tokenization_spaces=True,
-    )[0]
+    output_text = scheduler.submit(
+        messages, json_schema=_extraction_schema(())
+    ).result()
+    report_progress(1, 1)
 
     json_match = re.search(r"\{.*\}", output_text, re.DOTALL)
     if json_match:
         json_str = json_match.group(0)
         try:
-            data = json.loads(json_str)
+            with timed("json_parse"):
+                data = json.loads(json_str)
             # For single page, wrap in a pages structure for consistency
-            single_page_data = {"pages": {"page1": data}}
-
-            base_filename = os.path.splitext(os.path.basename(file_path))[0]
-            extraction_file = os.path.join(
-                config.EXTRACTION_DIR, f"{base_filename}.json"
-            )
-            with open(extraction_file, "w", encoding="utf-8") as f:
-                json.dump(single_page_data, f, indent=4, ensure_ascii=False)
-            return json.dumps(single_page_data, indent=4, ensure_ascii=False)
+            return {"pages": {"page1": data}}
         except json.JSONDecodeError:
             return output_text
     else:
         return output_text
 
 
+def _prepare_pdf_page(
+    page: fitz.Page,
+) -> tuple[list[dict[str, Any]], dict[str, str]]:
+    """
+    Build the extraction prompt for one PDF page.
+
+    Born-digital pages are sent as text extracted from their text layer when
+    ``Settings.TEXT_LAYER_MODE`` is on; scanned pages, or pages with too
+    little text, are rasterized and sent through the vision path. When
+    ``Settings.CONTACT_RULES_MODE`` is on, contact fields found by the
+    deterministic rules are dropped from the prompt and returned alongside
+    it so they can be merged back into the model's answer.
+
+    Args:
+        page: PyMuPDF page
+
+    Returns:
+        Tuple of (chat messages for the page, rule-extracted contact fields)
+    """
+    settings = get_settings()
+    page_text = ""
+    if settings.TEXT_LAYER_MODE or settings.CONTACT_RULES_MODE:
+        page_text = extract_page_text(page)
+
+    contact = extract_contact_info(page_text) if settings.CONTACT_RULES_MODE else {}
+    prompt = omit_prompt_fields(config.SYSTEM_PROMPT, contact)
+
+    if settings.TEXT_LAYER_MODE and has_usable_text(
+        page_text, settings.TEXT_LAYER_MIN_CHARS
+    ):
+        return build_text_messages(page_text, prompt), contact
+
+    with timed("rasterization"):
+        image = render_page(
+            page,
+            zoom=2.0,
+            min_pixels=settings.VISION_MIN_PIXELS,
+            max_pixels=settings.VISION_MAX_PIXELS,
+        )
+    messages = build_page_messages(
+        image, prompt, settings.VISION_MIN_PIXELS, settings.VISION_MAX_PIXELS
+    )
+    return messages, contact
+
+
+def _generate_pdf_pages(
+    scheduler: InferenceScheduler, document: DocumentContext
+) -> list[tuple[str, dict[str, str]]]:
+    """
+    Run the extraction prompt over every page of a PDF.
+
+    Pages whose model input was seen before (for example the unchanged
+    pages of a revised resume) are answered from the page cache. All other
+    pages are submitted to the inference scheduler as soon as they are
+    rendered, so the next pages are rasterized while the model works on the
+    current ones; the scheduler groups them (and pages from concurrent
+    requests) into padded batches. At most ``Settings.PAGE_LOOKAHEAD`` pages
+    are rendered ahead of the oldest unfinished page.
+
+    Args:
+        scheduler: Shared inference scheduler
+        document: Open PDF document of the request
+
+    Returns:
+        Raw model output and rule-extracted contact fields for each page,
+        in page order
+    """
+    settings = get_settings()
+    page_cache = get_page_cache() if settings.PAGE_CACHE_MODE else None
+    lookahead = max(1, settings.PAGE_LOOKAHEAD)
+
+    pending: deque[tuple[str | None, str | Future, dict[str, str]]] = deque()
+    outputs = []
+    for page_index in range(document.page_count):
+        if len(pending) >= lookahead:
+            outputs.append(_finish_pdf_page(page_cache, *pending.popleft()))
+            report_progress(len(outputs), document.page_count)
+
+        messages, contact = _prepare_pdf_page(document.page(page_index))
+        json_schema = _extraction_schema(contact)
+        cache_key = None
+        cached = None
+        if page_cache is not None:
+            cache_key = _page_cache_key(messages, json_schema)
+            cached = page_cache.get(cache_key)
+        if cached is not None:
+            pending.append((cache_key, cached[0]["output"], contact))
+        else:
+            future = scheduler.submit(messages, json_schema=json_schema)
+            pending.append((cache_key, future, contact))
+
+    while pending:
+        outputs.append(_finish_pdf_page(page_cache, *pending.popleft()))
+        report_progress(len(outputs), document.page_count)
+    return outputs
+
+
+def _finish_pdf_page(
+    page_cache: ExtractionCache | None,
+    cache_key: str | None,
+    result: str | Future,
+    contact: dict[str, str],
+) -> tuple[str, dict[str, str]]:
+    """Wait for a page's model output and store it in the page cache."""
+    if isinstance(result, str):
+        return result, contact
+    output_text = result.result()
+    if (
+        page_cache is not None
+        and cache_key is not None
+        and _has_valid_json(output_text)
+    ):
+        page_cache.put(cache_key, {"output": output_text})
+    return output_text, contact
+
+
+def _extraction_schema(omitted: Iterable[str]) -> dict[str, Any] | None:
+    """
+    Return the output schema for page extraction.
+
+    Args:
+        omitted: Fields already known from the deterministic rules
+
+    Returns:
+        JSON schema without the omitted fields, or None when
+        ``Settings.CONSTRAINED_DECODING`` is off
+    """
+    if not get_settings().CONSTRAINED_DECODING:
+        return None
+    return omit_schema_fields(config.RESUME_SCHEMA, omitted)
+
+
+def _page_cache_key(
+    messages: list[dict[str, Any]], json_schema: dict[str, Any] | None
+) -> str:
+    """Build the page cache key for the model input of one page."""
+    return make_cache_key(
+        hash_messages(messages),
+        model=get_settings().MODEL_PATH,
+        json_schema=json_schema,
+    )
+
+
+def _has_valid_json(output_text: str) -> bool:
+    """Check that a model output contains a parseable JSON object."""
+    json_match = re.search(r"\{.*\}", output_text, re.DOTALL)
+    if not json_match:
+        return False
+    try:
+        json.loads(json_match.group(0))
+    except json.JSONDecodeError:
+        return False
+    return True
+
+
 def process_resume(
-    file_path: str, use_annotator: bool = True, generate_summary: bool = True
+    file_path: str,
+    use_annotator: bool = True,
+    generate_summary: bool = True,
+    pipeline_mode: PipelineMode | str | None = None,
+    base_url: str | None = None,
 ) -> dict[str, Any]:
     """
     Process a resume with OCR, optional annotation, and optional summary generation.
 
+    The result is kept in memory between the stages and written to the
+    extraction results once, at the end.
+
     Args:
         file_path: Path to the resume file
         use_annotator: Whether to annotate the extracted fields
         generate_summary: Whether to generate a professional summary
+        pipeline_mode: "direct" to call the stages in order, "agents" to have
+            AutoGen agents call them as tools; defaults to
+            ``Settings.PIPELINE_MODE``
+        base_url: Base URL to prefix the annotation image URLs with
 
     Returns:
-        Dictionary with processing results and metadata
+        Dictionary with processing results and metadata, including the
+        per-stage timings of the request under "metrics"
     """
-    start_time = time.time()
+    metrics = ProcessingMetrics(start_time=time.time())
+    # Stages run by this request (in this thread, its worker threads or the
+    # inference scheduler) add their time to its metrics
+    with metrics_scope(metrics):
+        response = _process_resume(
+            file_path, use_annotator, generate_summary, pipeline_mode, base_url, metrics
+        )
+    stages = ", ".join(
+        f"{stage}={seconds:.3f}s" for stage, seconds in metrics.stage_times.items()
+    )
+    print(
+        f"Processed {os.path.basename(file_path)} in "
+        f"{metrics.total_execution_time:.2f}s ({stages})"
+    )
+    return response
 
+
+def _process_resume(
+    file_path: str,
+    use_annotator: bool,
+    generate_summary: bool,
+    pipeline_mode: PipelineMode | str | None,
+    base_url: str | None,
+    metrics: ProcessingMetrics,
+) -> dict[str, Any]:
+    """Run process_resume for one request, timing its stages into metrics."""
     # Ensure we have an absolute path
     file_path = os.path.abspath(file_path)
     file_name = os.path.basename(file_path)
@@ -362,7 +432,328 @@ def process_resume(
     # Check if file exists before processing
     if not os.path.isfile(file_path):
         raise FileNotFoundError(f"File not found: {file_path}")
+    mode = PipelineMode(pipeline_mode or get_settings().PIPELINE_MODE)
+
+    # Serve repeated uploads of the same document from the extraction cache
+    cache = get_extraction_cache() if get_settings().EXTRACTION_CACHE_MODE else None
+    cache_key = None
+    if cache is not None:
+        cache_key = _extraction_cache_key(file_path, use_annotator, generate_summary)
+        cached = cache.get(cache_key)
+        response = (
+            _restore_cached_response(cached, base_filename)
+            if cached is not None
+            else None
+        )
+        if response is not None:
+            response["processing_time_sec"] = round(_finish_metrics(metrics), 2)
+            response["metrics"] = metrics.to_dict()
+            if base_url is not None:
+                response = update_image_urls(response, base_url)
+            _save_response(response, base_filename)
+            return response
+
+    # Open the file once; every stage reuses it and its page images, which
+    # are released when the request is done
+    with document_scope(file_path) as document:
+        json_file_path = os.path.join(config.EXTRACTION_DIR, f"{base_filename}.json")
+        annotated_folder = None
+        if use_annotator:
+            annotated_folder = _annotation_folder(document, base_filename)
+            os.makedirs(annotated_folder, exist_ok=True)
+
+        if mode == PipelineMode.AGENTS:
+            extracted_data = _run_agent_pipeline(
+                file_path, json_file_path, annotated_folder, generate_summary
+            )
+        else:
+            extracted_data = _run_direct_pipeline(
+                file_path, annotated_folder, generate_summary
+            )
+
+        # Collect annotation image paths
+        annotation_paths = []
+        if use_annotator:
+            annotation_paths = _annotation_paths(document, base_filename)
+
+        # Get real image dimensions
+        image_dimensions = _page_dimensions(document)
+
+    # Calculate the total execution time
+    total_time = _finish_metrics(metrics)
+
+    # Build pages data in the new format
+    pages_data = []
+    try:
+        if extracted_data is not None and "pages" in extracted_data:
+            # Process each page
+            for page_key, page_data in extracted_data["pages"].items():
+                # Extract page number from the key (e.g., "page1" -> 1)
+                page_num = int(page_key.replace("page", ""))
+
+                # Get dimensions for this page
+                width, height = image_dimensions.get(page_num, (800, 1200))
+
+                # Create data array for personal info
+                data_array = []
+                if "PersonalInfo" in page_data:
+                    for field_name, field_value in page_data["PersonalInfo"].items():
+                        if field_value and field_value != "Not Found":
+                            data_array.append(
+                                {
+                                    "text": field_value,
+                                    "label_name": field_name,
+                                }
+                            )
+
+                # Add Education data
+                if "Education" in page_data and isinstance(
+                    page_data["Education"], list
+                ):
+                    for i, edu in enumerate(page_data["Education"]):
+                        for field_name, field_value in edu.items():
+                            if field_value and field_value != "Not Found":
+                                data_array.append(
+                                    {
+                                        "text": field_value,
+                                        "label_name": f"Education_{i + 1}_{field_name}",
+                                    }
+                                )
+
+                # Add Work Experience data
+                if "WorkExperience" in page_data and isinstance(
+                    page_data["WorkExperience"], list
+                ):
+                    for i, work in enumerate(page_data["WorkExperience"]):
+                        for field_name, field_value in work.items():
+                            if field_value and field_value != "Not Found":
+                                data_array.append(
+                                    {
+                                        "text": field_value,
+                                        "label_name": f"Work_{i + 1}_{field_name}",
+                                    }
+                                )
+
+                # Add Skills data
+                if "Skills" in page_data:
+                    skills = page_data["Skills"]
+                    # Technical Skills
+                    if "TechnicalSkills" in skills and isinstance(
+                        skills["TechnicalSkills"], list
+                    ):
+                        for i, skill in enumerate(skills["TechnicalSkills"]):
+                            if skill and skill != "Not Found":
+                                data_array.append(
+                                    {
+                                        "text": skill,
+                                        "label_name": f"TechnicalSkill_{i + 1}",
+                                    }
+                                )
+                    # Languages
+                    if "Languages" in skills and isinstance(skills["Languages"], list):
+                        for i, lang in enumerate(skills["Languages"]):
+                            if lang and lang != "Not Found":
+                                data_array.append(
+                                    {
+                                        "text": lang,
+                                        "label_name": f"Language_{i + 1}",
+                                    }
+                                )
+                    # Add summary if available
+                    if "Summary" in page_data and page_data["Summary"]:
+                        data_array.append(
+                            {
+                                "text": page_data["Summary"],
+                                "label_name": "Summary",
+                                "is_visible": False,  # Don't visualize the summary
+                            }
+                        )
+
+                pages_data.append(
+                    {
+                        "image_id": f"{base_filename}_page{page_num}",
+                        "image_width_px": width,
+                        "image_height_px": height,
+                        "data": data_array,
+                        "page_num": page_num,
+                    }
+                )
+    except Exception as e:
+        print(f"Error creating pages data: {str(e)}")
+
+    # Create the response format
+    response = {
+        "file_id": base_filename,
+        "processing_time_sec": round(total_time, 2),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "pages": pages_data,
+        "image_urls": annotation_paths,
+        "message": "Resume processed successfully",
+        "summary_generated": generate_summary,
+        "metrics": metrics.to_dict(),
+    }
+    if base_url is not None:
+        response = update_image_urls(response, base_url)
+
+    _save_response(response, base_filename)
+
+    if cache is not None and cache_key is not None and pages_data:
+        _store_cached_response(cache, cache_key, response, base_filename)
+
+    return response
+
+
+def _finish_metrics(metrics: ProcessingMetrics) -> float:
+    """Stop the request clock, fill in the summary timings, return the total."""
+    metrics.end_time = time.time()
+    total_time = metrics.end_time - metrics.start_time
+    metrics.total_execution_time = total_time
+    metrics.ocr_time = metrics.stage_times.get("extraction")
+    metrics.annotation_time = metrics.stage_times.get("annotation")
+    record_stage("total", total_time)
+    return total_time
+
+
+def _annotation_folder(document: DocumentContext, base_filename: str) -> str:
+    """Return the folder the annotated page images of a resume go to."""
+    if document.is_pdf:
+        try:
+            document.page_size(0)
+        except Exception:
+            return config.ANNOTATIONS_DIR
+    return os.path.join(config.ANNOTATIONS_DIR, base_filename)
+
+
+def _annotation_paths(document: DocumentContext, base_filename: str) -> list[str]:
+    """Return the URLs of the annotated page images of a resume."""
+    annotation_paths = []
+    if document.is_pdf:
+        try:
+            page_count = document.page_count
+            if page_count > 1:
+                for i in range(page_count):
+                    annotation_filename = f"{base_filename}_page{i + 1}.png"
+                    annotation_path = (
+                        f"api/static/annotations/{base_filename}/{annotation_filename}"
+                    )
+                    annotation_paths.append(annotation_path)
+            else:
+                annotation_filename = f"{base_filename}_page1.png"
+                annotation_path = (
+                    f"api/static/annotations/{base_filename}/{annotation_filename}"
+                )
+                annotation_paths.append(annotation_path)
+        except Exception:
+            pass
+    else:
+        annotation_filename = f"{base_filename}_annotated.png"
+        annotation_path = (
+            f"api/static/annotations/{base_filename}/{annotation_filename}"
+        )
+        annotation_paths.append(annotation_path)
+    return annotation_paths
 
+
+def _page_dimensions(document: DocumentContext) -> dict[int, tuple[int, int]]:
+    """Return the size of every page, keyed by 1-based page number."""
+    image_dimensions = {}
+    if document.is_pdf:
+        try:
+            for i in range(document.page_count):
+                # Get actual page dimensions
+                image_dimensions[i + 1] = document.page_size(i)
+        except Exception as e:
+            print(f"Error getting PDF dimensions: {str(e)}")
+            # Default to a reasonable size if we can't get actual dimensions
+            image_dimensions[1] = (595, 842)  # A4 in points
+    else:
+        # For regular images, get actual dimensions
+        try:
+            image_dimensions[1] = document.page_size(0)
+        except Exception as e:
+            print(f"Error getting image dimensions: {str(e)}")
+            image_dimensions[1] = (800, 1200)  # Default fallback
+    return image_dimensions
+
+
+def _run_direct_pipeline(
+    file_path: str,
+    annotated_folder: str | None,
+    generate_summary: bool,
+) -> dict[str, Any] | None:
+    """
+    Run the pipeline stages as plain function calls on in-memory data.
+
+    Once the extraction result exists, the summary (GPU-bound generation)
+    and the annotation (CPU-bound OCR and drawing) run concurrently. Both
+    only read the result; the summary is merged into it once both are done.
+    Summary and annotation failures are logged and leave the extraction
+    result in place, as they do when an agent's tool call fails.
+
+    Args:
+        file_path: Absolute path to the resume file
+        annotated_folder: Output folder for annotations, or None to skip
+        generate_summary: Whether to generate a professional summary
+
+    Returns:
+        Extracted data, or None if the model returned no usable JSON
+    """
+    extracted_data = extract_resume_data(file_path)
+    if isinstance(extracted_data, str):
+        return None
+
+    # Stage name -> future; the stages return different types
+    stages: dict[str, Future[Any]] = {}
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        if generate_summary:
+            stages["generating summary"] = pool.submit(
+                contextvars.copy_context().run,
+                summarize_resume_data,
+                extracted_data,
+            )
+        if annotated_folder is not None:
+            # Run in a copy of the request's context so the annotator reuses
+            # the open document
+            stages["annotating resume"] = pool.submit(
+                contextvars.copy_context().run,
+                annotate_resume_data,
+                file_path,
+                extracted_data,
+                annotated_folder,
+            )
+
+    for stage, future in stages.items():
+        try:
+            result = future.result()
+        except Exception as e:
+            print(f"Error {stage}: {str(e)}")
+            continue
+        if stage == "generating summary":
+            _merge_summary(extracted_data, result)
+    return extracted_data
+
+
+def _run_agent_pipeline(
+    file_path: str,
+    json_file_path: str,
+    annotated_folder: str | None,
+    generate_summary: bool,
+) -> dict[str, Any] | None:
+    """
+    Run the pipeline stages through AutoGen agents that call them as tools.
+
+    The tools hand the result to each other through the extraction result
+    file, which is read back once when the agents are done.
+
+    Args:
+        file_path: Absolute path to the resume file
+        json_file_path: Extraction result file written by doc_parser
+        annotated_folder: Output folder for annotations, or None to skip
+        generate_summary: Whether to generate a professional summary
+
+    Returns:
+        Extracted data, or None if no extraction result was written
+    """
     # Setup autogen
     llm_config = get_autogen_config()
     user = UserProxyAgent(
@@ -411,10 +802,6 @@ def process_resume(
         silent=True,
     )
 
-    # Setup for annotation and summary
-    base_filename = os.path.splitext(os.path.basename(file_path))[0]
-    json_file_path = os.path.join(config.EXTRACTION_DIR, f"{base_filename}.json")
-
     # Generate summary if requested
     if generate_summary:
         summary_agent = AssistantAgent(
@@ -452,11 +839,8 @@ def process_resume(
             silent=True,
         )
 
-    # Collect annotation image paths
-    annotation_paths = []
-
-    # Handle annotation if requested
-    if use_annotator:
+    # Annotate if requested
+    if annotated_folder is not None:
         annotator_agent = AssistantAgent(
             name="Annotator_Agent",
             system_message=(
@@ -483,19 +867,6 @@ def process_resume(
             ),
         )
 
-        # For PDFs with multiple pages, create a subfolder
-        if file_path.lower().endswith((".pdf", ".PDF")):
-            try:
-                doc = fitz.open(file_path)
-                annotated_folder = os.path.join(config.ANNOTATIONS_DIR, base_filename)
-                doc.close()
-            except Exception:
-                annotated_folder = config.ANNOTATIONS_DIR
-        else:
-            annotated_folder = os.path.join(config.ANNOTATIONS_DIR, base_filename)
-
-        os.makedirs(annotated_folder, exist_ok=True)
-
         annotator_message = (
             f"Now, please annotate the resume file '{file_path}' using the "
             f"extracted JSON data from '{json_file_path}' by calling "
@@ -512,191 +883,129 @@ def process_resume(
             silent=True,
         )
 
-        # Collect annotation URLs
-        if file_path.lower().endswith((".pdf", ".PDF")):
-            try:
-                doc = fitz.open(file_path)
-                if len(doc) > 1:
-                    for i in range(len(doc)):
-                        annotation_filename = f"{base_filename}_page{i + 1}.png"
-                        annotation_path = (
-                            f"api/static/annotations/{base_filename}/"
-                            f"{annotation_filename}"
-                        )
-                        annotation_paths.append(annotation_path)
-                else:
-                    annotation_filename = f"{base_filename}_page1.png"
-                    annotation_path = (
-                        f"api/static/annotations/{base_filename}/{annotation_filename}"
-                    )
-                    annotation_paths.append(annotation_path)
-                doc.close()
-            except Exception:
-                pass
-        else:
-            annotation_filename = f"{base_filename}_annotated.png"
-            annotation_path = (
-                f"api/static/annotations/{base_filename}/{annotation_filename}"
-            )
-            annotation_paths.append(annotation_path)
-
-    # Calculate the total execution time
-    total_execution_time = time.time() - start_time
-
-    # Build pages data in the new format
-    pages_data = []
     try:
-        # Load original JSON data
         with open(json_file_path, encoding="utf-8") as f:
-            extracted_data = json.load(f)
-
-        if "pages" in extracted_data:
-            # Get real image dimensions
-            image_dimensions = {}
-            if file_path.lower().endswith((".pdf", ".PDF")):
-                try:
-                    doc = fitz.open(file_path)
-                    for i in range(len(doc)):
-                        # Get actual page dimensions
-                        page = doc.load_page(i)
-                        rect = page.rect
-                        image_dimensions[i + 1] = (
-                            int(rect.width),
-                            int(rect.height),
-                        )
-                    doc.close()
-                except Exception as e:
-                    print(f"Error getting PDF dimensions: {str(e)}")
-                    # Default to a reasonable size if we can't get actual dimensions
-                    image_dimensions[1] = (595, 842)  # A4 in points
-            else:
-                # For regular images, get actual dimensions
-                try:
-                    img = cv2.imread(file_path)
-                    if img is not None:
-                        height, width = img.shape[:2]
-                        image_dimensions[1] = (width, height)
-                    else:
-                        image_dimensions[1] = (800, 1200)  # Default fallback
-                except Exception as e:
-                    print(f"Error getting image dimensions: {str(e)}")
-                    image_dimensions[1] = (800, 1200)  # Default fallback
+            return json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"Error loading extraction result: {str(e)}")
+        return None
 
-            # Process each page
-            for page_key, page_data in extracted_data["pages"].items():
-                # Extract page number from the key (e.g., "page1" -> 1)
-                page_num = int(page_key.replace("page", ""))
 
-                # Get dimensions for this page
-                width, height = image_dimensions.get(page_num, (800, 1200))
+def _save_response(response: dict[str, Any], base_filename: str) -> None:
+    """Write the response to the extraction results, replacing it atomically."""
+    json_file_path = os.path.join(config.EXTRACTION_DIR, f"{base_filename}.json")
+    with timed("persistence"):
+        _write_json_atomic(json_file_path, response)
 
-                # Create data array for personal info
-                data_array = []
-                if "PersonalInfo" in page_data:
-                    for field_name, field_value in page_data["PersonalInfo"].items():
-                        if field_value and field_value != "Not Found":
-                            data_array.append(
-                                {
-                                    "text": field_value,
-                                    "label_name": field_name,
-                                }
-                            )
 
-                # Add Education data
-                if "Education" in page_data and isinstance(
-                    page_data["Education"], list
-                ):
-                    for i, edu in enumerate(page_data["Education"]):
-                        for field_name, field_value in edu.items():
-                            if field_value and field_value != "Not Found":
-                                data_array.append(
-                                    {
-                                        "text": field_value,
-                                        "label_name": f"Education_{i + 1}_{field_name}",
-                                    }
-                                )
+def _extraction_cache_key(
+    file_path: str, use_annotator: bool, generate_summary: bool
+) -> str:
+    """
+    Build the extraction cache key for a resume file.
 
-                # Add Work Experience data
-                if "WorkExperience" in page_data and isinstance(
-                    page_data["WorkExperience"], list
-                ):
-                    for i, work in enumerate(page_data["WorkExperience"]):
-                        for field_name, field_value in work.items():
-                            if field_value and field_value != "Not Found":
-                                data_array.append(
-                                    {
-                                        "text": field_value,
-                                        "label_name": f"Work_{i + 1}_{field_name}",
-                                    }
-                                )
+    The key covers the file bytes and everything else that changes the
+    result: the prompts, the model and the processing options.
 
-                # Add Skills data
-                if "Skills" in page_data:
-                    skills = page_data["Skills"]
-                    # Technical Skills
-                    if "TechnicalSkills" in skills and isinstance(
-                        skills["TechnicalSkills"], list
-                    ):
-                        for i, skill in enumerate(skills["TechnicalSkills"]):
-                            if skill and skill != "Not Found":
-                                data_array.append(
-                                    {
-                                        "text": skill,
-                                        "label_name": f"TechnicalSkill_{i + 1}",
-                                    }
-                                )
-                    # Languages
-                    if "Languages" in skills and isinstance(skills["Languages"], list):
-                        for i, lang in enumerate(skills["Languages"]):
-                            if lang and lang != "Not Found":
-                                data_array.append(
-                                    {
-                                        "text": lang,
-                                        "label_name": f"Language_{i + 1}",
-                                    }
-                                )
-                    # Add summary if available
-                    if "Summary" in page_data and page_data["Summary"]:
-                        data_array.append(
-                            {
-                                "text": page_data["Summary"],
-                                "label_name": "Summary",
-                                "is_visible": False,  # Don't visualize the summary
-                            }
-                        )
+    Args:
+        file_path: Path to the resume file
+        use_annotator: Whether annotations are requested
+        generate_summary: Whether a summary is requested
 
-                pages_data.append(
-                    {
-                        "image_id": f"{base_filename}_page{page_num}",
-                        "image_width_px": width,
-                        "image_height_px": height,
-                        "data": data_array,
-                        "page_num": page_num,
-                    }
-                )
-    except Exception as e:
-        print(f"Error creating pages data: {str(e)}")
+    Returns:
+        Cache key
+    """
+    settings = get_settings()
+    prompts = config.SYSTEM_PROMPT + config.SUMMARY_PROMPT
+    return make_cache_key(
+        file_sha256(file_path),
+        prompt_version=hashlib.sha256(prompts.encode("utf-8")).hexdigest(),
+        model=settings.MODEL_PATH,
+        options={
+            "use_annotator": use_annotator,
+            "generate_summary": generate_summary,
+            "text_layer_mode": settings.TEXT_LAYER_MODE,
+            "text_layer_min_chars": settings.TEXT_LAYER_MIN_CHARS,
+            "contact_rules_mode": settings.CONTACT_RULES_MODE,
+            "vision_min_pixels": settings.VISION_MIN_PIXELS,
+            "vision_max_pixels": settings.VISION_MAX_PIXELS,
+            "constrained_decoding": settings.CONSTRAINED_DECODING,
+        },
+    )
 
-    # Create the response format
-    response = {
-        "file_id": base_filename,
-        "processing_time_sec": round(total_execution_time, 2),
-        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
-        "pages": pages_data,
-        "image_urls": annotation_paths,
-        "message": "Resume processed successfully",
-        "summary_generated": generate_summary,
-    }
 
-    # Save in new format
-    with open(json_file_path, "w", encoding="utf-8") as f:
-        json.dump(response, f, indent=4, ensure_ascii=False)
+def _store_cached_response(
+    cache: ExtractionCache,
+    cache_key: str,
+    response: dict[str, Any],
+    base_filename: str,
+) -> None:
+    """Store a response and its annotation images in the extraction cache."""
+    # Files are stored by their suffix so a re-upload under another name can
+    # restore them under its own file id
+    files = {}
+    for url in response["image_urls"]:
+        file_name = os.path.basename(url)
+        files[file_name[len(base_filename) :]] = os.path.join(
+            config.ANNOTATIONS_DIR, base_filename, file_name
+        )
+    try:
+        cache.put(cache_key, response, files)
+    except OSError as e:
+        print(f"Error caching extraction result: {str(e)}")
+
+
+def _restore_cached_response(
+    cached: tuple[dict[str, Any], dict[str, str]],
+    base_filename: str,
+) -> dict[str, Any] | None:
+    """
+    Rebuild a process_resume response from an extraction cache entry.
+
+    The caller fills in ``processing_time_sec``.
 
-    # Save execution info to logs
-    logs_file = os.path.join(config.LOGS_DIR, f"{base_filename}_logs.json")
-    with open(logs_file, "w", encoding="utf-8") as f:
-        json.dump(response, f, indent=4, ensure_ascii=False)
+    Args:
+        cached: Cached response and its stored annotation images
+        base_filename: File id of the current upload
 
+    Returns:
+        Response for the current upload, in the usual format, or None if
+        the entry's files were evicted before they could be copied
+    """
+    response, files = cached
+
+    # Copy annotation images back under this upload's file id, keeping the
+    # page order of the original response
+    annotation_paths = []
+    annotated_folder = os.path.join(config.ANNOTATIONS_DIR, base_filename)
+    for url in response["image_urls"]:
+        suffix = os.path.basename(url)[len(response["file_id"]) :]
+        if suffix not in files:
+            continue
+        annotation_filename = f"{base_filename}{suffix}"
+        os.makedirs(annotated_folder, exist_ok=True)
+        try:
+            shutil.copyfile(
+                files[suffix], os.path.join(annotated_folder, annotation_filename)
+            )
+        except OSError as e:
+            # Another request evicted the entry after the lookup
+            print(f"Error restoring cached extraction result: {str(e)}")
+            return None
+        annotation_paths.append(
+            f"api/static/annotations/{base_filename}/{annotation_filename}"
+        )
+
+    for page in response["pages"]:
+        page["image_id"] = f"{base_filename}_page{page['page_num']}"
+
+    response.update(
+        {
+            "file_id": base_filename,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "image_urls": annotation_paths,
+        }
+    )
     return response
 
 
@@ -710,9 +1019,6 @@ def generate_summary_from_json(json_file_path: str) -> str:
     Returns:
         JSON string with the generated summary
     """
-    import json
-    import os
-
     # Ensure we have an absolute path
     json_file_path = os.path.abspath(json_file_path)
 
@@ -720,13 +1026,33 @@ def generate_summary_from_json(json_file_path: str) -> str:
     if not os.path.isfile(json_file_path):
         raise FileNotFoundError(f"JSON file not found: {json_file_path}")
 
-    # Get model and processor
-    model, processor = get_model_and_processor()
-
     # Load the JSON data
     with open(json_file_path, encoding="utf-8") as f:
         extracted_data = json.load(f)
 
+    summary_data = summarize_resume_data(extracted_data)
+
+    # Merge the summary into the extraction result. The file is replaced in
+    # one step so readers never see a partly written result.
+    _merge_summary(extracted_data, summary_data)
+    _write_json_atomic(json_file_path, extracted_data)
+
+    return json.dumps(summary_data, indent=4, ensure_ascii=False)
+
+
+@timed("summary")
+def summarize_resume_data(extracted_data: dict[str, Any]) -> dict[str, Any]:
+    """
+    Generate a professional summary for extracted resume data.
+
+    The data is only read, so other stages can use it at the same time.
+
+    Args:
+        extracted_data: Extracted data in the pages structure
+
+    Returns:
+        Summary data with a "Summary" field
+    """
     # Prepare the data for summary generation
     resume_text = ""
     if "pages" in extracted_data:
@@ -794,94 +1120,55 @@ def generate_summary_from_json(json_file_path: str) -> str:
                     resume_text += f"- Languages: {languages}\n"
 
     # Generate the summary using the configured model
-    messages = [
-        {
-            "role": "user",
-            "content": [
-                {
-                    "type": "text",
-                    "text": config.SUMMARY_PROMPT + "\n\nResume Data:\n" + resume_text,
-                }
-            ],
-        }
-    ]
-
-    text_prompt = processor.apply_chat_template(
-        messages, tokenize=False, add_generation_prompt=True
-    )
-
-    inputs = processor(
-        text=[text_prompt],
-        padding=True,
-        return_tensors="pt",
+    messages = build_text_messages(
+        resume_text, config.SUMMARY_PROMPT, label="Resume Data"
     )
 
-    inputs = inputs.to("cuda")
-    generated_ids = model.generate(**inputs, max_new_tokens=512)
-    generated_ids_trimmed = [
-        out_ids[len(in_ids) :]
-        for in_ids, out_ids in zip(inputs.input_ids, generated_ids, strict=False)
-    ]
-
-    output_text = processor.batch_decode(
-        generated_ids_trimmed,
-        skip_special_tokens=True,
-        clean_up_tokenization_spaces=True,
-    )[0]
+    scheduler = get_inference_scheduler()
+    json_schema = config.SUMMARY_SCHEMA if get_settings().CONSTRAINED_DECODING else None
+    output_text = scheduler.submit(
+        messages, max_new_tokens=512, json_schema=json_schema
+    ).result()
 
     # Extract JSON from response
-    import re
-
+    summary_data = None
     json_match = re.search(r"\{.*\}", output_text, re.DOTALL)
     if json_match:
-        json_str = json_match.group(0)
-
-        try:
-            summary_data = json.loads(json_str)
-
-            # Update the original JSON with the summary
-            if "pages" in extracted_data:
-                for page_key in extracted_data["pages"]:
-                    extracted_data["pages"][page_key]["Summary"] = summary_data.get(
-                        "Summary", ""
-                    )
-
-            # Save the updated JSON
-            with open(json_file_path, "w", encoding="utf-8") as f:
-                json.dump(extracted_data, f, indent=4, ensure_ascii=False)
-
-            return json.dumps(summary_data, indent=4, ensure_ascii=False)
-
-        except json.JSONDecodeError:
-            # If JSON parsing fails, create a basic summary
-            summary = {
-                "Summary": (
-                    "Unable to generate a proper summary from the extracted data."
-                )
-            }
-
-            # Save the updated JSON with basic summary
-            if "pages" in extracted_data:
-                for page_key in extracted_data["pages"]:
-                    extracted_data["pages"][page_key]["Summary"] = summary["Summary"]
-
-            with open(json_file_path, "w", encoding="utf-8") as f:
-                json.dump(extracted_data, f, indent=4, ensure_ascii=False)
+        with contextlib.suppress(json.JSONDecodeError):
+            summary_data = json.loads(json_match.group(0))
+    if summary_data is None:
+        # If no usable JSON was generated, fall back to a basic summary
+        summary_data = {
+            "Summary": "Unable to generate a proper summary from the extracted data."
+        }
+    return summary_data
 
-            return json.dumps(summary, indent=4, ensure_ascii=False)
 
-    else:
-        # If no JSON found, create a basic summary
-        summary = {
-            "Summary": ("Unable to generate a proper summary from the extracted data.")
-        }
+def _merge_summary(
+    extracted_data: dict[str, Any], summary_data: dict[str, Any]
+) -> None:
+    """Add the generated summary to every page of the extracted data."""
+    if "pages" in extracted_data:
+        for page_key in extracted_data["pages"]:
+            extracted_data["pages"][page_key]["Summary"] = summary_data.get(
+                "Summary", ""
+            )
 
-        # Save the updated JSON with basic summary
-        if "pages" in extracted_data:
-            for page_key in extracted_data["pages"]:
-                extracted_data["pages"][page_key]["Summary"] = summary["Summary"]
 
-        with open(json_file_path, "w", encoding="utf-8") as f:
-            json.dump(extracted_data, f, indent=4, ensure_ascii=False)
+def _write_json_atomic(path: str, data: Any) -> None:
+    """
+    Write compact JSON to a temporary file next to path, then move it into place.
 
-        return json.dumps(summary, indent=4, ensure_ascii=False)
+    Concurrent writers of the same file never interleave: readers see either
+    the previous or the new version, and the last rename wins.
+    """
+    fd, tmp_path = tempfile.mkstemp(
+        dir=os.path.dirname(path), prefix=".tmp-", suffix=".json"
+    )
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
@@ -0,0 +1,211 @@
+import copy
+import threading
+from collections import OrderedDict
+from typing import Any
+
+import torch
+
+
+def prompt_prefix_length(tokenizer: Any, text_prompt: str, instruction: str) -> int:
+    """
+    Count the leading tokens of a rendered prompt that end with the instruction.
+
+    Args:
+        tokenizer: Tokenizer of the model
+        text_prompt: Conversation rendered by the chat template
+        instruction: Static instruction text placed before the page content
+
+    Returns:
+        Number of tokens that only depend on the chat template and the
+        instruction, or 0 if the instruction is not part of the prompt
+    """
+    start = text_prompt.find(instruction)
+    if start < 0:
+        return 0
+    prefix = text_prompt[: start + len(instruction)]
+    ids = tokenizer(prefix, add_special_tokens=False)["input_ids"]
+    # The final token may merge with the page content that follows it
+    return max(len(ids) - 1, 0)
+
+
+def shared_prefix_length(
+    input_ids: torch.Tensor, attention_mask: torch.Tensor, limit: int
+) -> int:
+    """
+    Count the leading tokens all rows of a left-padded batch have in common.
+
+    Args:
+        input_ids: Left-padded token ids, one row per sequence
+        attention_mask: Matching attention mask
+        limit: Upper bound for the result (e.g. the instruction length)
+
+    Returns:
+        Length of the common prefix, leaving at least two tokens per row to
+        the suffix
+    """
+    rows = [
+        ids[mask.bool()] for ids, mask in zip(input_ids, attention_mask, strict=True)
+    ]
+    length = min([limit] + [len(row) - 2 for row in rows])
+    if length <= 0:
+        return 0
+    first = rows[0][:length]
+    for row in rows[1:]:
+        mismatch = (row[:length] != first).nonzero()
+        if len(mismatch):
+            length = int(mismatch[0])
+            first = first[:length]
+    return length
+
+
+class PrefixCache:
+    """LRU of key/value states for prompt prefixes shared across pages."""
+
+    def __init__(self, max_entries: int = 4):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # generate_with_prefix hands the rotary offsets to generate through
+        # the model object, which every generate call of the model shares;
+        # calls that use this cache hold the lock for the whole generation
+        self.generate_lock = threading.Lock()
+        # Prefix token ids -> key/value states, least recently used first
+        self._entries: OrderedDict[tuple[int, ...], Any] = OrderedDict()
+
+    def get(self, model: Any, prefix_ids: torch.Tensor) -> Any:
+        """
+        Return a private copy of the key/value states of a prefix.
+
+        The states are computed on first use. The copy can be extended by a
+        generate call without touching the cached entry.
+
+        Args:
+            model: Loaded vision-language model
+            prefix_ids: 1-D tensor of prefix token ids
+
+        Returns:
+            Cache object holding the prefix states for a batch of one
+        """
+        key = tuple(prefix_ids.tolist())
+        with self._lock:
+            states = self._entries.get(key)
+            if states is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        if states is None:
+            states = _prefill(model, prefix_ids)
+            with self._lock:
+                self._entries[key] = states
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return copy.deepcopy(states)
+
+    def clear(self) -> None:
+        """Drop every cached prefix."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        """Return hit/miss counters and the number of cached prefixes."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+            }
+
+
+def _prefill(model: Any, prefix_ids: torch.Tensor) -> Any:
+    """Run the model over a text-only prefix and keep its key/value states."""
+    input_ids = prefix_ids.to(model.device).unsqueeze(0)
+    # Text positions are the same on all three rotary axes
+    position_ids = torch.arange(input_ids.shape[1], device=model.device)
+    position_ids = position_ids.view(1, 1, -1).expand(3, 1, -1)
+    with torch.no_grad():
+        outputs = model(input_ids=input_ids, position_ids=position_ids, use_cache=True)
+    return outputs.past_key_values
+
+
+def generate_with_prefix(
+    model: Any,
+    inputs: Any,
+    prefix_length: int,
+    prefix_cache: PrefixCache,
+    **generate_kwargs: Any,
+) -> torch.Tensor:
+    """
+    Generate for a batch whose rows start with the same prefix tokens.
+
+    Rows are re-padded in the middle (prefix, padding, suffix) so that they
+    can share the cached prefix states. Only the suffix, i.e. the page image
+    or text, is prefilled; rotary positions are computed for the full rows.
+
+    The caller must hold ``prefix_cache.generate_lock``: the rotary offsets
+    are set on the shared model for generate to pick up. This relies on
+    Qwen2.5-VL internals of the pinned transformers version
+    (``get_rope_index``, ``batch_repeat_interleave``, ``logits_to_keep``).
+
+    Args:
+        model: Loaded vision-language model
+        inputs: Left-padded processor outputs for the batch
+        prefix_length: Number of leading tokens shared by all rows
+        prefix_cache: Cache of prefix key/value states
+        **generate_kwargs: Passed on to model.generate
+
+    Returns:
+        Generated token ids (without the prompt), one row per sequence
+    """
+    input_ids = inputs["input_ids"]
+    attention_mask = inputs["attention_mask"]
+    token_types = inputs.get("mm_token_type_ids")
+    if token_types is None:
+        token_types = torch.zeros_like(input_ids)
+
+    ids = torch.zeros_like(input_ids)
+    mask = torch.zeros_like(attention_mask)
+    types = torch.zeros_like(token_types)
+    for row, valid in enumerate(attention_mask.bool()):
+        suffix = int(valid.sum()) - prefix_length
+        ids[row, :prefix_length] = input_ids[row, valid][:prefix_length]
+        ids[row, -suffix:] = input_ids[row, valid][prefix_length:]
+        types[row, -suffix:] = token_types[row, valid][prefix_length:]
+        mask[row, :prefix_length] = 1
+        mask[row, -suffix:] = 1
+
+    image_grid_thw = inputs.get("image_grid_thw")
+    position_ids, rope_deltas = model.model.get_rope_index(
+        ids,
+        mm_token_type_ids=types,
+        image_grid_thw=image_grid_thw,
+        attention_mask=mask,
+    )
+    past_key_values = prefix_cache.get(model, ids[0, :prefix_length])
+    past_key_values.batch_repeat_interleave(ids.shape[0])
+
+    # Prefill the suffix up to its last token, images included...
+    with torch.no_grad():
+        model(
+            input_ids=ids[:, prefix_length:-1],
+            attention_mask=mask[:, :-1],
+            position_ids=position_ids[:, :, prefix_length:-1],
+            past_key_values=past_key_values,
+            pixel_values=inputs.get("pixel_values"),
+            image_grid_thw=image_grid_thw,
+            use_cache=True,
+            logits_to_keep=1,
+        )
+    # ...and let generate continue from the last prompt token, whose position
+    # (and those of all new tokens) follows from the rotary offsets
+    model.model.rope_deltas = rope_deltas
+    generated_ids = model.generate(
+        input_ids=ids,
+        attention_mask=mask,
+        past_key_values=past_key_values,
+        **generate_kwargs,
+    )
+    return generated_ids[:, ids.shape[1] :]
@@ -1,12 +1,6 @@
-import os
 import re
-import sys
 from typing import Any
 
-sys.path.append(
-    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-)
-
 
 def validate_email(email: str) -> bool:
     """
@@ -71,6 +65,98 @@ def validate_linkedin_url(url: str) -> bool:
     return validate_url(url) and ("linkedin.com" in url)
 
 
+# Candidate patterns for the rule-based contact extractor
+EMAIL_CANDIDATE_PATTERN = re.compile(r"[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}")
+PHONE_CANDIDATE_PATTERN = re.compile(
+    r"(?<![\w.])\+?\(?\d[\d \t\-\.\(\)]{6,}\d(?![\w.])"
+)
+LINKEDIN_CANDIDATE_PATTERN = re.compile(
+    r"(?:https?://)?(?:[a-z]{2,3}\.)?linkedin\.com/in/[a-zA-Z0-9_-]+/?", re.IGNORECASE
+)
+YEAR_RANGE_PATTERN = re.compile(r"^(19|20)\d{2}\s*[-.]\s*(19|20)\d{2}$")
+
+# Personal info keys in the order the extraction prompt lists them
+PERSONAL_INFO_FIELDS = ["Name", "Email", "Phone", "Location"]
+
+
+def _unique(values: list[str], key=lambda value: value) -> str | None:
+    """Return the single distinct value in a list, or None if ambiguous."""
+    distinct: dict[str, str] = {}
+    for value in values:
+        distinct.setdefault(key(value), value)
+    if len(distinct) == 1:
+        return next(iter(distinct.values()))
+    return None
+
+
+def extract_contact_info(text: str) -> dict[str, str]:
+    """
+    Pull contact fields out of page text with deterministic rules.
+
+    A field is only returned when exactly one distinct valid value is found
+    on the page, so callers can trust it without asking the model.
+
+    Args:
+        text: Page text from the PDF text layer or an OCR pass
+
+    Returns:
+        Dictionary with any of the keys Email, Phone and LinkedIn
+    """
+    contact: dict[str, str] = {}
+
+    emails = [m for m in EMAIL_CANDIDATE_PATTERN.findall(text) if validate_email(m)]
+    email = _unique(emails, key=str.lower)
+    if email:
+        contact["Email"] = email
+
+    phones = []
+    for match in PHONE_CANDIDATE_PATTERN.findall(text):
+        candidate = match.strip()
+        digits = re.sub(r"\D", "", candidate)
+        # Years and year ranges also look like digit runs; require 9+ digits
+        if len(digits) < 9 or YEAR_RANGE_PATTERN.match(candidate):
+            continue
+        if validate_phone(candidate):
+            phones.append(candidate)
+    phone = _unique(phones, key=lambda value: re.sub(r"\D", "", value))
+    if phone:
+        contact["Phone"] = phone
+
+    urls = [
+        m for m in LINKEDIN_CANDIDATE_PATTERN.findall(text) if validate_linkedin_url(m)
+    ]
+    linkedin = _unique(urls, key=lambda value: value.lower().rstrip("/"))
+    if linkedin:
+        contact["LinkedIn"] = linkedin
+
+    return contact
+
+
+def merge_contact_info(page_data: dict[str, Any], contact: dict[str, str]) -> None:
+    """
+    Fill rule-extracted contact fields into a page's PersonalInfo.
+
+    Only fields that belong to the PersonalInfo schema are merged, and the
+    usual key order is kept so the response shape does not change.
+
+    Args:
+        page_data: Page data returned by the model (modified in place)
+        contact: Fields returned by extract_contact_info
+    """
+    fields = {k: v for k, v in contact.items() if k in PERSONAL_INFO_FIELDS}
+    if not fields:
+        return
+
+    personal_info = page_data.get("PersonalInfo")
+    if not isinstance(personal_info, dict):
+        personal_info = {}
+    merged = {**personal_info, **fields}
+    page_data["PersonalInfo"] = {
+        **{k: merged.get(k, "Not Found") for k in PERSONAL_INFO_FIELDS},
+        **{k: v for k, v in merged.items() if k not in PERSONAL_INFO_FIELDS},
+    }
+
+
 def clean_date(date_str: str) -> str:
     """
     Clean and standardize date strings from various formats.
@@ -0,0 +1,110 @@
+import cv2
+import fitz  # PyMuPDF
+import numpy as np
+from PIL import Image
+from qwen_vl_utils import smart_resize
+
+# Qwen2.5-VL image sides are multiples of the 14 px patch times the 2x2 merge
+PATCH_FACTOR = 28
+
+
+def pixmap_to_image(pix: fitz.Pixmap) -> Image.Image:
+    """
+    Build a PIL image from a pixmap's samples without re-encoding them.
+
+    ``pix.samples`` is a copy of the sample buffer, so the image owns its
+    memory and stays valid after the pixmap is freed.
+
+    Args:
+        pix: Rendered PyMuPDF pixmap (RGB or RGBA)
+
+    Returns:
+        PIL image of the pixmap's raw samples
+    """
+    mode = "RGBA" if pix.alpha else "RGB"
+    return Image.frombuffer(
+        mode, (pix.width, pix.height), pix.samples, "raw", mode, pix.stride, 1
+    )
+
+
+def pixmap_to_bgr(pix: fitz.Pixmap) -> np.ndarray:
+    """
+    Convert a pixmap to an OpenCV BGR image without re-encoding it.
+
+    The sample buffer is viewed as an array in place; reordering the
+    channels is the only copy made.
+
+    Args:
+        pix: Rendered PyMuPDF pixmap (grayscale, RGB or RGBA)
+
+    Returns:
+        BGR image owning its own memory
+    """
+    rows = np.frombuffer(pix.samples_mv, dtype=np.uint8).reshape(pix.height, pix.stride)
+    pixels = rows[:, : pix.width * pix.n].reshape(pix.height, pix.width, pix.n)
+    if pix.n == 1:
+        return cv2.cvtColor(pixels, cv2.COLOR_GRAY2BGR)
+    if pix.n == 4:
+        return cv2.cvtColor(pixels, cv2.COLOR_RGBA2BGR)
+    return cv2.cvtColor(pixels, cv2.COLOR_RGB2BGR)
+
+
+def target_size(
+    rect: fitz.Rect, zoom: float, min_pixels: int, max_pixels: int
+) -> tuple[int, int]:
+    """
+    Compute the pixel size the vision model will see for a page.
+
+    The page is scaled by ``zoom`` and then fitted into the pixel budget with
+    the same rounding ``qwen_vl_utils`` applies, so an image rendered at this
+    size is not resized again by the processor.
+
+    Args:
+        rect: Page rectangle in PDF points
+        zoom: Preferred scale factor applied to the page's native resolution
+        min_pixels: Lower bound of the vision-token budget, in pixels
+        max_pixels: Upper bound of the vision-token budget, in pixels
+
+    Returns:
+        Tuple of (width, height) in pixels
+    """
+    height, width = smart_resize(
+        max(1, round(rect.height * zoom)),
+        max(1, round(rect.width * zoom)),
+        factor=PATCH_FACTOR,
+        min_pixels=min_pixels,
+        max_pixels=max_pixels,
+    )
+    return width, height
+
+
+def render_page(
+    page: fitz.Page,
+    zoom: float = 2.0,
+    min_pixels: int | None = None,
+    max_pixels: int | None = None,
+) -> Image.Image:
+    """
+    Rasterize a PDF page straight into an in-memory PIL image.
+
+    When a pixel budget is given, the render matrix is derived from
+    ``page.rect`` so PyMuPDF produces the final model input size in one step
+    instead of oversampling and resizing afterwards.
+
+    Args:
+        page: PyMuPDF page to render
+        zoom: Scale factor applied to the page's native resolution
+        min_pixels: Lower bound of the pixel budget (requires max_pixels)
+        max_pixels: Upper bound of the pixel budget
+
+    Returns:
+        RGB image of the rendered page
+    """
+    matrix = fitz.Matrix(zoom, zoom)
+    if max_pixels is not None:
+        rect = page.rect
+        width, height = target_size(rect, zoom, min_pixels or 0, max_pixels)
+        matrix = fitz.Matrix(width / rect.width, height / rect.height)
+
+    pix = page.get_pixmap(matrix=matrix, colorspace=fitz.csRGB, alpha=False)
+    return pixmap_to_image(pix)
@@ -0,0 +1,314 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import AbstractContextManager
+from dataclasses import dataclass, field
+from typing import Any, Protocol
+
+from app.models.core import ProcessingMetrics
+from app.services.inference import generate_prepared, prepare_batch
+from app.services.metrics import current_metrics, metrics_scope, record_stage
+from app.services.prefix_cache import PrefixCache
+
+
+class ModelBackend(Protocol):
+    """Anything that can turn a batch of conversations into output texts."""
+
+    def prepare(self, messages_batch: list[list[dict[str, Any]]]) -> Any:
+        """Build model inputs for a batch without using the model."""
+        ...
+
+    def generate(
+        self,
+        prepared: Any,
+        max_new_tokens: int,
+        json_schemas: list[dict[str, Any] | None],
+    ) -> list[str]:
+        """Generate one output text per conversation, in input order."""
+        ...
+
+
+class QwenBackend:
+    """Model backend running batched generation on the loaded VLM."""
+
+    def __init__(
+        self,
+        model: Any,
+        processor: Any,
+        stop_at_json_end: bool = True,
+        prefix_cache: PrefixCache | None = None,
+    ):
+        self.model = model
+        self.processor = processor
+        self.stop_at_json_end = stop_at_json_end
+        self.prefix_cache = prefix_cache
+
+    def prepare(self, messages_batch: list[list[dict[str, Any]]]) -> Any:
+        """Render prompts, load images and tokenize the batch on the CPU."""
+        return prepare_batch(self.processor, messages_batch)
+
+    def generate(
+        self,
+        prepared: Any,
+        max_new_tokens: int,
+        json_schemas: list[dict[str, Any] | None],
+    ) -> list[str]:
+        """Run one padded generate call for the whole batch."""
+        return generate_prepared(
+            self.model,
+            self.processor,
+            prepared,
+            max_new_tokens,
+            stop_at_json_end=self.stop_at_json_end,
+            json_schemas=json_schemas,
+            prefix_cache=self.prefix_cache,
+        )
+
+
+@dataclass
+class InferenceRequest:
+    """A single conversation waiting to be generated."""
+
+    messages: list[dict[str, Any]]
+    max_new_tokens: int
+    json_schema: dict[str, Any] | None = None
+    future: Future = field(default_factory=Future)
+    enqueued_at: float = field(default_factory=time.perf_counter)
+    # Metrics of the submitting request; worker threads time stages into it
+    metrics: tuple[ProcessingMetrics, ...] = field(default_factory=current_metrics)
+
+
+@dataclass
+class SchedulerStats:
+    """Counters describing how the scheduler has batched its work."""
+
+    batches: int = 0
+    items: int = 0
+    queue_wait_sec: float = 0.0
+    max_queue_wait_sec: float = 0.0
+
+    @property
+    def mean_batch_size(self) -> float:
+        """Average number of items per generate call."""
+        return self.items / self.batches if self.batches else 0.0
+
+    @property
+    def mean_queue_wait_sec(self) -> float:
+        """Average time an item spent queued before its batch started."""
+        return self.queue_wait_sec / self.items if self.items else 0.0
+
+
+class InferenceScheduler:
+    """
+    Collect generation requests from concurrent callers into batches.
+
+    Work items are queued by ``submit`` and picked up by worker threads. A
+    worker starts a batch with the oldest item and keeps adding items until
+    the batch holds ``max_batch_size`` items or the oldest item has waited
+    ``max_wait_ms``. Only items with the same ``max_new_tokens`` share a
+    batch. Each caller gets its output back through a future.
+
+    With ``prefetch_batches`` above zero, every worker is split into a
+    prepare thread and a generate thread: up to that many batches are
+    collected and turned into model inputs (image loading, tokenization) on
+    the CPU while the model is still busy with the current batch.
+    """
+
+    def __init__(
+        self,
+        backend: ModelBackend,
+        max_batch_size: int = 3,
+        max_wait_ms: float = 20.0,
+        num_workers: int = 1,
+        prefetch_batches: int = 1,
+    ):
+        self.backend = backend
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_sec = max(0.0, max_wait_ms) / 1000
+        self.num_workers = max(1, num_workers)
+        self.prefetch_batches = max(0, prefetch_batches)
+        self.stats = SchedulerStats()
+        self._queue: queue.Queue[InferenceRequest | None] = queue.Queue()
+        self._lock = threading.Lock()
+        self._workers: list[threading.Thread] = []
+        for i in range(self.num_workers):
+            if self.prefetch_batches:
+                ready: queue.Queue = queue.Queue()
+                slots = threading.Semaphore(self.prefetch_batches)
+                self._workers += [
+                    threading.Thread(
+                        target=self._prepare_loop,
+                        args=(ready, slots),
+                        name=f"inference-prepare-{i}",
+                        daemon=True,
+                    ),
+                    threading.Thread(
+                        target=self._generate_loop,
+                        args=(ready, slots),
+                        name=f"inference-worker-{i}",
+                        daemon=True,
+                    ),
+                ]
+            else:
+                self._workers.append(
+                    threading.Thread(
+                        target=self._run, name=f"inference-worker-{i}", daemon=True
+                    )
+                )
+        for worker in self._workers:
+            worker.start()
+
+    def submit(
+        self,
+        messages: list[dict[str, Any]],
+        max_new_tokens: int = 1024,
+        json_schema: dict[str, Any] | None = None,
+    ) -> Future:
+        """
+        Queue one conversation for generation.
+
+        Args:
+            messages: Chat messages for a single sequence
+            max_new_tokens: Generation budget for this sequence
+            json_schema: Optional JSON schema the output must follow
+
+        Returns:
+            Future resolving to the decoded output text
+        """
+        request = InferenceRequest(
+            messages=messages, max_new_tokens=max_new_tokens, json_schema=json_schema
+        )
+        self._queue.put(request)
+        return request.future
+
+    def shutdown(self) -> None:
+        """Stop the worker threads once the queued work has drained."""
+        for _ in range(self.num_workers):
+            self._queue.put(None)
+        for worker in self._workers:
+            worker.join()
+
+    def _run(self) -> None:
+        """Worker loop: collect a batch, generate it, resolve the futures."""
+        carry: list[InferenceRequest] = []
+        while True:
+            first = carry.pop(0) if carry else self._queue.get()
+            if first is None:
+                return
+            work = self._prepare(self._collect_batch(first, carry))
+            if work is not None:
+                self._run_batch(*work)
+
+    def _prepare_loop(self, ready: queue.Queue, slots: threading.Semaphore) -> None:
+        """Prepare loop: collect batches and build their inputs ahead of time."""
+        carry: list[InferenceRequest] = []
+        while True:
+            # Wait for a free slot first, so batches keep filling up while
+            # the look-ahead is exhausted
+            slots.acquire()
+            first = carry.pop(0) if carry else self._queue.get()
+            if first is None:
+                ready.put(None)
+                return
+            work = self._prepare(self._collect_batch(first, carry))
+            if work is None:
+                slots.release()
+            else:
+                ready.put(work)
+
+    def _generate_loop(self, ready: queue.Queue, slots: threading.Semaphore) -> None:
+        """Generate loop: run prepared batches in order."""
+        while True:
+            work = ready.get()
+            if work is None:
+                return
+            slots.release()
+            self._run_batch(*work)
+
+    def _prepare(
+        self, batch: list[InferenceRequest]
+    ) -> tuple[list[InferenceRequest], Any] | None:
+        """Build model inputs for a batch, or fail its futures."""
+        try:
+            with _batch_metrics(batch):
+                prepared = self.backend.prepare([item.messages for item in batch])
+            return batch, prepared
+        except Exception as e:
+            for item in batch:
+                item.future.set_exception(e)
+            return None
+
+    def _collect_batch(
+        self, first: InferenceRequest, carry: list[InferenceRequest]
+    ) -> list[InferenceRequest]:
+        """Gather compatible items until the batch is full or the window ends."""
+        batch = [first]
+        deadline = first.enqueued_at + self.max_wait_sec
+
+        # Items held over from the previous round go first
+        for item in list(carry):
+            if len(batch) >= self.max_batch_size:
+                break
+            if item.max_new_tokens == first.max_new_tokens:
+                carry.remove(item)
+                batch.append(item)
+
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            queued: InferenceRequest | None
+            try:
+                queued = (
+                    self._queue.get(timeout=timeout)
+                    if timeout > 0
+                    else self._queue.get_nowait()
+                )
+            except queue.Empty:
+                break
+            if queued is None:
+                # Leave the stop signal for the main loop once carry is drained
+                self._queue.put(None)
+                break
+            if queued.max_new_tokens == first.max_new_tokens:
+                batch.append(queued)
+            else:
+                carry.append(queued)
+        return batch
+
+    def _run_batch(self, batch: list[InferenceRequest], prepared: Any) -> None:
+        """Generate a batch and hand each output to its caller."""
+        started = time.perf_counter()
+        with self._lock:
+            self.stats.batches += 1
+            self.stats.items += len(batch)
+            for item in batch:
+                wait = started - item.enqueued_at
+                self.stats.queue_wait_sec += wait
+                self.stats.max_queue_wait_sec = max(self.stats.max_queue_wait_sec, wait)
+        for item in batch:
+            with metrics_scope(*item.metrics):
+                record_stage("queue_wait", started - item.enqueued_at)
+
+        try:
+            with _batch_metrics(batch):
+                outputs = self.backend.generate(
+                    prepared,
+                    batch[0].max_new_tokens,
+                    [item.json_schema for item in batch],
+                )
+            if len(outputs) != len(batch):
+                raise RuntimeError(
+                    f"Backend returned {len(outputs)} outputs for {len(batch)} inputs"
+                )
+        except Exception as e:
+            for item in batch:
+                item.future.set_exception(e)
+            return
+
+        for item, output in zip(batch, outputs, strict=True):
+            item.future.set_result(output)
+
+
+def _batch_metrics(batch: list[InferenceRequest]) -> AbstractContextManager[None]:
+    """Attribute the stages timed for a batch to every request in it."""
+    return metrics_scope(*(metrics for item in batch for metrics in item.metrics))
@@ -0,0 +1,117 @@
+import fitz  # PyMuPDF
+
+# Share of U+FFFD characters above which a text layer is treated as garbled
+MAX_REPLACEMENT_RATIO = 0.05
+
+
+def extract_page_text(page: fitz.Page) -> str:
+    """
+    Read a page's embedded text layer in reading order.
+
+    Args:
+        page: PyMuPDF page
+
+    Returns:
+        Text of all text blocks, one block per paragraph
+    """
+    blocks = page.get_text("blocks", sort=True)
+    # Block tuples are (x0, y0, x1, y1, text, block_no, block_type); type 1 = image
+    return "\n\n".join(
+        block[4].strip() for block in blocks if block[6] == 0 and block[4].strip()
+    )
+
+
+def has_usable_text(text: str, min_chars: int) -> bool:
+    """
+    Decide whether an extracted text layer is good enough to skip vision.
+
+    Scanned pages have no text layer (or only a few stray characters), and
+    PDFs with broken font encodings produce replacement characters instead
+    of text; both should go through the vision path.
+
+    Args:
+        text: Text returned by extract_page_text
+        min_chars: Minimum number of non-whitespace characters required
+
+    Returns:
+        True if the page can be processed from its text alone
+    """
+    visible = "".join(text.split())
+    if len(visible) < min_chars:
+        return False
+    return visible.count("�") / len(visible) <= MAX_REPLACEMENT_RATIO
+
+
+# Horizontal gap, relative to the word height, that splits a line into
+# phrases; EasyOCR merges boxes closer than this (its width_ths default)
+PHRASE_GAP_RATIO = 0.5
+
+
+def _phrases(words: list[tuple]) -> list[list[tuple]]:
+    """Group a page's words into phrases, the way OCR groups detections."""
+    phrases: list[list[tuple]] = []
+    current: list[tuple] = []
+    line = None
+    for word in words:
+        # Separators such as "|" or bullets end a phrase and are dropped
+        if not any(char.isalnum() for char in word[4]):
+            current = []
+            continue
+        gap = word[0] - current[-1][2] if current else 0.0
+        if (
+            current
+            and word[5:7] == line
+            and gap <= (word[3] - word[1]) * PHRASE_GAP_RATIO
+        ):
+            current.append(word)
+        else:
+            current = [word]
+            phrases.append(current)
+        line = word[5:7]
+    return phrases
+
+
+def extract_word_locations(
+    page: fitz.Page, min_chars: int
+) -> dict[str, tuple[float, float, float, float]] | None:
+    """
+    Build a text-location map from a page's embedded word boxes.
+
+    The map has the same shape as the one the annotator builds with OCR:
+    lowercased phrases, and their words longer than two characters, mapped
+    to (x1, y1, x2, y2) boxes normalized to the page size, so it works at
+    any render zoom and page rotation. Words get their own boxes instead of
+    their phrase's.
+
+    Args:
+        page: PyMuPDF page
+        min_chars: Minimum number of non-whitespace characters for the text
+            layer to be trusted (see has_usable_text)
+
+    Returns:
+        Text locations, or None if the page has no usable text layer and
+        has to be read with OCR
+    """
+    # Word tuples are (x0, y0, x1, y1, word, block_no, line_no, word_no)
+    words = page.get_text("words", sort=True)
+    if not has_usable_text(" ".join(word[4] for word in words), min_chars):
+        return None
+
+    width, height = page.rect.width, page.rect.height
+
+    def _normalize(box: fitz.Rect) -> tuple[float, float, float, float]:
+        return (box.x0 / width, box.y0 / height, box.x1 / width, box.y1 / height)
+
+    locs: dict[str, tuple[float, float, float, float]] = {}
+    for phrase in _phrases(words):
+        # Words are in unrotated page space; rotate them like the render
+        boxes = [fitz.Rect(word[:4]) * page.rotation_matrix for word in phrase]
+        phrase_box = fitz.Rect()
+        for box in boxes:
+            phrase_box |= box
+        locs[" ".join(word[4] for word in phrase).lower()] = _normalize(phrase_box)
+        # Unlike OCR, every word has its own exact box
+        for word, box in zip(phrase, boxes, strict=True):
+            if len(word[4]) > 2:
+                locs[word[4].lower()] = _normalize(box)
+    return locs
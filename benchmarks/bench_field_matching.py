@@ -0,0 +1,131 @@
+"""
+Compare per-candidate difflib field matching with the prefiltered matcher.
+
+The difflib path mirrors what ResumeAnnotator._match_fields used to do: one
+SequenceMatcher per field and OCR candidate, plus a second one on the digits
+of phone numbers. The prefiltered path is the annotator's current matcher,
+which bounds every field of a type against every candidate in one cdist call
+and only runs SequenceMatcher on the candidates that could reach 0.7.
+
+Usage:
+    python benchmarks/bench_field_matching.py [--tokens 300 1000] [--repeat 5]
+"""
+
+import argparse
+import random
+import re
+import string
+import tempfile
+from difflib import SequenceMatcher
+
+from common import RESUME_LINES, make_resume_pdf, time_call
+
+from app.services.annotator import ResumeAnnotator
+
+FIELDS = {
+    "PersonalInfo": {
+        "Name": "John Doe",
+        "Email": "john.doe@example.com",
+        "Phone": "+1 234 567 8901",
+        "Location": "New York NY",
+    },
+    "WorkExperience": [
+        {"JobTitle": "Senior Software Engineer"},
+        {"JobTitle": "Software Engineer"},
+        {"JobTitle": "Junior Developer"},
+    ],
+}
+
+
+def make_locations(tokens: int) -> dict[str, tuple[float, float, float, float]]:
+    """Build an OCR-like text-location map with the given number of keys."""
+    rng = random.Random(0)
+    locs = {}
+    for text, _ in RESUME_LINES:
+        for part in [text.lower(), *text.lower().split()]:
+            if part:
+                locs[part] = (rng.random(), rng.random(), 1.0, 1.0)
+    while len(locs) < tokens:
+        word = "".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 12)))
+        locs[word] = (rng.random(), rng.random(), 1.0, 1.0)
+    return locs
+
+
+def difflib_sequence_match(annotator, target, candidates, field_type):
+    """Find the best candidate with one SequenceMatcher per pair."""
+    clean_target = annotator._preprocess_field(target, field_type)
+    best, best_score = None, 0.0
+    for cand in candidates:
+        clean_cand = annotator._preprocess_field(cand, field_type)
+        ratio = SequenceMatcher(None, clean_target, clean_cand).ratio()
+        if field_type == "Email" and "@" in clean_target and "@" in clean_cand:
+            ratio = max(ratio, 0.8)
+        elif field_type == "Phone":
+            dt = "".join(re.findall(r"\d", clean_target))
+            dc = "".join(re.findall(r"\d", clean_cand))
+            if dt and dc:
+                digits = SequenceMatcher(None, dt, dc).ratio()
+                if digits > 0.7:
+                    ratio = max(ratio, 0.75 + digits * 0.2)
+        if ratio > best_score:
+            best, best_score = cand, ratio
+    return best, best_score
+
+
+def difflib_match_fields(annotator, text_locations, flat_json):
+    """Match the sequence-matched fields the way the annotator used to."""
+    coords = {}
+    for field, val in flat_json.items():
+        field_type = field.split("_")[0]
+        if field_type not in annotator.sequence_matcher_fields:
+            continue
+        best, score = difflib_sequence_match(
+            annotator, str(val).lower().strip(), text_locations, field_type
+        )
+        if score >= 0.7:
+            coords[field] = text_locations[best]
+    return coords
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tokens", type=int, nargs="+", default=[300, 1000, 3000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.NamedTemporaryFile(suffix=".pdf") as pdf:
+        doc = make_resume_pdf(1)
+        doc.save(pdf.name)
+        doc.close()
+        annotator = ResumeAnnotator(pdf.name, FIELDS)
+    flat_json = {
+        field: val
+        for field, val in annotator._flatten_json(FIELDS).items()
+        if field.split("_")[0] in annotator.sequence_matcher_fields
+    }
+
+    print(f"{'tokens':>6}  {'difflib ms':>10}  {'batched ms':>10}  {'speedup':>7}")
+    for tokens in args.tokens:
+        locs = make_locations(tokens)
+        # Exact matches short-circuit both paths; time the fuzzy search
+        values = {str(val).lower() for val in flat_json.values()}
+        fuzzy = {k: v for k, v in locs.items() if k not in values}
+        assert difflib_match_fields(annotator, fuzzy, flat_json) == (
+            annotator._match_fields(fuzzy, flat_json)
+        )
+
+        difflib_time = time_call(
+            lambda f=fuzzy: difflib_match_fields(annotator, f, flat_json),
+            args.repeat,
+        )
+        batched_time = time_call(
+            lambda f=fuzzy: annotator._match_fields(f, flat_json), args.repeat
+        )
+        print(
+            f"{tokens:>6}  {difflib_time * 1000:>10.1f}  "
+            f"{batched_time * 1000:>10.2f}  {difflib_time / batched_time:>6.0f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Measure decode tokens saved by stopping generation when the JSON closes.
+
+Every page is generated twice on the real model: once running to the
+model's own end-of-sequence (or max_new_tokens), and once with the
+JsonObjectStoppingCriteria that ends the sequence at the closing brace of the
+top-level object. Both outputs are re-tokenized to count decode steps.
+
+Requires the model at Settings.MODEL_PATH (and a GPU for realistic timings).
+
+Usage:
+    python benchmarks/bench_json_early_stop.py [PDF ...] [--synthetic 3]
+"""
+
+import argparse
+import time
+
+import fitz  # PyMuPDF
+from common import make_resume_pdf, require_model
+
+from app.config import SYSTEM_PROMPT
+from app.core.settings import get_settings
+from app.dependencies import get_model_and_processor
+from app.services.inference import (
+    build_page_messages,
+    build_text_messages,
+    generate_batch,
+)
+from app.services.rendering import render_page
+from app.services.text_layer import extract_page_text, has_usable_text
+
+
+def page_messages(page: fitz.Page) -> list:
+    """Build the same model input doc_parser would send for a page."""
+    settings = get_settings()
+    text = extract_page_text(page)
+    if settings.TEXT_LAYER_MODE and has_usable_text(
+        text, settings.TEXT_LAYER_MIN_CHARS
+    ):
+        return build_text_messages(text, SYSTEM_PROMPT)
+    image = render_page(
+        page,
+        min_pixels=settings.VISION_MIN_PIXELS,
+        max_pixels=settings.VISION_MAX_PIXELS,
+    )
+    return build_page_messages(
+        image, SYSTEM_PROMPT, settings.VISION_MIN_PIXELS, settings.VISION_MAX_PIXELS
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("paths", nargs="*")
+    parser.add_argument("--synthetic", type=int, default=3)
+    parser.add_argument("--max-new-tokens", type=int, default=1024)
+    args = parser.parse_args()
+
+    require_model()
+    model, processor = get_model_and_processor()
+    docs = [fitz.open(path) for path in args.paths]
+    if args.synthetic:
+        docs.append(make_resume_pdf(args.synthetic))
+
+    print(
+        f"{'page':>4}  {'full tok':>8}  {'stop tok':>8}  {'saved':>5}  "
+        f"{'full s':>6}  {'stop s':>6}"
+    )
+    saved_total = 0
+    pages = 0
+    for doc in docs:
+        for page in doc:
+            messages = page_messages(page)
+            counts, times = [], []
+            for stop in (False, True):
+                start = time.perf_counter()
+                (output,) = generate_batch(
+                    model,
+                    processor,
+                    [messages],
+                    args.max_new_tokens,
+                    stop_at_json_end=stop,
+                )
+                times.append(time.perf_counter() - start)
+                counts.append(len(processor.tokenizer(output).input_ids))
+            pages += 1
+            saved_total += counts[0] - counts[1]
+            print(
+                f"{pages:>4}  {counts[0]:>8}  {counts[1]:>8}  "
+                f"{counts[0] - counts[1]:>5}  {times[0]:>6.2f}  {times[1]:>6.2f}"
+            )
+        doc.close()
+
+    if pages:
+        print(f"\nMean decode tokens saved per page: {saved_total / pages:.1f}")
+
+
+if __name__ == "__main__":
+    main()
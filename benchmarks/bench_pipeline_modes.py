@@ -0,0 +1,85 @@
+"""
+Compare end-to-end process_resume latency in direct and agents pipeline mode.
+
+Both modes run the same stages (extraction, summary, annotation) on the real
+model; agents mode additionally asks the AutoGen routing model (Ollama,
+see get_autogen_config) which tool to call before every stage. The
+extraction and page caches are disabled so every run does the full work.
+
+Requires the model at Settings.MODEL_PATH and, for agents mode, a reachable
+Ollama server at OLLAMA_BASE_URL.
+
+Usage:
+    python benchmarks/bench_pipeline_modes.py [PDF/PNG ...] [--synthetic 2]
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from common import make_resume_pdf, require_model
+
+from app.models.core import PipelineMode
+from app.services.ocr_service import process_resume
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("paths", nargs="*")
+    parser.add_argument("--synthetic", type=int, default=2)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-annotate", action="store_true")
+    parser.add_argument("--no-summary", action="store_true")
+    args = parser.parse_args()
+    require_model()
+
+    # Measure the pipeline itself, not cache hits (settings are read lazily)
+    os.environ["EXTRACTION_CACHE_MODE"] = "false"
+    os.environ["PAGE_CACHE_MODE"] = "false"
+
+    work_dir = tempfile.mkdtemp(prefix="bench_pipeline_")
+    paths = list(args.paths)
+    if args.synthetic:
+        doc = make_resume_pdf(args.synthetic)
+        paths.append(os.path.join(work_dir, "synthetic_resume.pdf"))
+        doc.save(paths[-1])
+        doc.close()
+
+    print(f"{'file':<28}  {'direct s':>8}  {'agents s':>8}  {'saved s':>7}")
+    totals = {mode: 0.0 for mode in PipelineMode}
+    try:
+        for path in paths:
+            best = {}
+            for mode in PipelineMode:
+                times = []
+                for _ in range(args.repeat):
+                    start = time.perf_counter()
+                    process_resume(
+                        path,
+                        use_annotator=not args.no_annotate,
+                        generate_summary=not args.no_summary,
+                        pipeline_mode=mode,
+                    )
+                    times.append(time.perf_counter() - start)
+                best[mode] = min(times)
+                totals[mode] += best[mode]
+            direct = best[PipelineMode.DIRECT]
+            agents = best[PipelineMode.AGENTS]
+            print(
+                f"{os.path.basename(path)[:28]:<28}  {direct:>8.2f}  {agents:>8.2f}  "
+                f"{agents - direct:>7.2f}"
+            )
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    if paths:
+        print(
+            f"\nMean per file: {totals[PipelineMode.DIRECT] / len(paths):.2f} s "
+            f"direct, {totals[PipelineMode.AGENTS] / len(paths):.2f} s agents"
+        )
+
+
+if __name__ == "__main__":
+    main()
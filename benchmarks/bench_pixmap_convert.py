@@ -0,0 +1,51 @@
+"""
+Compare the PNG round trip with the raw-sample pixmap to OpenCV conversion.
+
+The PNG path mirrors what DocumentContext.page_image used to do: encode the
+pixmap to PNG and decode it again with cv2.imdecode. The raw path views the
+pixmap samples as a NumPy array and only reorders the channels.
+
+Usage:
+    python benchmarks/bench_pixmap_convert.py [--zooms 1 2 3] [--repeat 5]
+"""
+
+import argparse
+
+import cv2
+import fitz  # PyMuPDF
+import numpy as np
+from common import make_resume_pdf, time_call
+
+from app.services.rendering import pixmap_to_bgr
+
+
+def png_round_trip(pix: fitz.Pixmap) -> np.ndarray:
+    """Convert a pixmap to BGR through an in-memory PNG."""
+    return cv2.imdecode(np.frombuffer(pix.tobytes("png"), np.uint8), cv2.IMREAD_COLOR)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--zooms", type=float, nargs="+", default=[1.0, 2.0, 3.0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    doc = make_resume_pdf(1)
+    page = doc.load_page(0)
+    print(f"{'zoom':>4}  {'size':>11}  {'png ms':>8}  {'raw ms':>8}  {'speedup':>7}")
+    for zoom in args.zooms:
+        pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=fitz.csRGB)
+        assert np.array_equal(png_round_trip(pix), pixmap_to_bgr(pix))
+
+        png_time = time_call(lambda p=pix: png_round_trip(p), args.repeat)
+        raw_time = time_call(lambda p=pix: pixmap_to_bgr(p), args.repeat)
+        print(
+            f"{zoom:>4.1f}  {f'{pix.width}x{pix.height}':>11}  "
+            f"{png_time * 1000:>8.1f}  {raw_time * 1000:>8.2f}  "
+            f"{png_time / raw_time:>6.0f}x"
+        )
+    doc.close()
+
+
+if __name__ == "__main__":
+    main()
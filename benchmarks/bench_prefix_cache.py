@@ -0,0 +1,79 @@
+"""
+Measure per-page prefill latency with and without the prompt-prefix KV cache.
+
+Every page is run through generate_batch with max_new_tokens=1, so the
+timing is dominated by prefill. The baseline prefills the whole prompt
+(chat template, extraction instructions and page); the cached run reuses the
+key/value states of the shared instruction prefix and only prefills the page
+image or text. The prefix is warmed up once before timing.
+
+Requires the model at Settings.MODEL_PATH (and a GPU for realistic timings).
+
+Usage:
+    python benchmarks/bench_prefix_cache.py [PDF ...] [--synthetic 3] [--repeat 3]
+"""
+
+import argparse
+
+import fitz  # PyMuPDF
+from bench_json_early_stop import page_messages
+from common import make_resume_pdf, require_model, time_call
+
+from app.dependencies import get_model_and_processor
+from app.services.inference import generate_batch
+from app.services.prefix_cache import PrefixCache
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("paths", nargs="*")
+    parser.add_argument("--synthetic", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    require_model()
+    model, processor = get_model_and_processor()
+    docs = [fitz.open(path) for path in args.paths]
+    if args.synthetic:
+        docs.append(make_resume_pdf(args.synthetic))
+    prefix_cache = PrefixCache()
+
+    print(f"{'page':>4}  {'full ms':>8}  {'cached ms':>9}  {'speedup':>7}")
+    totals = [0.0, 0.0]
+    pages = 0
+    for doc in docs:
+        for page in doc:
+            messages = [page_messages(page)]
+            # Warm up both paths (and compute the prefix states once)
+            generate_batch(model, processor, messages, 1)
+            generate_batch(model, processor, messages, 1, prefix_cache=prefix_cache)
+
+            full = time_call(
+                lambda m=messages: generate_batch(model, processor, m, 1),
+                args.repeat,
+            )
+            cached = time_call(
+                lambda m=messages: generate_batch(
+                    model, processor, m, 1, prefix_cache=prefix_cache
+                ),
+                args.repeat,
+            )
+            pages += 1
+            totals[0] += full
+            totals[1] += cached
+            print(
+                f"{pages:>4}  {full * 1000:>8.1f}  {cached * 1000:>9.1f}  "
+                f"{full / cached:>6.2f}x"
+            )
+        doc.close()
+
+    if pages:
+        print(
+            f"\nMean prefill per page: {totals[0] / pages * 1000:.1f} ms full, "
+            f"{totals[1] / pages * 1000:.1f} ms with prefix cache"
+        )
+        print(f"Prefix cache: {prefix_cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
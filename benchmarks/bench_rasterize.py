@@ -0,0 +1,73 @@
+"""
+Compare the temp-PNG raster path with the in-memory raster path.
+
+The PNG path mirrors what doc_parser used to do: render the page, save it as
+a PNG into a temporary directory and let qwen_vl_utils open and decode it
+again. The in-memory path hands the pixmap samples to PIL directly.
+
+Usage:
+    python benchmarks/bench_rasterize.py [--pages 1 5 20] [--zoom 2.0]
+"""
+
+import argparse
+import os
+import tempfile
+
+import fitz  # PyMuPDF
+from common import make_resume_pdf, time_call
+from PIL import Image
+
+from app.services.rendering import render_page
+
+
+def png_round_trip(doc, zoom: float, temp_dir: str) -> int:
+    """Render every page through a temporary PNG and return bytes written."""
+    written = 0
+    for page_num in range(len(doc)):
+        pix = doc.load_page(page_num).get_pixmap(matrix=fitz.Matrix(zoom, zoom))
+        path = os.path.join(temp_dir, f"page{page_num}.png")
+        pix.save(path)
+        written += os.path.getsize(path)
+        with Image.open(path) as img:
+            img.convert("RGB").load()
+    return written
+
+
+def in_memory(doc, zoom: float) -> None:
+    """Render every page straight into PIL images."""
+    for page_num in range(len(doc)):
+        render_page(doc.load_page(page_num), zoom=zoom).load()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 5, 20])
+    parser.add_argument("--zoom", type=float, default=2.0)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(
+        f"{'pages':>5}  {'png ms/page':>11}  {'mem ms/page':>11}  "
+        f"{'saved ms/page':>13}  {'tmp bytes/page':>14}"
+    )
+    for pages in args.pages:
+        doc = make_resume_pdf(pages)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            written = png_round_trip(doc, args.zoom, temp_dir)
+            png_time = time_call(
+                lambda d=doc, t=temp_dir: png_round_trip(d, args.zoom, t),
+                args.repeat,
+            )
+        mem_time = time_call(lambda d=doc: in_memory(d, args.zoom), args.repeat)
+        doc.close()
+
+        png_ms = png_time * 1000 / pages
+        mem_ms = mem_time * 1000 / pages
+        print(
+            f"{pages:>5}  {png_ms:>11.1f}  {mem_ms:>11.1f}  "
+            f"{png_ms - mem_ms:>13.1f}  {written // pages:>14,}"
+        )
+
+
+if __name__ == "__main__":
+    main()
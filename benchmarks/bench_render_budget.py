@@ -0,0 +1,83 @@
+"""
+Compare zoom-then-resize rendering with rendering at the target resolution.
+
+The old path rendered every page at 2x and let qwen_vl_utils resize it to a
+fixed 1600x960. The new path derives the render matrix from the page size and
+the VISION_MIN_PIXELS/VISION_MAX_PIXELS budget, so PyMuPDF produces the final
+image directly.
+
+Usage:
+    python benchmarks/bench_render_budget.py [--repeat 3]
+"""
+
+import argparse
+
+import fitz  # PyMuPDF
+from common import time_call
+from qwen_vl_utils import fetch_image
+
+from app.core.settings import get_settings
+from app.services.rendering import PATCH_FACTOR, render_page
+
+PAGE_FORMATS = {
+    "A4": (595, 842),
+    "Letter": (612, 792),
+    "A5": (420, 595),
+    "A4 landscape": (842, 595),
+}
+
+
+def make_page(doc: fitz.Document, width: float, height: float) -> fitz.Page:
+    """Add a page with a few lines of text to the document."""
+    page = doc.new_page(width=width, height=height)
+    for line in range(20):
+        page.insert_text((40, 40 + line * 18), f"Line {line} of resume text")
+    return page
+
+
+def zoom_then_resize(page: fitz.Page):
+    """Render at 2x and resize to the old hard-coded 1600x960."""
+    image = render_page(page, zoom=2.0)
+    return fetch_image({"image": image, "resized_height": 1600, "resized_width": 960})
+
+
+def direct(page: fitz.Page, min_pixels: int, max_pixels: int):
+    """Render at the budgeted size and pass it through the same processor step."""
+    image = render_page(page, zoom=2.0, min_pixels=min_pixels, max_pixels=max_pixels)
+    return fetch_image(
+        {"image": image, "min_pixels": min_pixels, "max_pixels": max_pixels}
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    settings = get_settings()
+    min_pixels, max_pixels = settings.VISION_MIN_PIXELS, settings.VISION_MAX_PIXELS
+
+    print(
+        f"{'format':<13}  {'old ms':>7}  {'new ms':>7}  {'old size':>9}  "
+        f"{'new size':>9}  {'old tokens':>10}  {'new tokens':>10}"
+    )
+    doc = fitz.open()
+    for name, (width, height) in PAGE_FORMATS.items():
+        page = make_page(doc, width, height)
+        old = zoom_then_resize(page)
+        new = direct(page, min_pixels, max_pixels)
+        old_time = time_call(lambda p=page: zoom_then_resize(p), args.repeat)
+        new_time = time_call(
+            lambda p=page: direct(p, min_pixels, max_pixels), args.repeat
+        )
+        tokens = [image.width * image.height // PATCH_FACTOR**2 for image in (old, new)]
+        print(
+            f"{name:<13}  {old_time * 1000:>7.1f}  {new_time * 1000:>7.1f}  "
+            f"{old.width:>4}x{old.height:<4}  {new.width:>4}x{new.height:<4}  "
+            f"{tokens[0]:>10}  {tokens[1]:>10}"
+        )
+    doc.close()
+
+
+if __name__ == "__main__":
+    main()
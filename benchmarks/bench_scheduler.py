@@ -0,0 +1,108 @@
+"""
+Measure throughput and queue latency of the inference scheduler on CPU.
+
+A fake backend stands in for the model: each generate call costs a fixed
+overhead plus a smaller per-sequence cost, which is roughly how batched
+decoding behaves on a GPU. Several simulated API requests submit their pages
+concurrently, and the run is repeated for different batch sizes.
+
+Usage:
+    python benchmarks/bench_scheduler.py [--requests 8] [--pages 3]
+"""
+
+import argparse
+import threading
+import time
+
+import common  # noqa: F401  (puts the repository root on sys.path)
+
+from app.services.scheduler import InferenceScheduler
+
+
+class FakeBackend:
+    """Backend whose latency is fixed_cost + per_item_cost * batch size."""
+
+    def __init__(self, fixed_cost: float, per_item_cost: float):
+        self.fixed_cost = fixed_cost
+        self.per_item_cost = per_item_cost
+
+    def prepare(self, messages_batch):
+        return messages_batch
+
+    def generate(self, messages_batch, max_new_tokens, json_schemas):
+        time.sleep(self.fixed_cost + self.per_item_cost * len(messages_batch))
+        return ["{}" for _ in messages_batch]
+
+
+def run(args, batch_size: int) -> tuple[float, float, float, float]:
+    """Run one load scenario and return wall time, batch and latency stats."""
+    backend = FakeBackend(args.fixed_ms / 1000, args.per_item_ms / 1000)
+    scheduler = InferenceScheduler(
+        backend,
+        max_batch_size=batch_size,
+        max_wait_ms=args.wait_ms,
+        num_workers=args.workers,
+    )
+    latencies: list[float] = []
+    lock = threading.Lock()
+
+    def request() -> None:
+        start = time.perf_counter()
+        futures = [
+            scheduler.submit([{"role": "user", "content": "page"}])
+            for _ in range(args.pages)
+        ]
+        for future in futures:
+            future.result()
+        with lock:
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=request) for _ in range(args.requests)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    scheduler.shutdown()
+
+    latencies.sort()
+    p95 = latencies[int(0.95 * (len(latencies) - 1))]
+    return (
+        elapsed,
+        scheduler.stats.mean_batch_size,
+        scheduler.stats.mean_queue_wait_sec,
+        p95,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=8)
+    parser.add_argument("--pages", type=int, default=3)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--wait-ms", type=float, default=20.0)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--fixed-ms", type=float, default=40.0)
+    parser.add_argument("--per-item-ms", type=float, default=10.0)
+    args = parser.parse_args()
+
+    total_pages = args.requests * args.pages
+    print(
+        f"{args.requests} concurrent requests x {args.pages} pages, "
+        f"fake cost {args.fixed_ms:g} ms + {args.per_item_ms:g} ms/page"
+    )
+    print(
+        f"{'batch':>5}  {'pages/s':>8}  {'mean batch':>10}  "
+        f"{'queue wait ms':>13}  {'p95 request ms':>14}"
+    )
+    for batch_size in args.batch_sizes:
+        elapsed, mean_batch, wait, p95 = run(args, batch_size)
+        print(
+            f"{batch_size:>5}  {total_pages / elapsed:>8.1f}  {mean_batch:>10.2f}  "
+            f"{wait * 1000:>13.1f}  {p95 * 1000:>14.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+import os
+import sys
+import time
+from collections.abc import Callable
+
+import fitz  # PyMuPDF
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+RESUME_LINES = [
+    ("John Doe", 22),
+    ("Senior Software Engineer", 14),
+    ("john.doe@example.com | +1 (234) 567-8901 | New York, NY", 10),
+    ("linkedin.com/in/johndoe", 10),
+    ("", 10),
+    ("WORK EXPERIENCE", 13),
+    ("Software Engineer - Tech Company (2021 - Present)", 11),
+    ("Built data pipelines and REST services in Python and Go.", 10),
+    ("Led the migration of batch jobs to a streaming architecture.", 10),
+    ("Junior Developer - Startup Inc. (2018 - 2021)", 11),
+    ("Maintained the React front end and CI/CD tooling.", 10),
+    ("", 10),
+    ("EDUCATION", 13),
+    ("B.Sc. Computer Science - Test University (2018)", 11),
+    ("", 10),
+    ("SKILLS", 13),
+    ("Python, JavaScript, React, Docker, Kubernetes, PostgreSQL", 10),
+    ("Languages: English, Spanish", 10),
+]
+
+
+def require_model() -> None:
+    """Exit with a message, not a traceback, when the model is not downloaded."""
+    # Imported here because the app package is only importable once ROOT_DIR
+    # is on the path
+    from app.core.settings import get_settings
+
+    model_path = get_settings().MODEL_PATH
+    if not os.path.isdir(model_path):
+        sys.exit(
+            f"Model not found at {model_path}. Download it or point MODEL_PATH "
+            "at a local copy of the weights."
+        )
+
+
+def make_resume_pdf(pages: int) -> fitz.Document:
+    """
+    Build an in-memory born-digital resume PDF with the given page count.
+
+    Args:
+        pages: Number of pages to generate
+
+    Returns:
+        Open PyMuPDF document
+    """
+    doc = fitz.open()
+    for page_num in range(pages):
+        page = doc.new_page(width=595, height=842)
+        y = 60.0
+        for _ in range(3):
+            for text, size in RESUME_LINES:
+                if text:
+                    page.insert_text((50, y), text, fontsize=size)
+                y += size * 1.6
+        page.draw_rect(fitz.Rect(40, 40, 555, 802), color=(0.2, 0.2, 0.6))
+        page.insert_text((270, 820), f"Page {page_num + 1}", fontsize=8)
+    return doc
+
+
+def time_call(func: Callable[[], object], repeat: int = 3) -> float:
+    """
+    Return the best wall-clock time of several calls, in seconds.
+
+    Args:
+        func: Zero-argument callable to time
+        repeat: Number of runs
+
+    Returns:
+        Fastest observed run time
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
@@ -0,0 +1,75 @@
+"""
+Report how often the rule-based contact extractor covers PersonalInfo fields.
+
+For every PDF page the text layer is run through extract_contact_info, and the
+report counts the pages where Email, Phone and LinkedIn were found without the
+model. Pages where both Email and Phone were found get the shortest prompt.
+
+Usage:
+    python benchmarks/report_contact_rules.py [PDF_OR_DIR ...] [--synthetic 5]
+"""
+
+import argparse
+import os
+from collections import Counter
+
+import fitz  # PyMuPDF
+from common import make_resume_pdf
+
+from app.services.processing import extract_contact_info
+from app.services.text_layer import extract_page_text
+
+FIELDS = ["Email", "Phone", "LinkedIn"]
+
+
+def iter_documents(paths: list[str], synthetic: int):
+    """Yield (name, document) pairs for the given PDFs and synthetic resumes."""
+    for path in paths:
+        if os.path.isdir(path):
+            files = sorted(
+                os.path.join(path, name)
+                for name in os.listdir(path)
+                if name.lower().endswith(".pdf")
+            )
+        else:
+            files = [path]
+        for file_path in files:
+            yield os.path.basename(file_path), fitz.open(file_path)
+    if synthetic:
+        yield f"synthetic ({synthetic} pages)", make_resume_pdf(synthetic)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("paths", nargs="*", default=["storage/uploads"])
+    parser.add_argument("--synthetic", type=int, default=5)
+    args = parser.parse_args()
+
+    paths = [path for path in args.paths if os.path.exists(path)]
+    totals: Counter = Counter()
+
+    print(f"{'document':<32}  {'pages':>5}  " + "  ".join(f"{f:>8}" for f in FIELDS))
+    for name, doc in iter_documents(paths, args.synthetic):
+        hits: Counter = Counter()
+        with doc:
+            for page in doc:
+                contact = extract_contact_info(extract_page_text(page))
+                hits.update(contact.keys())
+                hits["pages"] += 1
+                if "Email" in contact and "Phone" in contact:
+                    hits["complete"] += 1
+        totals.update(hits)
+        print(
+            f"{name[:32]:<32}  {hits['pages']:>5}  "
+            + "  ".join(f"{hits[f]:>8}" for f in FIELDS)
+        )
+
+    pages = totals["pages"] or 1
+    print()
+    for field in FIELDS:
+        print(f"{field:<9} found on {totals[field] / pages:6.1%} of pages")
+    print(f"Email and Phone both found on {totals['complete'] / pages:6.1%} of pages")
+
+
+if __name__ == "__main__":
+    main()
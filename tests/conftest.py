@@ -7,9 +7,13 @@ import numpy as np
 import pytest
 import torch
 
+from app.services.ocr_pool import get_reader_pool
+
 # Set test environment variables
 os.environ["DEBUG"] = "True"
 os.environ["USE_GPU"] = "False"  # Disable GPU for tests
+os.environ["EXTRACTION_CACHE_MODE"] = "False"  # Never serve results across tests
+os.environ["PAGE_CACHE_MODE"] = "False"
 
 
 @pytest.fixture
@@ -157,7 +161,8 @@ def patch_model_loading():
 @pytest.fixture
 def mock_easyocr():
     """Mock the easyOCR Reader."""
-    with patch("app.services.annotator.easyocr") as mock:
+    get_reader_pool().clear()
+    with patch("app.services.ocr_pool.easyocr") as mock:
         mock_reader = MagicMock()
         # Mock the readtext method to return some text boxes
         mock_reader.readtext.return_value = [
@@ -169,12 +174,14 @@ def mock_easyocr():
         ]
         mock.Reader.return_value = mock_reader
         yield mock
+    # Readers built by the mock must not be lent to other tests
+    get_reader_pool().clear()
 
 
 @pytest.fixture
 def mock_fitz():
     """Mock the PyMuPDF (fitz) module."""
-    with patch("app.services.annotator.fitz") as mock:
+    with patch("app.services.document.fitz") as mock:
         # Create mock document and page
         mock_doc = MagicMock()
         mock_page = MagicMock()
@@ -184,7 +191,10 @@ def mock_fitz():
         mock.open.return_value = mock_doc
         mock_doc.load_page.return_value = mock_page
         mock_page.get_pixmap.return_value = mock_pixmap
-        mock_pixmap.tobytes.return_value = b"test image data"
+        # Raw RGB samples of an 800x600 page
+        mock_pixmap.width, mock_pixmap.height, mock_pixmap.n = 800, 600, 3
+        mock_pixmap.stride = 800 * 3
+        mock_pixmap.samples_mv = bytes(600 * 800 * 3)
 
         # Set up Matrix class
         mock.Matrix.return_value = MagicMock()
@@ -199,7 +209,10 @@ def mock_fitz():
 @pytest.fixture
 def mock_cv2():
     """Mock the OpenCV (cv2) module."""
-    with patch("app.services.annotator.cv2") as mock:
+    with (
+        patch("app.services.annotator.cv2") as mock,
+        patch("app.services.document.cv2", mock),
+    ):
         # Mock image reading and writing
         mock.imread.return_value = np.zeros((600, 800, 3), dtype=np.uint8)
         mock.imdecode.return_value = np.zeros((600, 800, 3), dtype=np.uint8)
@@ -1,12 +1,17 @@
+import io
 import json
 import os
+import time
+import zipfile
 from unittest.mock import MagicMock, patch
 
 import pytest
 from fastapi.testclient import TestClient
 
+from app import config
 from app.core.settings import get_settings
 from app.main import app
+from app.services.jobs import JobQueueFullError
 
 # Add this patch before creating the test client
 with patch("app.dependencies.get_model_and_processor") as mock_get_model:
@@ -131,6 +136,10 @@ class TestUploadAndProcessEndpoint:
         args, kwargs = mock_process_resume.call_args
         assert kwargs["use_annotator"]
         assert kwargs["generate_summary"]
+        # Saved where /resumes/process looks files up by ID
+        assert kwargs["file_path"] == os.path.join(
+            config.UPLOADS_DIR, "test_resume.pdf"
+        )
 
     def test_upload_and_process_no_annotation(self, test_file, mock_process_resume):
         """Test uploading and processing without annotation."""
@@ -283,3 +292,196 @@ class TestCleanupEndpoint:
         data = response.json()
         assert data["status"] == "partial_success" or data["status"] == "failure"
         assert len(data["data"]["errors"]) > 0
+
+
+class TestJobsEndpoint:
+    """Test the background job endpoints."""
+
+    @patch("app.api.routers.resumes.os.path.exists")
+    def test_submit_and_poll(self, mock_exists, mock_process_resume):
+        """Test a queued job can be polled until it has its result."""
+        mock_exists.return_value = True
+
+        response = client.post("/api/jobs", params={"file_id": "test_resume"})
+
+        assert response.status_code == 202
+        job = response.json()["data"]
+        assert job["status"] in ("queued", "running", "completed")
+
+        for _ in range(50):
+            response = client.get(f"/api/jobs/{job['job_id']}")
+            data = response.json()["data"]
+            if data["status"] == "completed":
+                break
+            time.sleep(0.1)
+
+        assert response.status_code == 200
+        assert data["status"] == "completed"
+        assert data["result"]["file_id"] == "test_resume"
+
+    def test_unknown_job(self):
+        """Test polling an unknown job ID."""
+        response = client.get("/api/jobs/unknown")
+
+        assert response.status_code == 404
+        assert "Job not found" in response.json()["detail"]
+
+    @patch("app.api.routers.resumes.get_job_manager")
+    @patch("app.api.routers.resumes.os.path.exists")
+    def test_queue_full(self, mock_exists, mock_get_manager):
+        """Test submissions are rejected with 503 while the queue is full."""
+        mock_exists.return_value = True
+        mock_get_manager.return_value.submit.side_effect = JobQueueFullError("full")
+
+        response = client.post("/api/jobs", params={"file_id": "test_resume"})
+
+        assert response.status_code == 503
+
+
+class TestBatchEndpoint:
+    """Test the batch upload endpoints."""
+
+    def test_batch_upload(self, test_file, mock_process_resume):
+        """Test every file gets one result line and unsupported ones are skipped."""
+        with open(test_file, "rb") as f:
+            content = f.read()
+
+        response = client.post(
+            "/api/resumes/batch",
+            files=[
+                ("files", ("test_resume.pdf", content, "application/pdf")),
+                ("files", ("notes.txt", b"text", "text/plain")),
+            ],
+        )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert {line["file_id"]: line["status"] for line in lines} == {
+            "test_resume": "completed",
+            "notes": "skipped",
+        }
+
+    def test_zip_upload(self, mock_process_resume):
+        """Test the resumes of a ZIP body are processed one by one."""
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, "w") as zf:
+            zf.writestr("batch/first.pdf", b"%PDF-1.4")
+            zf.writestr("batch/second.png", b"png")
+            zf.writestr("__MACOSX/batch/._first.pdf", b"")
+
+        response = client.post(
+            "/api/resumes/batch/zip",
+            content=archive.getvalue(),
+            headers={"Content-Type": "application/zip"},
+        )
+
+        assert response.status_code == 200
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert sorted(line["file_id"] for line in lines) == ["first", "second"]
+        assert mock_process_resume.call_count == 2
+
+    def test_invalid_zip(self):
+        """Test a body that is not a ZIP archive is rejected."""
+        response = client.post(
+            "/api/resumes/batch/zip",
+            content=b"not a zip",
+            headers={"Content-Type": "application/zip"},
+        )
+
+        assert response.status_code == 400
+        assert "Invalid ZIP archive" in response.json()["detail"]
+
+    def test_batch_upload_duplicate_ids(self, mock_process_resume):
+        """Test a second file with the same file ID is skipped, not overwritten."""
+        response = client.post(
+            "/api/resumes/batch",
+            files=[
+                ("files", ("cv.pdf", b"%PDF-1.4", "application/pdf")),
+                ("files", ("../cv.png", b"png", "image/png")),
+            ],
+        )
+
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert sorted(line["status"] for line in lines) == ["completed", "skipped"]
+        assert mock_process_resume.call_count == 1
+        file_path = mock_process_resume.call_args.kwargs["file_path"]
+        assert file_path == os.path.join(config.UPLOADS_DIR, "cv.pdf")
+
+    def test_batch_upload_too_large(self, mock_process_resume):
+        """Test a file above MAX_FILE_SIZE is skipped."""
+        settings = get_settings()
+        with patch.object(settings, "MAX_FILE_SIZE", 4):
+            response = client.post(
+                "/api/resumes/batch",
+                files=[("files", ("big.pdf", b"%PDF-1.4", "application/pdf"))],
+            )
+
+        line = json.loads(response.text)
+        assert line["status"] == "skipped"
+        assert "larger than 4 bytes" in line["error"]
+        mock_process_resume.assert_not_called()
+        assert not os.path.exists(os.path.join(config.UPLOADS_DIR, "big.pdf"))
+        assert not any(
+            name.startswith(".upload-") for name in os.listdir(config.UPLOADS_DIR)
+        )
+
+    def test_zip_duplicate_names(self, mock_process_resume):
+        """Test archive members flattened to the same name are processed once."""
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, "w") as zf:
+            zf.writestr("a/cv.pdf", b"%PDF-1.4 first")
+            zf.writestr("b/cv.pdf", b"%PDF-1.4 second")
+            zf.writestr("../../evil.pdf", b"%PDF-1.4")
+
+        response = client.post(
+            "/api/resumes/batch/zip",
+            content=archive.getvalue(),
+            headers={"Content-Type": "application/zip"},
+        )
+
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert sorted((line["file_id"], line["status"]) for line in lines) == [
+            ("cv", "completed"),
+            ("cv", "skipped"),
+            ("evil", "completed"),
+        ]
+        assert sorted(
+            call.kwargs["file_path"] for call in mock_process_resume.call_args_list
+        ) == [
+            os.path.join(config.UPLOADS_DIR, "cv.pdf"),
+            os.path.join(config.UPLOADS_DIR, "evil.pdf"),
+        ]
+        with open(os.path.join(config.UPLOADS_DIR, "cv.pdf"), "rb") as f:
+            assert f.read() == b"%PDF-1.4 first"
+
+    def test_zip_too_many_entries(self):
+        """Test an archive with more than ZIP_MAX_ENTRIES entries is rejected."""
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, "w") as zf:
+            for i in range(3):
+                zf.writestr(f"cv{i}.pdf", b"%PDF-1.4")
+
+        with patch.object(get_settings(), "ZIP_MAX_ENTRIES", 2):
+            response = client.post(
+                "/api/resumes/batch/zip",
+                content=archive.getvalue(),
+                headers={"Content-Type": "application/zip"},
+            )
+
+        assert response.status_code == 400
+
+    def test_zip_too_large_unpacked(self):
+        """Test an archive whose resumes unpack beyond ZIP_MAX_SIZE is rejected."""
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr("cv.pdf", b"0" * 10_000)
+
+        with patch.object(get_settings(), "ZIP_MAX_SIZE", 5_000):
+            response = client.post(
+                "/api/resumes/batch/zip",
+                content=archive.getvalue(),
+                headers={"Content-Type": "application/zip"},
+            )
+
+        assert response.status_code == 413
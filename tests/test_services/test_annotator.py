@@ -1,16 +1,21 @@
 import json
+from difflib import SequenceMatcher
 from unittest.mock import MagicMock, mock_open, patch
 
+import fitz
 import numpy as np
 import pytest
 
 from app.services.annotator import ResumeAnnotator, annotate_resume
+from app.services.document import document_scope
+from app.services.ocr_pool import get_reader_pool
 
 
 @pytest.fixture
 def mock_easyocr():
     """Mock the easyOCR Reader."""
-    with patch("app.services.annotator.easyocr") as mock:
+    get_reader_pool().clear()
+    with patch("app.services.ocr_pool.easyocr") as mock:
         mock_reader = MagicMock()
         # Mock the readtext method to return some text boxes
         mock_reader.readtext.return_value = [
@@ -22,12 +27,14 @@ def mock_easyocr():
         ]
         mock.Reader.return_value = mock_reader
         yield mock
+    # Readers built by the mock must not be lent to other tests
+    get_reader_pool().clear()
 
 
 @pytest.fixture
 def mock_fitz():
     """Mock the PyMuPDF (fitz) module."""
-    with patch("app.services.annotator.fitz") as mock:
+    with patch("app.services.document.fitz") as mock:
         # Create mock document and page
         mock_doc = MagicMock()
         mock_page = MagicMock()
@@ -37,7 +44,10 @@ def mock_fitz():
         mock.open.return_value = mock_doc
         mock_doc.load_page.return_value = mock_page
         mock_page.get_pixmap.return_value = mock_pixmap
-        mock_pixmap.tobytes.return_value = b"test image data"
+        # Raw RGB samples of an 800x600 page
+        mock_pixmap.width, mock_pixmap.height, mock_pixmap.n = 800, 600, 3
+        mock_pixmap.stride = 800 * 3
+        mock_pixmap.samples_mv = bytes(600 * 800 * 3)
 
         # Set up Matrix class
         mock.Matrix.return_value = MagicMock()
@@ -48,7 +58,10 @@ def mock_fitz():
 @pytest.fixture
 def mock_cv2():
     """Mock the OpenCV (cv2) module."""
-    with patch("app.services.annotator.cv2") as mock:
+    with (
+        patch("app.services.annotator.cv2") as mock,
+        patch("app.services.document.cv2", mock),
+    ):
         # Mock image reading and writing
         mock.imread.return_value = np.zeros((600, 800, 3), dtype=np.uint8)
         mock.imdecode.return_value = np.zeros((600, 800, 3), dtype=np.uint8)
@@ -130,7 +143,8 @@ class TestResumeAnnotator:
 
             assert annotator.is_pdf
             assert mock_fitz.open.called
-            assert annotator.reader is not None
+            # OCR readers are borrowed from the pool when a page is read
+            mock_easyocr.Reader.assert_not_called()
 
     def test_init_png(self, mock_easyocr, mock_cv2, sample_json_data):
         """Test initializing with a PNG file."""
@@ -140,22 +154,57 @@ class TestResumeAnnotator:
             annotator = ResumeAnnotator("test.png", sample_json_data)
 
             assert not annotator.is_pdf
-            assert mock_cv2.imread.called
-            assert annotator.reader is not None
-
-    def test_load_images_pdf(self, mock_easyocr, mock_fitz, mock_cv2, sample_json_data):
-        """Test loading images from a PDF file."""
-        with patch("app.services.annotator.os.path.splitext") as mock_splitext:
+            assert annotator.page_count == 1
+            # Pages are rendered when they are annotated
+            assert not mock_cv2.imread.called
+            # OCR readers are borrowed from the pool when a page is read
+            mock_easyocr.Reader.assert_not_called()
+
+    def test_pages_rendered_lazily(
+        self, mock_easyocr, mock_fitz, mock_cv2, sample_json_data
+    ):
+        """Test PDF pages are rendered one at a time and released after use."""
+        with (
+            patch("app.services.annotator.os.path.splitext") as mock_splitext,
+            document_scope("test.pdf") as document,
+        ):
             mock_splitext.return_value = ("test", ".pdf")
 
             # Configure mock document to have 2 pages
-            mock_doc = MagicMock()
-            mock_doc.__iter__.return_value = [MagicMock(), MagicMock()]
-            mock_fitz.open.return_value = mock_doc
+            mock_doc = mock_fitz.open.return_value
+            mock_doc.__len__.return_value = 2
 
             annotator = ResumeAnnotator("test.pdf", sample_json_data)
 
-            assert len(annotator.images) == 2
+            assert annotator.page_count == 2
+            assert not mock_doc.load_page.called
+
+            with annotator.page(1) as image:
+                assert image.shape == (600, 800, 3)
+                assert list(document._rasters) == [(1, 2.0)]
+            mock_doc.load_page.assert_called_once_with(1)
+            assert document._rasters == {}
+
+    def test_locate_text_from_text_layer(
+        self, mock_easyocr, tmp_path, sample_json_data
+    ):
+        """Test born-digital PDF pages are located without OCR."""
+        pdf_path = str(tmp_path / "resume.pdf")
+        doc = fitz.open()
+        page = doc.new_page(width=595, height=842)
+        page.insert_text((72, 72), "John Doe", fontsize=20)
+        page.insert_text((72, 100), "john.doe@example.com | +1234567890")
+        page.insert_textbox(fitz.Rect(72, 120, 520, 400), "Built services. " * 20)
+        doc.save(pdf_path)
+        doc.close()
+
+        annotator = ResumeAnnotator(pdf_path, sample_json_data)
+        with annotator.page(0) as image:
+            locs = annotator.locate_text(image, 0)
+
+        assert "john doe" in locs
+        assert "john.doe@example.com" in locs
+        mock_easyocr.Reader.assert_not_called()
 
     def test_find_text_locations(self, mock_easyocr, mock_cv2, sample_json_data):
         """Test finding text locations in an image."""
@@ -175,6 +224,19 @@ class TestResumeAnnotator:
             assert "john.doe@example.com" in locations
             assert len(locations) > 5  # Should include words and full phrases
 
+    def test_reader_shared_between_annotators(
+        self, mock_easyocr, mock_cv2, sample_json_data
+    ):
+        """Test annotators reuse the pooled OCR reader instead of loading one."""
+        test_image = np.zeros((600, 800, 3), dtype=np.uint8)
+
+        for _ in range(2):
+            ResumeAnnotator("test.png", sample_json_data).find_text_locations(
+                test_image
+            )
+
+        mock_easyocr.Reader.assert_called_once_with(["en"], gpu=False)
+
     def test_find_tfidf_match(self, mock_easyocr, mock_cv2, sample_json_data):
         """Test finding text matches using TF-IDF similarity."""
         with patch("app.services.annotator.os.path.splitext") as mock_splitext:
@@ -225,6 +287,104 @@ class TestResumeAnnotator:
             assert "+1" in match
             assert score > 0.7
 
+    def test_sequence_bounds(self, mock_easyocr, mock_cv2, sample_json_data):
+        """Test the batched bounds keep the Email and Phone boosts."""
+        with patch("app.services.annotator.os.path.splitext") as mock_splitext:
+            mock_splitext.return_value = ("test", ".png")
+
+            annotator = ResumeAnnotator("test.png", sample_json_data)
+            candidates = ["jd@mail.org", "software engineer", "tel 234 567 890"]
+
+            emails = annotator._sequence_bounds(
+                ["john.doe@example.com"], candidates, "Email"
+            )
+            phones = annotator._sequence_bounds(
+                ["+1-234-567-890", "+49"], candidates, "Phone"
+            )
+
+            assert emails.shape == (1, 3)
+            # Any two addresses score at least 0.8
+            assert emails[0, 0] == pytest.approx(0.8)
+            assert emails[0, 1] < 0.7
+            assert phones.shape == (2, 3)
+            # Similar digits boost the score to 0.75 + 0.2 * digit similarity
+            assert phones[0, 2] > 0.9
+            assert phones[1, 2] < 0.7
+
+    def test_sequence_bounds_above_difflib(
+        self, mock_easyocr, mock_cv2, sample_json_data
+    ):
+        """Test the bounds never fall below the scores they filter for."""
+        with patch("app.services.annotator.os.path.splitext") as mock_splitext:
+            mock_splitext.return_value = ("test", ".png")
+
+            annotator = ResumeAnnotator("test.png", sample_json_data)
+            targets = ["berlin remote", "+1 234 567 8901", "jd@mail.org"]
+            candidates = ["berlin software", "tel 234 567 890", "john@doe.com"]
+
+            for field_type in ["Location", "Phone", "Email"]:
+                bounds = annotator._sequence_bounds(targets, candidates, field_type)
+                for i, target in enumerate(targets):
+                    t = annotator._preprocess_field(target, field_type)
+                    for j, cand in enumerate(candidates):
+                        c = annotator._preprocess_field(cand, field_type)
+                        ratio = annotator._boost_similarity(
+                            t, c, SequenceMatcher(None, t, c).ratio(), field_type
+                        )
+                        assert bounds[i, j] >= ratio - 1e-9
+
+    def test_match_fields_uses_difflib_scores(
+        self, mock_easyocr, mock_cv2, sample_json_data
+    ):
+        """Test a candidate only the looser bound would pass is not matched."""
+        with patch("app.services.annotator.os.path.splitext") as mock_splitext:
+            mock_splitext.return_value = ("test", ".png")
+
+            annotator = ResumeAnnotator("test.png", sample_json_data)
+            locs = {"berlin software": (0.1, 0.1, 0.2, 0.2)}
+
+            # The bound is 10/14, but difflib scores the pair 0.57
+            bounds = annotator._sequence_bounds(
+                ["berlin remote"], list(locs), "Location"
+            )
+            assert bounds[0, 0] >= 0.7
+            assert annotator._match_fields(locs, {"Location": "Berlin Remote"}) == {}
+            _, _, score = annotator.find_sequence_match(
+                "Berlin Remote", locs, "Location"
+            )
+            assert score == pytest.approx(
+                SequenceMatcher(None, "berlin remote", "berlin software").ratio()
+            )
+
+    def test_match_fields_several_of_a_type(
+        self, mock_easyocr, mock_cv2, sample_json_data
+    ):
+        """Test every field of a type gets its own best candidate."""
+        with patch("app.services.annotator.os.path.splitext") as mock_splitext:
+            mock_splitext.return_value = ("test", ".png")
+
+            annotator = ResumeAnnotator("test.png", sample_json_data)
+            text_locations = {
+                "senior software engineer": (0.1, 0.1, 0.2, 0.2),
+                "junior developer": (0.3, 0.3, 0.4, 0.4),
+                "new york, ny": (0.5, 0.5, 0.6, 0.6),
+            }
+            flat_json = {
+                "JobTitle": "Senior Software Engineer II",
+                "Location": "New York NY",
+                "JobTitle_2": "Junior Developr",
+                "Summary": "Not annotated",
+            }
+
+            coords = annotator._match_fields(text_locations, flat_json)
+
+            assert coords == {
+                "JobTitle": (0.1, 0.1, 0.2, 0.2),
+                "Location": (0.5, 0.5, 0.6, 0.6),
+                "JobTitle_2": (0.3, 0.3, 0.4, 0.4),
+            }
+            assert list(coords) == ["JobTitle", "Location", "JobTitle_2"]
+
     def test_match_fields(self, mock_easyocr, mock_cv2, sample_json_data):
         """Test matching fields to text locations."""
         with patch("app.services.annotator.os.path.splitext") as mock_splitext:
@@ -303,25 +463,23 @@ class TestResumeAnnotator:
 
             annotator = ResumeAnnotator("test.png", sample_json_data)
 
-            # Mock process_document
-            annotator.process_document = MagicMock(
-                return_value=[
-                    {
-                        "page": 0,
-                        "coordinates": {
-                            "Name": (0.1, 0.1, 0.2, 0.2),
-                            "Email": (0.3, 0.3, 0.4, 0.4),
-                        },
-                        "dimensions": (800, 600),
-                    }
-                ]
+            # Mock _process_page
+            annotator._process_page = MagicMock(
+                return_value={
+                    "page": 0,
+                    "coordinates": {
+                        "Name": (0.1, 0.1, 0.2, 0.2),
+                        "Email": (0.3, 0.3, 0.4, 0.4),
+                    },
+                    "dimensions": (800, 600),
+                }
             )
 
             # Call annotate_document
-            annotated_images = annotator.annotate_document("/tmp/output")
+            output_paths = annotator.annotate_document("/tmp/output")
 
             # Check results
-            assert len(annotated_images) == 1
+            assert output_paths == ["/tmp/output/test_annotated.png"]
             assert mock_makedirs.called
             assert mock_cv2.imwrite.called
 
@@ -394,13 +552,16 @@ class TestAnnotateResume:
         # Mock ResumeAnnotator
         with patch("app.services.annotator.ResumeAnnotator") as MockAnnotator:
             mock_annotator = MagicMock()
+            mock_annotator.page_count = 2
+            mock_annotator.page.return_value.__enter__.return_value = np.zeros(
+                (600, 800, 3), dtype=np.uint8
+            )
             MockAnnotator.return_value = mock_annotator
 
             # Call annotate_resume
             annotate_resume("test.pdf", "test.json", "/tmp/output")
 
-            # Check if fitz.open was called
-            assert mock_fitz.open.called
-
-            # For multi-page PDFs, we should annotate each page
-            assert mock_annotator.annotate_page.call_count > 0
+            # Only the pages with data are rendered, by the annotator
+            assert not mock_fitz.open.called
+            mock_annotator.page.assert_called_once_with(0)
+            assert mock_annotator.annotate_page.call_count == 1
@@ -0,0 +1,123 @@
+import json
+
+import pytest
+
+from app.services.bulk import (
+    Checkpoint,
+    ResultWriter,
+    discover_inputs,
+    hash_inputs,
+    process_inputs,
+    read_manifest,
+    shard_inputs,
+)
+
+
+@pytest.fixture
+def resume_dir(tmp_path):
+    """Create a folder tree with resumes and an unrelated file."""
+    (tmp_path / "b").mkdir()
+    (tmp_path / "a.pdf").write_bytes(b"%PDF-a")
+    (tmp_path / "b" / "c.png").write_bytes(b"png-c")
+    (tmp_path / "b" / "copy.pdf").write_bytes(b"%PDF-a")
+    (tmp_path / "notes.txt").write_text("not a resume")
+    return tmp_path
+
+
+class TestInputs:
+    """Test the discover_inputs, read_manifest and hash_inputs functions."""
+
+    def test_discover_directory(self, resume_dir):
+        """Test directories are walked for supported files only."""
+        paths = discover_inputs([str(resume_dir)])
+
+        assert [p[len(str(resume_dir)) + 1 :] for p in paths] == [
+            "a.pdf",
+            "b/c.png",
+            "b/copy.pdf",
+        ]
+
+    def test_manifest(self, resume_dir):
+        """Test manifest paths are resolved against the manifest's folder."""
+        manifest = resume_dir / "manifest.txt"
+        manifest.write_text("# backfill\na.pdf\n\nb/c.png\n")
+
+        assert read_manifest(str(manifest)) == [
+            str(resume_dir / "a.pdf"),
+            str(resume_dir / "b" / "c.png"),
+        ]
+
+    def test_checkpointed_and_duplicates_skipped(self, resume_dir):
+        """Test finished files and identical copies are not run again."""
+        checkpoint = Checkpoint(str(resume_dir / "run.checkpoint"))
+        paths = discover_inputs([str(resume_dir)])
+        first, _ = hash_inputs(paths, checkpoint)
+        checkpoint.add(first[0][1])
+
+        inputs, skipped = hash_inputs(paths, checkpoint)
+
+        assert [path for path, _ in inputs] == [str(resume_dir / "b" / "c.png")]
+        assert skipped == 2
+
+    def test_shards_stable(self, resume_dir):
+        """Test a file stays in its shard whatever else is in the input."""
+        inputs, _ = hash_inputs(
+            discover_inputs([str(resume_dir)]), Checkpoint(str(resume_dir / "x"))
+        )
+
+        shards = shard_inputs(inputs, 3)
+        alone = shard_inputs(inputs[:1], 3)
+
+        assert sorted(sum(shards, [])) == sorted(inputs)
+        assert [inputs[0] in shard for shard in shards] == [
+            inputs[0] in shard for shard in alone
+        ]
+
+
+class TestBulkRun:
+    """Test the process_inputs function and ResultWriter class."""
+
+    def test_resume_after_interruption(self, resume_dir):
+        """Test a second run only processes what the first did not finish."""
+        output = resume_dir / "results.jsonl"
+        paths = discover_inputs([str(resume_dir)])
+        calls = []
+
+        def _process(path):
+            calls.append(path)
+            if path.endswith("c.png"):
+                raise ValueError("corrupt file")
+            return {"file_id": "a", "pages": [{}, {}]}
+
+        for _ in range(2):
+            checkpoint = Checkpoint(f"{output}.checkpoint")
+            inputs, _ = hash_inputs(paths, checkpoint)
+            writer = ResultWriter(str(output), checkpoint)
+            for record in process_inputs(inputs, _process, concurrency=2):
+                writer.write(record)
+            writer.close()
+
+        records = [json.loads(line) for line in output.read_text().splitlines()]
+        # a.pdf completes once; the failing file is retried by the second run
+        assert sorted((r["path"][-5:], r["status"], r["pages"]) for r in records) == [
+            ("a.pdf", "completed", 2),
+            ("c.png", "failed", 0),
+            ("c.png", "failed", 0),
+        ]
+        assert len(calls) == 3
+
+    def test_throughput(self, resume_dir):
+        """Test pages and resumes are counted for the throughput report."""
+        writer = ResultWriter(
+            str(resume_dir / "results.jsonl"),
+            Checkpoint(str(resume_dir / "results.jsonl.checkpoint")),
+        )
+        writer.write({"sha256": "ab", "status": "completed", "pages": 3})
+        writer.write({"sha256": "cd", "status": "failed", "pages": 0})
+        writer.close()
+
+        assert writer.meter.resumes == 2
+        assert writer.meter.pages == 3
+        assert writer.failed == 1
+        assert writer.meter.pages_per_sec > 0
+        assert Checkpoint(str(resume_dir / "results.jsonl.checkpoint")).done == {"ab"}
@@ -0,0 +1,90 @@
+import os
+
+import pytest
+
+from app.services.cache import ExtractionCache, file_sha256, make_cache_key
+
+
+@pytest.fixture
+def cache(tmp_path):
+    """Create an empty cache in a temporary directory."""
+    return ExtractionCache(str(tmp_path / "cache"), max_bytes=10_000)
+
+
+class TestCacheKey:
+    """Test file_sha256 and make_cache_key."""
+
+    def test_same_bytes_same_hash(self, tmp_path):
+        """Test the hash depends only on the file contents."""
+        first = tmp_path / "a.pdf"
+        second = tmp_path / "b.pdf"
+        first.write_bytes(b"%PDF-1.5 resume")
+        second.write_bytes(b"%PDF-1.5 resume")
+
+        assert file_sha256(str(first)) == file_sha256(str(second))
+
+    def test_options_change_key(self):
+        """Test processing options are part of the key."""
+        base = make_cache_key("abc", model="m", options={"annotate": True})
+
+        assert base == make_cache_key("abc", model="m", options={"annotate": True})
+        assert base != make_cache_key("abc", model="m", options={"annotate": False})
+        assert base != make_cache_key("abc", model="other", options={"annotate": True})
+
+
+class TestExtractionCache:
+    """Test the ExtractionCache class."""
+
+    def test_miss_then_hit(self, cache):
+        """Test a stored value is returned and counted as a hit."""
+        assert cache.get("key") is None
+
+        cache.put("key", {"pages": [1]})
+
+        assert cache.get("key") == ({"pages": [1]}, {})
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_files_stored(self, cache, tmp_path):
+        """Test files are copied into the entry and returned by name."""
+        image = tmp_path / "page1.png"
+        image.write_bytes(b"png data")
+
+        cache.put("key", {}, {"_page1.png": str(image)})
+        image.unlink()
+        _, files = cache.get("key")
+
+        with open(files["_page1.png"], "rb") as f:
+            assert f.read() == b"png data"
+
+    def test_lru_eviction(self, cache):
+        """Test least recently used entries are evicted over the size limit."""
+        value = {"data": "x" * 3000}
+        cache.put("a", value)
+        cache.put("b", value)
+        cache.put("c", value)
+        cache.get("a")  # "b" is now the least recently used entry
+
+        cache.put("d", value)
+
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.stats()["evictions"] == 1
+        assert cache.stats()["size_bytes"] <= cache.max_bytes
+
+    def test_persists_across_instances(self, cache):
+        """Test entries survive a restart."""
+        cache.put("key", {"pages": []})
+
+        reopened = ExtractionCache(cache.cache_dir, max_bytes=10_000)
+
+        assert reopened.get("key") == ({"pages": []}, {})
+
+    def test_clear(self, cache):
+        """Test clear removes every entry."""
+        cache.put("key", {})
+
+        cache.clear()
+
+        assert cache.get("key") is None
+        assert os.listdir(cache.cache_dir) == []
@@ -0,0 +1,214 @@
+import json
+import string
+
+import pytest
+import torch
+
+from app.config import RESUME_SCHEMA, SUMMARY_SCHEMA
+from app.services.constrained import (
+    JsonSchemaLogitsProcessor,
+    SchemaMatcher,
+    StringStep,
+    omit_schema_fields,
+)
+
+
+class FakeTokenizer:
+    """Tiny vocabulary of single characters plus a few multi-character tokens."""
+
+    def __init__(self):
+        self.vocab = (
+            ["<eos>"]
+            + list(string.printable)
+            + [
+                '{"',
+                '":"',
+                '","',
+                '":{"',
+                '"}',
+                "Personal",
+                "Info",
+                "Name",
+                " John",
+                'a"b',
+            ]
+        )
+        self.all_special_ids = [0]
+
+    def __len__(self):
+        return len(self.vocab)
+
+    def decode(self, ids):
+        return "".join(self.vocab[i] for i in ids)
+
+
+def run_decoding(processor, scores_fn, steps=400):
+    """Greedy decode one sequence through the processor until <eos>."""
+    input_ids = torch.zeros((1, 3), dtype=torch.long)  # prompt
+    tokens = []
+    for step in range(steps):
+        scores = processor(input_ids, scores_fn(step).unsqueeze(0))
+        token_id = int(scores[0].argmax())
+        if token_id == 0:
+            break
+        tokens.append(token_id)
+        input_ids = torch.cat([input_ids, torch.tensor([[token_id]])], dim=1)
+    return tokens
+
+
+@pytest.fixture
+def tokenizer():
+    """Create the fake tokenizer."""
+    return FakeTokenizer()
+
+
+class TestSchemaMatcher:
+    """Test the SchemaMatcher class."""
+
+    def test_accepts_compact_json(self):
+        """Test compact JSON following the schema completes the matcher."""
+        data = {
+            "PersonalInfo": {
+                "Name": "John",
+                "Email": "Not Found",
+                "Phone": "1",
+                "Location": "NY",
+            },
+            "Education": [],
+            "WorkExperience": [
+                {
+                    "JobTitle": "Dev",
+                    "Company": "Co",
+                    "Duration": "2020",
+                    "Responsibilities": "Code {and} tests",
+                }
+            ],
+            "Skills": {"TechnicalSkills": ["Python", "Go"], "Languages": []},
+        }
+        matcher = SchemaMatcher(RESUME_SCHEMA)
+
+        matcher.feed(json.dumps(data, separators=(",", ":")))
+
+        assert matcher.done
+
+    def test_rejects_wrong_key(self):
+        """Test text that leaves the schema is rejected."""
+        matcher = SchemaMatcher(SUMMARY_SCHEMA)
+
+        with pytest.raises(ValueError):
+            matcher.feed('{"Summery"')
+
+    def test_max_items(self):
+        """Test arrays close once maxItems is reached."""
+        schema = {"type": "array", "maxItems": 1, "items": {"type": "string"}}
+        matcher = SchemaMatcher(schema)
+
+        matcher.feed('["a"')
+
+        assert matcher.remaining() == ["]"]
+
+    def test_long_values_kept_whole(self):
+        """Test values of any length and arrays of any size fit the schema."""
+        data = {
+            "PersonalInfo": {
+                "Name": "N" * 1000,
+                "Email": "Not Found",
+                "Phone": "1",
+                "Location": "NY",
+            },
+            "Education": [],
+            "WorkExperience": [],
+            "Skills": {"TechnicalSkills": ["Python"] * 100, "Languages": []},
+        }
+        matcher = SchemaMatcher(RESUME_SCHEMA)
+
+        matcher.feed(json.dumps(data, separators=(",", ":")))
+
+        assert matcher.done
+
+
+class TestOmitSchemaFields:
+    """Test the omit_schema_fields function."""
+
+    def test_nested_fields_removed(self):
+        """Test omitted PersonalInfo fields are removed from a copy."""
+        schema = omit_schema_fields(RESUME_SCHEMA, ["Email", "Phone"])
+
+        personal = schema["properties"]["PersonalInfo"]["properties"]
+        assert list(personal) == ["Name", "Location"]
+        assert "Email" in RESUME_SCHEMA["properties"]["PersonalInfo"]["properties"]
+
+
+class TestJsonSchemaLogitsProcessor:
+    """Test the JsonSchemaLogitsProcessor class."""
+
+    def test_output_always_parses(self, tokenizer):
+        """Test random scores still produce JSON matching the schema."""
+        torch.manual_seed(0)
+        schema = {
+            "type": "object",
+            "properties": {
+                "Name": {"type": "string", "maxLength": 20},
+                "Skills": {
+                    "type": "array",
+                    "maxItems": 3,
+                    "items": {"type": "string", "maxLength": 5},
+                },
+            },
+        }
+        processor = JsonSchemaLogitsProcessor(tokenizer, [schema], [0])
+
+        tokens = run_decoding(processor, lambda step: torch.randn(len(tokenizer)))
+        data = json.loads(tokenizer.decode(tokens))
+
+        assert list(data) == ["Name", "Skills"]
+        assert len(data["Name"]) <= 20
+        assert len(data["Skills"]) <= 3
+
+    def test_structure_forced_with_longest_token(self, tokenizer):
+        """Test fixed text is emitted with as few tokens as possible."""
+        schema = {
+            "type": "object",
+            "properties": {"PersonalInfo": {"type": "object", "properties": {}}},
+        }
+        processor = JsonSchemaLogitsProcessor(tokenizer, [schema], [0])
+
+        tokens = run_decoding(processor, lambda step: torch.zeros(len(tokenizer)))
+
+        assert [tokenizer.vocab[t] for t in tokens] == [
+            '{"',
+            "Personal",
+            "Info",
+            '"',
+            ":",
+            "{",
+            "}",
+            "}",
+        ]
+
+    def test_string_tokens_cannot_break_json(self, tokenizer):
+        """Test tokens containing quotes are masked inside strings."""
+        processor = JsonSchemaLogitsProcessor(tokenizer, [SUMMARY_SCHEMA], [0])
+        input_ids = torch.zeros((1, 3), dtype=torch.long)
+        processor(input_ids, torch.zeros((1, len(tokenizer))))
+        for text in ('{"', "Summary", '":"'):
+            for char in text:
+                token = tokenizer.vocab.index(char)
+                input_ids = torch.cat([input_ids, torch.tensor([[token]])], dim=1)
+                scores = processor(input_ids, torch.zeros((1, len(tokenizer))))
+
+        assert isinstance(processor.matchers[0].step, StringStep)
+        allowed = scores[0] > float("-inf")
+        assert allowed[tokenizer.vocab.index(" John")]
+        assert allowed[tokenizer.vocab.index('"')]
+        assert not allowed[tokenizer.vocab.index('a"b')]
+        assert not allowed[tokenizer.vocab.index("\n")]
+
+    def test_unconstrained_rows(self, tokenizer):
+        """Test sequences without a schema are left untouched."""
+        processor = JsonSchemaLogitsProcessor(tokenizer, [None], [0])
+        scores = torch.randn((1, len(tokenizer)))
+
+        input_ids = torch.zeros((1, 3), dtype=torch.long)
+
+        assert torch.equal(processor(input_ids, scores), scores)
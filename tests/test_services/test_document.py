@@ -0,0 +1,118 @@
+import contextvars
+import threading
+
+import cv2
+import fitz
+import numpy as np
+import pytest
+
+from app.services.document import DocumentContext, document_scope, open_document
+
+
+@pytest.fixture
+def sample_pdf_pages(tmp_path):
+    """Create a real two-page A4 PDF."""
+    pdf_path = tmp_path / "resume.pdf"
+    doc = fitz.open()
+    for page_num in range(2):
+        page = doc.new_page(width=595, height=842)
+        page.insert_text((72, 72), f"John Doe, page {page_num + 1}")
+    doc.save(pdf_path)
+    doc.close()
+    return str(pdf_path)
+
+
+class TestDocumentContext:
+    """Test the DocumentContext class."""
+
+    def test_pdf_pages(self, sample_pdf_pages):
+        """Test page count and sizes come from the open PDF."""
+        with DocumentContext(sample_pdf_pages) as document:
+            assert document.is_pdf
+            assert document.page_count == 2
+            assert document.page_size(1) == (595, 842)
+
+    def test_page_rendered_once(self, sample_pdf_pages):
+        """Test repeated requests for a page image reuse the first render."""
+        with DocumentContext(sample_pdf_pages) as document:
+            first = document.page_image(0)
+            second = document.page_image(0)
+            larger = document.page_image(0, zoom=3.0)
+
+            assert first is second
+            assert first.shape == (1684, 1190, 3)
+            assert larger.shape == (2526, 1785, 3)
+
+    def test_image_file(self, tmp_path):
+        """Test image files are decoded once and count as a single page."""
+        png_path = str(tmp_path / "resume.png")
+        cv2.imwrite(png_path, np.zeros((120, 80, 3), dtype=np.uint8))
+
+        with DocumentContext(png_path) as document:
+            assert document.page_count == 1
+            assert document.page_size(0) == (80, 120)
+            assert document.page_image(0) is document.page_image(0)
+
+    def test_release_page(self, sample_pdf_pages):
+        """Test releasing a page drops its renders and keeps the others."""
+        with DocumentContext(sample_pdf_pages) as document:
+            document.page_image(0)
+            document.page_image(0, zoom=3.0)
+            kept = document.page_image(1)
+
+            document.release_page(0)
+
+            assert list(document._rasters) == [(1, 2.0)]
+            assert document.page_image(1) is kept
+
+    def test_close_releases_pages(self, sample_pdf_pages):
+        """Test closing the document drops the PDF and cached images."""
+        document = DocumentContext(sample_pdf_pages)
+        document.page_image(0)
+
+        document.close()
+
+        assert document._doc is None
+        assert document._rasters == {}
+
+
+class TestOpenDocument:
+    """Test the document_scope and open_document functions."""
+
+    def test_reuses_request_document(self, sample_pdf_pages):
+        """Test stages inside a request scope share its document."""
+        with document_scope(sample_pdf_pages) as document:
+            with open_document(sample_pdf_pages) as shared:
+                assert shared is document
+            # Leaving a stage does not close the request's document
+            assert document.page_count == 2
+
+        assert document._doc is None
+
+    def test_shared_with_worker_threads(self, sample_pdf_pages):
+        """Test threads started with a copy of the context see the document."""
+        seen = []
+
+        def _stage():
+            with open_document(sample_pdf_pages) as document:
+                seen.append(document)
+
+        with document_scope(sample_pdf_pages) as document:
+            thread = threading.Thread(
+                target=contextvars.copy_context().run, args=(_stage,)
+            )
+            thread.start()
+            thread.join()
+
+        assert seen == [document]
+
+    def test_outside_request(self, sample_pdf_pages, tmp_path):
+        """Test other files, or calls outside a request, get their own document."""
+        with (
+            document_scope(str(tmp_path / "other.pdf")) as request_document,
+            open_document(sample_pdf_pages) as document,
+        ):
+            assert document is not request_document
+            assert document.page_count == 2
+
+        assert document._doc is None
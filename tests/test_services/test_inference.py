@@ -0,0 +1,258 @@
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+import torch
+from PIL import Image
+from transformers import BatchFeature
+
+from app.config import SYSTEM_PROMPT
+from app.models.core import ProcessingMetrics
+from app.services.inference import (
+    FirstTokenTimer,
+    JsonObjectStoppingCriteria,
+    JsonScanState,
+    build_page_messages,
+    build_text_messages,
+    generate_batch,
+    hash_messages,
+    omit_prompt_fields,
+)
+from app.services.metrics import metrics_scope
+from app.services.prefix_cache import PrefixCache
+
+
+@pytest.fixture
+def mock_model_and_processor():
+    """Mock a model/processor pair that echoes one output per prompt."""
+    model = MagicMock()
+    model.device = "cpu"
+    processor = MagicMock()
+    processor.apply_chat_template.side_effect = lambda m, **kwargs: "prompt"
+
+    def _process(text, **kwargs):
+        return BatchFeature({"input_ids": torch.ones((len(text), 4), dtype=torch.long)})
+
+    def _generate(input_ids, **kwargs):
+        new_tokens = torch.arange(input_ids.shape[0]).unsqueeze(1) + 10
+        return torch.cat([input_ids, new_tokens], dim=1)
+
+    processor.side_effect = _process
+    processor.batch_decode.side_effect = lambda ids, **kwargs: [
+        f"output-{int(row[0])}" for row in ids
+    ]
+    model.generate.side_effect = _generate
+    return model, processor
+
+
+class TestBuildPageMessages:
+    """Test the build_page_messages function."""
+
+    def test_prompt_then_image(self):
+        """Test the message holds the prompt followed by the image."""
+        messages = build_page_messages("page.png", "Extract data", 1000, 2000)
+
+        content = messages[0]["content"]
+        assert messages[0]["role"] == "user"
+        assert content[0] == {"type": "text", "text": "Extract data"}
+        assert content[1]["type"] == "image"
+        assert content[1]["image"] == "page.png"
+        assert content[1]["min_pixels"] == 1000
+        assert content[1]["max_pixels"] == 2000
+
+
+class TestBuildTextMessages:
+    """Test the build_text_messages function."""
+
+    def test_text_only(self):
+        """Test the message carries the prompt and page text, no image."""
+        messages = build_text_messages("John Doe", "Extract data")
+
+        content = messages[0]["content"]
+        assert [part["type"] for part in content] == ["text", "text"]
+        assert content[0]["text"] == "Extract data"
+        assert content[1]["text"] == "\n\nResume text:\nJohn Doe"
+
+
+class TestOmitPromptFields:
+    """Test the omit_prompt_fields function."""
+
+    def test_fields_removed(self):
+        """Test omitted fields disappear from the list and the template."""
+        prompt = omit_prompt_fields(SYSTEM_PROMPT, ["Email", "Phone"])
+
+        assert "(Email)" not in prompt
+        assert '"Phone":' not in prompt
+        assert "(Name)" in prompt
+        assert '"Location":' in prompt
+
+    def test_template_stays_valid_json(self):
+        """Test the JSON template is still parseable after omitting fields."""
+        prompt = omit_prompt_fields(SYSTEM_PROMPT, ["Email", "Phone"])
+        template = prompt[prompt.index("{") : prompt.rindex("}") + 1]
+
+        assert json.loads(template)["PersonalInfo"] == {
+            "Name": "string",
+            "Location": "string",
+        }
+
+    def test_nothing_to_omit(self):
+        """Test the prompt is unchanged when no fields are omitted."""
+        assert omit_prompt_fields(SYSTEM_PROMPT, []) == SYSTEM_PROMPT
+
+
+class TestHashMessages:
+    """Test the hash_messages function."""
+
+    def test_same_input_same_hash(self):
+        """Test identical page images hash the same."""
+        first = build_page_messages(Image.new("RGB", (28, 28)), "prompt", 0, 10)
+        second = build_page_messages(Image.new("RGB", (28, 28)), "prompt", 0, 10)
+
+        assert hash_messages(first) == hash_messages(second)
+
+    def test_pixels_change_hash(self):
+        """Test a changed page image changes the hash."""
+        blank = build_page_messages(Image.new("RGB", (28, 28)), "prompt", 0, 10)
+        changed = build_page_messages(
+            Image.new("RGB", (28, 28), color="red"), "prompt", 0, 10
+        )
+
+        assert hash_messages(blank) != hash_messages(changed)
+
+    def test_prompt_changes_hash(self):
+        """Test a different prompt changes the hash."""
+        assert hash_messages(build_text_messages("text", "a")) != hash_messages(
+            build_text_messages("text", "b")
+        )
+
+
+class TestGenerateBatch:
+    """Test the generate_batch function."""
+
+    @patch("app.services.inference.process_vision_info")
+    def test_single_generate_call(self, mock_vision, mock_model_and_processor):
+        """Test a batch of pages is generated in one padded call."""
+        mock_vision.return_value = (["img1", "img2", "img3"], None)
+        model, processor = mock_model_and_processor
+        batch = [
+            build_page_messages(f"page{i}.png", "prompt", 1000, 2000) for i in range(3)
+        ]
+
+        outputs = generate_batch(model, processor, batch, max_new_tokens=8)
+
+        assert outputs == ["output-10", "output-11", "output-12"]
+        assert model.generate.call_count == 1
+        assert model.generate.call_args.kwargs["max_new_tokens"] == 8
+        call_kwargs = processor.call_args.kwargs
+        assert call_kwargs["text"] == ["prompt"] * 3
+        assert call_kwargs["images"] == ["img1", "img2", "img3"]
+        assert call_kwargs["padding_side"] == "left"
+
+    @patch("app.services.inference.process_vision_info")
+    def test_json_stopping_criteria(self, mock_vision, mock_model_and_processor):
+        """Test the JSON stopping criterion is passed unless disabled."""
+        mock_vision.return_value = ([], None)
+        model, processor = mock_model_and_processor
+        batch = [build_text_messages("text", "prompt")]
+
+        generate_batch(model, processor, batch)
+        criteria = model.generate.call_args.kwargs["stopping_criteria"]
+        generate_batch(model, processor, batch, stop_at_json_end=False)
+
+        assert isinstance(criteria[0], JsonObjectStoppingCriteria)
+        # Only the first-token timer is left when stopping is disabled
+        assert [
+            type(c) for c in model.generate.call_args.kwargs["stopping_criteria"]
+        ] == [FirstTokenTimer]
+
+    @patch("app.services.inference.process_vision_info")
+    def test_stage_timings(self, mock_vision, mock_model_and_processor):
+        """Test preprocessing, prefill and decode time go to the request."""
+        mock_vision.return_value = ([], None)
+        model, processor = mock_model_and_processor
+        metrics = ProcessingMetrics(start_time=0.0)
+
+        with metrics_scope(metrics):
+            generate_batch(model, processor, [build_text_messages("text", "prompt")])
+
+        assert {"preprocessing", "prefill", "decode"} <= set(metrics.stage_times)
+
+    @patch("app.services.inference.process_vision_info")
+    def test_prefix_cache_serializes_generate(
+        self, mock_vision, mock_model_and_processor
+    ):
+        """Test generate calls with a prefix cache hold its generate lock."""
+        mock_vision.return_value = ([], None)
+        model, processor = mock_model_and_processor
+        prefix_cache = PrefixCache()
+        held = []
+        generate = model.generate.side_effect
+
+        def _generate(*args, **kwargs):
+            held.append(prefix_cache.generate_lock.locked())
+            return generate(*args, **kwargs)
+
+        model.generate.side_effect = _generate
+        processor.side_effect = lambda text, **kwargs: BatchFeature(
+            {
+                "input_ids": torch.ones((len(text), 4), dtype=torch.long),
+                "attention_mask": torch.ones((len(text), 4), dtype=torch.long),
+            }
+        )
+        batch = [build_text_messages("text", "no shared instruction")]
+
+        generate_batch(model, processor, batch, prefix_cache=prefix_cache)
+        generate_batch(model, processor, batch)
+
+        assert held == [True, False]
+        assert not prefix_cache.generate_lock.locked()
+
+
+class TestJsonScanState:
+    """Test the JsonScanState class."""
+
+    def test_closes_on_top_level_brace(self):
+        """Test the object is closed only when depth returns to zero."""
+        state = JsonScanState()
+
+        assert not state.feed('```json\n{"Skills": {"Languages": ["English"]}')
+        assert state.feed("}\n```\nThis JSON contains")
+
+    def test_braces_in_strings_ignored(self):
+        """Test braces and escaped quotes inside strings do not count."""
+        state = JsonScanState()
+
+        assert not state.feed('{"Summary": "uses {braces} and \\"quotes}\\""')
+        assert state.feed("}")
+
+    def test_text_before_object_ignored(self):
+        """Test stray closing braces before the object are ignored."""
+        state = JsonScanState()
+
+        assert not state.feed('Here is "the} JSON": ')
+        assert state.feed("{}")
+
+
+class TestJsonObjectStoppingCriteria:
+    """Test the JsonObjectStoppingCriteria class."""
+
+    def test_per_sequence_stop(self):
+        """Test each sequence in a batch stops independently."""
+        vocab = ["{", "}", '"a"', ":", "1", " "]
+        tokenizer = MagicMock()
+        tokenizer.decode.side_effect = lambda ids: vocab[ids[0]]
+        criteria = JsonObjectStoppingCriteria(tokenizer, batch_size=2)
+
+        steps = [[0, 5], [1, 0], [5, 2]]  # row 0: "{}", row 1: ' {"a"'
+        input_ids = torch.zeros((2, 0), dtype=torch.long)
+        done = None
+        for step in steps:
+            input_ids = torch.cat([input_ids, torch.tensor(step).unsqueeze(1)], 1)
+            done = criteria(input_ids, None)
+            if step == steps[1]:
+                assert done.tolist() == [True, False]
+
+        assert done.tolist() == [True, False]
+        # Token texts are decoded once per distinct id
+        assert tokenizer.decode.call_count == len({0, 5, 1, 2})
@@ -0,0 +1,206 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.models.core import JobStatus
+from app.services.jobs import (
+    JobManager,
+    JobQueueFullError,
+    report_progress,
+    run_jobs,
+)
+
+
+@pytest.fixture
+def make_manager():
+    """Create job managers and shut them down after the test."""
+    managers = []
+
+    def _make(**kwargs):
+        manager = JobManager(**kwargs)
+        managers.append(manager)
+        return manager
+
+    yield _make
+    for manager in managers:
+        manager.shutdown()
+
+
+class TestJobManager:
+    """Test the JobManager class."""
+
+    def test_submit_returns_before_job_runs(self, make_manager):
+        """Test submit queues the job without waiting for it."""
+        manager = make_manager(max_workers=1)
+        release = threading.Event()
+
+        job = manager.submit("resume", release.wait, 5)
+
+        assert job.status in (JobStatus.QUEUED, JobStatus.RUNNING)
+        assert manager.get(job.job_id) is job
+        release.set()
+        assert job.future.result(timeout=5) is True
+        assert job.status == JobStatus.COMPLETED
+        assert job.to_dict()["result"] is True
+
+    def test_failed_job(self, make_manager):
+        """Test a job raising an exception is reported as failed."""
+        manager = make_manager()
+
+        def _fail():
+            raise ValueError("corrupt file")
+
+        job = manager.submit("resume", _fail)
+
+        with pytest.raises(ValueError):
+            job.future.result(timeout=5)
+        assert job.status == JobStatus.FAILED
+        assert job.error == "corrupt file"
+
+    def test_queue_bounded(self, make_manager):
+        """Test submissions beyond the workers and queue are rejected."""
+        manager = make_manager(max_workers=1, max_queued=1)
+        release = threading.Event()
+
+        first = manager.submit("a", release.wait, 5)
+        second = manager.submit("b", release.wait, 5)
+        with pytest.raises(JobQueueFullError):
+            manager.submit("c", release.wait, 5)
+
+        release.set()
+        first.future.result(timeout=5)
+        second.future.result(timeout=5)
+        # Finished jobs free their slots
+        manager.submit("d", lambda: None).future.result(timeout=5)
+        assert manager.stats() == {
+            "queued": 0,
+            "running": 0,
+            "workers": 1,
+            "max_queued": 1,
+        }
+
+    def test_cancelled_while_queued(self, make_manager):
+        """Test a job cancelled before it runs is skipped and frees its slot."""
+        manager = make_manager(max_workers=1, max_queued=1)
+        release = threading.Event()
+        ran = threading.Event()
+
+        first = manager.submit("a", release.wait, 5)
+        second = manager.submit("b", ran.set)
+        assert second.future.cancel()
+        release.set()
+        first.future.result(timeout=5)
+        manager.submit("c", lambda: None).future.result(timeout=5)
+
+        assert not ran.is_set()
+        assert second.status == JobStatus.FAILED
+        assert manager.stats()["queued"] == 0
+
+    def test_finished_jobs_pruned(self, make_manager):
+        """Test only the newest finished jobs are kept."""
+        manager = make_manager(max_finished=1)
+
+        first = manager.submit("a", lambda: 1)
+        first.future.result(timeout=5)
+        second = manager.submit("b", lambda: 2)
+        second.future.result(timeout=5)
+
+        assert manager.get(first.job_id) is None
+        assert manager.get(second.job_id) is second
+
+    def test_progress(self, make_manager):
+        """Test pages reported by the running job show up in its status."""
+        manager = make_manager()
+
+        def _extract_pages():
+            for page in range(1, 4):
+                report_progress(page, 3)
+
+        job = manager.submit("resume", _extract_pages)
+        job.future.result(timeout=5)
+
+        assert job.to_dict()["progress"] == {"pages_done": 3, "pages_total": 3}
+
+    def test_progress_outside_job(self):
+        """Test progress reports outside a job are ignored."""
+        report_progress(1, 2)
+
+
+class TestRunJobs:
+    """Test the run_jobs function."""
+
+    def test_yields_in_completion_order(self, make_manager):
+        """Test jobs are yielded as they finish, not in submission order."""
+        manager = make_manager(max_workers=2)
+        slow_started = threading.Event()
+
+        def _slow():
+            slow_started.set()
+            time.sleep(0.2)
+            return "slow"
+
+        def _fast():
+            slow_started.wait(5)
+            return "fast"
+
+        async def _collect():
+            return [
+                job.result
+                async for job in run_jobs(
+                    manager, [("a", _slow, {}), ("b", _fast, {})], max_in_flight=2
+                )
+            ]
+
+        assert asyncio.run(_collect()) == ["fast", "slow"]
+
+    def test_in_flight_bounded(self, make_manager):
+        """Test no more than max_in_flight of the jobs run at once."""
+        manager = make_manager(max_workers=4)
+        lock = threading.Lock()
+        running = [0]
+        peak = [0]
+
+        def _work():
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.02)
+            with lock:
+                running[0] -= 1
+
+        async def _collect():
+            return [
+                job
+                async for job in run_jobs(
+                    manager, [(str(i), _work, {}) for i in range(6)], max_in_flight=2
+                )
+            ]
+
+        jobs = asyncio.run(_collect())
+
+        assert len(jobs) == 6
+        assert all(job.status == JobStatus.COMPLETED for job in jobs)
+        assert peak[0] <= 2
+
+    def test_waits_for_full_queue(self, make_manager):
+        """Test rejected submissions are retried once the queue drains."""
+        manager = make_manager(max_workers=1, max_queued=0)
+        release = threading.Event()
+        other = manager.submit("other", release.wait, 5)
+        threading.Timer(0.1, release.set).start()
+
+        def _fail():
+            raise ValueError("corrupt file")
+
+        async def _collect():
+            return [
+                (job.file_id, job.status)
+                async for job in run_jobs(
+                    manager, [("a", _fail, {})], max_in_flight=1, retry_interval=0.05
+                )
+            ]
+
+        assert asyncio.run(_collect()) == [("a", JobStatus.FAILED)]
+        assert other.future.result(timeout=5) is True
@@ -0,0 +1,132 @@
+import contextvars
+import threading
+
+import pytest
+
+from app.models.core import ProcessingMetrics
+from app.services.metrics import (
+    StageHistograms,
+    metrics_scope,
+    record_stage,
+    stage_histograms,
+    timed,
+)
+
+
+@pytest.fixture(autouse=True)
+def clear_histograms():
+    """Start every test with empty global histograms."""
+    stage_histograms.clear()
+    yield
+    stage_histograms.clear()
+
+
+class TestStageHistograms:
+    """Test the StageHistograms class."""
+
+    def test_render_cumulative_buckets(self):
+        """Test observations are rendered as cumulative Prometheus buckets."""
+        histograms = StageHistograms(name="stage_seconds", buckets=(0.1, 1.0))
+        histograms.observe("ocr", 0.05)
+        histograms.observe("ocr", 0.5)
+        histograms.observe("ocr", 5.0)
+
+        lines = histograms.render().splitlines()
+
+        assert lines[:2] == [
+            "# HELP stage_seconds Time spent in each resume pipeline stage.",
+            "# TYPE stage_seconds histogram",
+        ]
+        assert lines[2:] == [
+            'stage_seconds_bucket{stage="ocr",le="0.1"} 1',
+            'stage_seconds_bucket{stage="ocr",le="1.0"} 2',
+            'stage_seconds_bucket{stage="ocr",le="+Inf"} 3',
+            'stage_seconds_sum{stage="ocr"} 5.55',
+            'stage_seconds_count{stage="ocr"} 3',
+        ]
+
+    def test_bucket_bound_inclusive(self):
+        """Test an observation equal to a bound falls into that bucket."""
+        histograms = StageHistograms(name="stage_seconds", buckets=(1.0,))
+        histograms.observe("decode", 1.0)
+
+        assert 'stage_seconds_bucket{stage="decode",le="1.0"} 1' in (
+            histograms.render()
+        )
+
+
+class TestRecordStage:
+    """Test the record_stage, metrics_scope and timed functions."""
+
+    def test_outside_request(self):
+        """Test stages outside a request only feed the histograms."""
+        record_stage("persistence", 0.2)
+
+        assert 'stage="persistence"' in stage_histograms.render()
+
+    def test_recorded_into_request(self):
+        """Test stages inside a scope add up in the request's metrics."""
+        metrics = ProcessingMetrics(start_time=0.0)
+
+        with metrics_scope(metrics):
+            record_stage("ocr", 0.25)
+            record_stage("ocr", 0.5)
+
+        assert metrics.stage_times == {"ocr": 0.75}
+
+    def test_shared_batch_counted_once_per_request(self):
+        """Test a batch covering several pages of a request counts once."""
+        first = ProcessingMetrics(start_time=0.0)
+        second = ProcessingMetrics(start_time=0.0)
+
+        with metrics_scope(first, first, second):
+            record_stage("decode", 1.0)
+
+        assert first.stage_times == {"decode": 1.0}
+        assert second.stage_times == {"decode": 1.0}
+
+    def test_timed_decorator_and_block(self):
+        """Test timed works as a context manager and as a decorator."""
+        metrics = ProcessingMetrics(start_time=0.0)
+
+        @timed("matching")
+        def _match():
+            return "matched"
+
+        with metrics_scope(metrics):
+            with timed("drawing"):
+                pass
+            assert _match() == "matched"
+
+        assert set(metrics.stage_times) == {"drawing", "matching"}
+
+    def test_worker_threads_copy_scope(self):
+        """Test threads started with a copy of the context record too."""
+        metrics = ProcessingMetrics(start_time=0.0)
+
+        with metrics_scope(metrics):
+            thread = threading.Thread(
+                target=contextvars.copy_context().run,
+                args=(record_stage, "summary", 2.0),
+            )
+            thread.start()
+            thread.join()
+
+        assert metrics.stage_times == {"summary": 2.0}
+
+
+class TestProcessingMetrics:
+    """Test the ProcessingMetrics stage timings."""
+
+    def test_to_dict(self):
+        """Test timings are reported rounded, with the stage breakdown."""
+        metrics = ProcessingMetrics(start_time=1.0, end_time=3.123456)
+        metrics.calculate_total_time()
+        metrics.add_stage_time("prefill", 0.123456)
+
+        assert metrics.to_dict() == {
+            "total_execution_time": 2.1235,
+            "ocr_time": None,
+            "annotation_time": None,
+            "stage_times": {"prefill": 0.1235},
+        }
@@ -0,0 +1,86 @@
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.services.ocr_pool import ReaderPool
+
+
+@pytest.fixture
+def mock_reader_class():
+    """Mock easyocr.Reader so every call builds a new fake reader."""
+    with patch("app.services.ocr_pool.easyocr") as mock:
+        mock.Reader.side_effect = lambda *args, **kwargs: MagicMock()
+        yield mock.Reader
+
+
+class TestReaderPool:
+    """Test the ReaderPool class."""
+
+    def test_reader_reused(self, mock_reader_class):
+        """Test consecutive borrowers get the same reader."""
+        pool = ReaderPool(size=2)
+
+        with pool.reader(["en"], gpu=False) as first:
+            pass
+        with pool.reader(["en"], gpu=False) as second:
+            pass
+
+        assert first is second
+        mock_reader_class.assert_called_once_with(["en"], gpu=False)
+
+    def test_keyed_by_languages_and_device(self, mock_reader_class):
+        """Test different languages or devices never share a reader."""
+        pool = ReaderPool(size=1)
+
+        with (
+            pool.reader(["en"], gpu=False) as cpu_reader,
+            pool.reader(["en"], gpu=True) as gpu_reader,
+            pool.reader(["en", "de"], gpu=False) as german_reader,
+        ):
+            pass
+
+        assert len({id(cpu_reader), id(gpu_reader), id(german_reader)}) == 3
+        assert pool.stats()["readers"]["en/gpu"] == {"built": 1, "idle": 1}
+
+    def test_size_bounds_readers(self, mock_reader_class):
+        """Test borrowers wait instead of building more than size readers."""
+        pool = ReaderPool(size=1)
+        borrowed = []
+
+        def _borrow():
+            with pool.reader() as reader:
+                borrowed.append(reader)
+
+        with pool.reader() as reader:
+            thread = threading.Thread(target=_borrow)
+            thread.start()
+            time.sleep(0.05)
+            # The second borrower is still waiting for the only reader
+            assert borrowed == []
+        thread.join(timeout=5)
+
+        assert borrowed == [reader]
+        assert mock_reader_class.call_count == 1
+
+    def test_failed_build_frees_slot(self, mock_reader_class):
+        """Test a reader that fails to load does not use up the pool."""
+        pool = ReaderPool(size=1)
+        mock_reader_class.side_effect = [OSError("weights missing"), MagicMock()]
+
+        with pytest.raises(OSError), pool.reader():
+            pass
+        with pool.reader() as reader:
+            assert reader is not None
+
+    def test_warm(self, mock_reader_class):
+        """Test warming builds and runs every reader of a key."""
+        pool = ReaderPool(size=2)
+
+        pool.warm(["en"], gpu=False)
+
+        assert mock_reader_class.call_count == 2
+        assert pool.stats()["readers"]["en/cpu"] == {"built": 2, "idle": 2}
+        with pool.reader(["en"]) as reader:
+            reader.readtext.assert_called_once()
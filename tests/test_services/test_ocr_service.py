@@ -1,9 +1,21 @@
 import json
+import os
+import threading
 from unittest.mock import MagicMock, mock_open, patch
 
+import fitz
+import numpy as np
 import pytest
 import torch
-
+from transformers import BatchFeature
+
+from app.core.settings import Settings, get_settings
+from app.dependencies import get_inference_scheduler
+from app.models.core import PipelineMode
+from app.services import ocr_service
+from app.services.cache import ExtractionCache
+from app.services.document import open_document
+from app.services.metrics import record_stage
 from app.services.ocr_service import (
     doc_parser,
     generate_summary_from_json,
@@ -11,18 +23,44 @@ from app.services.ocr_service import (
 )
 
 
+@pytest.fixture(autouse=True)
+def storage(tmp_path_factory):
+    """Point the result directories at a temporary location."""
+    storage_dir = tmp_path_factory.mktemp("storage")
+    dirs = {}
+    for name in ("EXTRACTION_DIR", "LOGS_DIR", "ANNOTATIONS_DIR"):
+        dirs[name] = storage_dir / name.lower()
+        dirs[name].mkdir()
+    with patch.multiple(
+        ocr_service.config, **{name: str(path) for name, path in dirs.items()}
+    ):
+        yield dirs
+
+
 @pytest.fixture
 def mock_model_and_processor():
     """Mock the model and processor for testing."""
-    with patch("app.dependencies.get_model_and_processor") as mock_get:
+    # The shared scheduler holds the model it was created with
+    get_inference_scheduler.cache_clear()
+    with (
+        patch("app.dependencies.get_model_and_processor") as mock_get,
+        # A mock processor has no vocabulary to constrain the output to
+        patch.object(get_settings(), "CONSTRAINED_DECODING", False),
+    ):
         mock_model = MagicMock()
         mock_processor = MagicMock()
 
-        # Setup mock model
-        mock_model.generate.return_value = torch.tensor([[1, 2, 3]])
+        # Setup mock model; it appends one token to every prompt of a batch
+        mock_model.device = "cpu"
+        mock_model.generate.side_effect = lambda input_ids, **kwargs: torch.cat(
+            [input_ids, torch.ones((input_ids.shape[0], 1), dtype=torch.long)], dim=1
+        )
 
         # Setup mock processor
         mock_processor.apply_chat_template.return_value = "test prompt"
+        mock_processor.side_effect = lambda text, **kwargs: BatchFeature(
+            {"input_ids": torch.ones((len(text), 4), dtype=torch.long)}
+        )
         mock_processor.batch_decode.return_value = [
             """
             {
@@ -54,15 +92,22 @@ def mock_model_and_processor():
             }
             """
         ]
+        # The configured output, once per sequence of the batch
+        mock_processor.batch_decode.side_effect = lambda ids, **kwargs: (
+            mock_processor.batch_decode.return_value * len(ids)
+        )
 
         mock_get.return_value = (mock_model, mock_processor)
         yield (mock_model, mock_processor)
+        if get_inference_scheduler.cache_info().currsize:
+            get_inference_scheduler().shutdown()
+            get_inference_scheduler.cache_clear()
 
 
 @pytest.fixture
 def mock_fitz():
     """Mock the fitz (PyMuPDF) module."""
-    with patch("app.services.ocr_service.fitz") as mock:
+    with patch("app.services.document.fitz") as mock:
         # Set up mock document
         mock_doc = MagicMock()
         mock_page = MagicMock()
@@ -71,8 +116,15 @@ def mock_fitz():
         # Set up chain of mock calls
         mock.open.return_value = mock_doc
         mock_doc.load_page.return_value = mock_page
+        # A scanned page: no text layer, so it goes through the vision path
+        mock_page.rect = fitz.Rect(0, 0, 400, 300)
+        mock_page.get_text.return_value = []
         mock_page.get_pixmap.return_value = mock_pixmap
-        mock_pixmap.tobytes.return_value = b"test image data"
+        # Raw RGB samples of an 800x600 page
+        mock_pixmap.width, mock_pixmap.height, mock_pixmap.n = 800, 600, 3
+        mock_pixmap.stride = 800 * 3
+        mock_pixmap.alpha = False
+        mock_pixmap.samples = mock_pixmap.samples_mv = bytes(600 * 800 * 3)
 
         # Set up Matrix class
         mock.Matrix.return_value = MagicMock()
@@ -83,9 +135,13 @@ def mock_fitz():
 @pytest.fixture
 def mock_cv2():
     """Mock the cv2 module."""
-    with patch("app.services.ocr_service.cv2") as mock:
+    with (
+        patch("app.services.ocr_service.cv2") as mock,
+        patch("app.services.document.cv2", mock),
+    ):
         mock.imdecode.return_value = MagicMock()
-        mock.imread.return_value = MagicMock()
+        mock.imread.return_value = np.zeros((600, 800, 3), dtype=np.uint8)
+        mock.cvtColor.side_effect = lambda image, code: image
         yield mock
 
 
@@ -107,11 +163,10 @@ class TestDocParser:
         mock_abspath.return_value = "/path/to/test.pdf"
 
         # Mock fitz.open to return a single-page document
-        mock_doc = MagicMock()
-        mock_doc.__len__.return_value = 1
-        mock_fitz.open.return_value = mock_doc
+        mock_fitz.open.return_value.__len__.return_value = 1
 
-        result = doc_parser("test.pdf")
+        with patch("app.services.ocr_service._write_json_atomic"):
+            result = doc_parser("test.pdf")
 
         # Check the result is valid JSON with the expected structure
         parsed_result = json.loads(result)
@@ -135,22 +190,184 @@ class TestDocParser:
         mock_abspath.return_value = "/path/to/test.pdf"
 
         # Mock fitz.open to return a multi-page document
-        mock_doc = MagicMock()
-        mock_doc.__len__.return_value = 3
-        mock_fitz.open.return_value = mock_doc
+        mock_fitz.open.return_value.__len__.return_value = 3
 
-        result = doc_parser("test.pdf")
+        with patch("app.services.ocr_service._write_json_atomic"):
+            result = doc_parser("test.pdf")
 
         # Check the result is valid JSON with the expected structure
         parsed_result = json.loads(result)
         assert "pages" in parsed_result
         assert len(parsed_result["pages"]) > 0
 
-        # Verify model and processor were called multiple times (once per page)
+        # Verify every page was prompted; pages share batched generate calls
         model, processor = mock_model_and_processor
         assert processor.apply_chat_template.call_count >= 3
-        assert model.generate.call_count >= 3
-        assert processor.batch_decode.call_count >= 3
+        assert model.generate.called
+        assert processor.batch_decode.called
+
+    @patch("app.services.ocr_service.os.path.isfile")
+    @patch("app.services.ocr_service.os.path.abspath")
+    @patch("app.services.ocr_service.get_inference_scheduler")
+    @patch("app.services.ocr_service.render_page")
+    def test_multi_page_pdf_uses_scheduler(
+        self,
+        mock_render_page,
+        mock_get_scheduler,
+        mock_abspath,
+        mock_isfile,
+        mock_fitz,
+    ):
+        """Test every page is submitted to the scheduler and split back out."""
+        mock_isfile.return_value = True
+        mock_abspath.return_value = "/path/to/test.pdf"
+        page_json = json.dumps({"PersonalInfo": {"Name": "John Doe"}})
+        mock_scheduler = MagicMock()
+        mock_scheduler.submit.return_value.result.return_value = page_json
+        mock_get_scheduler.return_value = mock_scheduler
+
+        mock_doc = MagicMock()
+        mock_doc.__len__.return_value = 5
+        mock_fitz.open.return_value = mock_doc
+
+        with patch("app.services.ocr_service._write_json_atomic"):
+            result = json.loads(doc_parser("test.pdf"))
+
+        assert mock_scheduler.submit.call_count == 5
+        assert mock_render_page.call_count == 5
+        assert list(result["pages"]) == [f"page{i}" for i in range(1, 6)]
+
+    @patch("app.services.ocr_service.os.path.isfile")
+    @patch("app.services.ocr_service.os.path.abspath")
+    @patch("app.services.ocr_service.get_inference_scheduler")
+    @patch("app.services.ocr_service.render_page")
+    @patch("app.services.ocr_service.get_settings")
+    def test_render_lookahead_bounded(
+        self,
+        mock_get_settings,
+        mock_render_page,
+        mock_get_scheduler,
+        mock_abspath,
+        mock_isfile,
+        mock_fitz,
+    ):
+        """Test pages are rendered at most PAGE_LOOKAHEAD ahead of the model."""
+        mock_isfile.return_value = True
+        mock_abspath.return_value = "/path/to/test.pdf"
+        mock_get_settings.return_value = Settings(
+            PAGE_LOOKAHEAD=2, PAGE_CACHE_MODE=False
+        )
+        events = []
+        mock_render_page.side_effect = lambda *args, **kwargs: events.append("render")
+        page_json = json.dumps({"PersonalInfo": {"Name": "John Doe"}})
+
+        def _submit(*args, **kwargs):
+            future = MagicMock()
+            future.result.side_effect = lambda: events.append("result") or page_json
+            return future
+
+        mock_scheduler = MagicMock()
+        mock_scheduler.submit.side_effect = _submit
+        mock_get_scheduler.return_value = mock_scheduler
+
+        mock_doc = MagicMock()
+        mock_doc.__len__.return_value = 4
+        mock_fitz.open.return_value = mock_doc
+
+        with patch("app.services.ocr_service._write_json_atomic"):
+            doc_parser("test.pdf")
+
+        assert events == ["render", "render"] + ["result", "render"] * 2 + [
+            "result",
+            "result",
+        ]
+
+    @patch("app.services.ocr_service.os.path.isfile")
+    @patch("app.services.ocr_service.os.path.abspath")
+    @patch("app.services.ocr_service.get_inference_scheduler")
+    @patch("app.services.ocr_service.render_page")
+    @patch("app.services.ocr_service.extract_page_text")
+    def test_text_layer_fast_path(
+        self,
+        mock_extract_text,
+        mock_render_page,
+        mock_get_scheduler,
+        mock_abspath,
+        mock_isfile,
+        mock_fitz,
+    ):
+        """Test born-digital pages are sent as text without rasterizing."""
+        mock_isfile.return_value = True
+        mock_abspath.return_value = "/path/to/test.pdf"
+        mock_extract_text.return_value = "John Doe, Software Engineer. " * 20
+        mock_scheduler = MagicMock()
+        mock_scheduler.submit.return_value.result.return_value = json.dumps(
+            {"PersonalInfo": {"Name": "John Doe"}}
+        )
+        mock_get_scheduler.return_value = mock_scheduler
+
+        mock_doc = MagicMock()
+        mock_doc.__len__.return_value = 1
+        mock_fitz.open.return_value = mock_doc
+
+        with patch("app.services.ocr_service._write_json_atomic"):
+            result = json.loads(doc_parser("test.pdf"))
+
+        assert not mock_render_page.called
+        content = mock_scheduler.submit.call_args.args[0][0]["content"]
+        assert [part["type"] for part in content] == ["text", "text"]
+        assert "John Doe, Software Engineer." in content[1]["text"]
+        assert result["pages"]["page1"]["PersonalInfo"]["Name"] == "John Doe"
+
+    @patch("app.services.ocr_service.os.path.isfile")
+    @patch("app.services.ocr_service.os.path.abspath")
+    @patch("app.services.ocr_service.get_inference_scheduler")
+    @patch("app.services.ocr_service.extract_page_text")
+    @patch("app.services.ocr_service.get_page_cache")
+    @patch("app.services.ocr_service.get_settings")
+    def test_page_cache_reuses_unchanged_pages(
+        self,
+        mock_get_settings,
+        mock_get_page_cache,
+        mock_extract_text,
+        mock_get_scheduler,
+        mock_abspath,
+        mock_isfile,
+        mock_fitz,
+        tmp_path,
+    ):
+        """Test only pages not seen before are sent to the model."""
+        mock_isfile.return_value = True
+        mock_abspath.return_value = "/path/to/test.pdf"
+        mock_get_settings.return_value = Settings(PAGE_CACHE_MODE=True)
+        mock_get_page_cache.return_value = ExtractionCache(
+            str(tmp_path / "pages"), max_bytes=10**6
+        )
+        mock_scheduler = MagicMock()
+        mock_scheduler.submit.return_value.result.return_value = json.dumps(
+            {"PersonalInfo": {"Name": "John Doe"}}
+        )
+        mock_get_scheduler.return_value = mock_scheduler
+
+        mock_doc = MagicMock()
+        mock_doc.__len__.return_value = 3
+        mock_fitz.open.return_value = mock_doc
+
+        pages = [f"Page {i} of the resume. " * 20 for i in range(4)]
+        mock_extract_text.side_effect = pages[:3] + [pages[0], pages[1], pages[3]]
+        with patch("app.services.ocr_service._write_json_atomic"):
+            doc_parser("test.pdf")
+            assert mock_scheduler.submit.call_count == 3
+
+            # Same document with the last page replaced
+            result = json.loads(doc_parser("test.pdf"))
+
+        assert mock_scheduler.submit.call_count == 4
+        assert (
+            "Page 3 of the resume."
+            in (mock_scheduler.submit.call_args.args[0][0]["content"][1]["text"])
+        )
+        assert list(result["pages"]) == ["page1", "page2", "page3"]
 
     @patch("app.services.ocr_service.os.path.isfile")
     @patch("app.services.ocr_service.os.path.abspath")
@@ -161,7 +378,8 @@ class TestDocParser:
         mock_isfile.return_value = True
         mock_abspath.return_value = "/path/to/test.png"
 
-        result = doc_parser("test.png")
+        with patch("app.services.ocr_service._write_json_atomic"):
+            result = doc_parser("test.png")
 
         # Check the result is valid JSON with the expected structure
         parsed_result = json.loads(result)
@@ -181,32 +399,37 @@ class TestProcessResume:
     @patch("app.services.ocr_service.os.path.isfile")
     @patch("app.services.ocr_service.os.path.abspath")
     @patch("app.services.ocr_service.time.time")
-    @patch("app.services.ocr_service.doc_parser")
-    @patch("app.services.ocr_service.annotate_resume")
+    @patch("app.services.ocr_service.summarize_resume_data")
+    @patch("app.services.ocr_service.extract_resume_data")
+    @patch("app.services.ocr_service.annotate_resume_data")
     def test_process_resume_full(
-        self, mock_annotate, mock_doc_parser, mock_time, mock_abspath, mock_isfile
+        self,
+        mock_annotate,
+        mock_extract,
+        mock_summary,
+        mock_time,
+        mock_abspath,
+        mock_isfile,
     ):
         """Test processing a resume with annotation and summary generation."""
         mock_isfile.return_value = True
         mock_abspath.return_value = "/path/to/test.pdf"
         mock_time.side_effect = [1000, 1005]  # Start and end times
 
-        # Mock doc_parser to return valid JSON
-        mock_doc_parser.return_value = json.dumps(
-            {
-                "pages": {
-                    "page1": {
-                        "PersonalInfo": {
-                            "Name": "John Doe",
-                            "Email": "john@example.com",
-                        }
+        # Mock the extraction stage to return valid data
+        mock_extract.return_value = {
+            "pages": {
+                "page1": {
+                    "PersonalInfo": {
+                        "Name": "John Doe",
+                        "Email": "john@example.com",
                     }
                 }
             }
-        )
+        }
+        mock_summary.return_value = {"Summary": "Experienced engineer."}
 
-        # Mock open function for writing JSON
-        with patch("builtins.open", mock_open()):
+        with patch("app.services.ocr_service._save_response") as mock_save:
             result = process_resume(
                 "test.pdf", use_annotator=True, generate_summary=True
             )
@@ -217,6 +440,8 @@ class TestProcessResume:
         assert "pages" in result
         assert result["message"] == "Resume processed successfully"
         assert result["summary_generated"]
+        # The result is persisted once, in its final form
+        mock_save.assert_called_once_with(result, "test")
 
         # Verify annotator was called
         assert mock_annotate.called
@@ -224,32 +449,37 @@ class TestProcessResume:
     @patch("app.services.ocr_service.os.path.isfile")
     @patch("app.services.ocr_service.os.path.abspath")
     @patch("app.services.ocr_service.time.time")
-    @patch("app.services.ocr_service.doc_parser")
-    @patch("app.services.ocr_service.annotate_resume")
+    @patch("app.services.ocr_service.summarize_resume_data")
+    @patch("app.services.ocr_service.extract_resume_data")
+    @patch("app.services.ocr_service.annotate_resume_data")
     def test_process_resume_no_annotation(
-        self, mock_annotate, mock_doc_parser, mock_time, mock_abspath, mock_isfile
+        self,
+        mock_annotate,
+        mock_extract,
+        mock_summary,
+        mock_time,
+        mock_abspath,
+        mock_isfile,
     ):
         """Test processing a resume without annotation."""
         mock_isfile.return_value = True
         mock_abspath.return_value = "/path/to/test.pdf"
         mock_time.side_effect = [1000, 1005]  # Start and end times
 
-        # Mock doc_parser to return valid JSON
-        mock_doc_parser.return_value = json.dumps(
-            {
-                "pages": {
-                    "page1": {
-                        "PersonalInfo": {
-                            "Name": "John Doe",
-                            "Email": "john@example.com",
-                        }
+        # Mock the extraction stage to return valid data
+        mock_extract.return_value = {
+            "pages": {
+                "page1": {
+                    "PersonalInfo": {
+                        "Name": "John Doe",
+                        "Email": "john@example.com",
                     }
                 }
             }
-        )
+        }
+        mock_summary.return_value = {"Summary": "Experienced engineer."}
 
-        # Mock open function for writing JSON
-        with patch("builtins.open", mock_open()):
+        with patch("app.services.ocr_service._save_response") as mock_save:
             result = process_resume(
                 "test.pdf", use_annotator=False, generate_summary=True
             )
@@ -261,6 +491,184 @@ class TestProcessResume:
 
         # Verify annotator was not called
         assert not mock_annotate.called
+        mock_save.assert_called_once_with(result, "test")
+
+    @patch("app.services.ocr_service.os.path.isfile")
+    @patch("app.services.ocr_service.UserProxyAgent")
+    @patch("app.services.ocr_service.summarize_resume_data")
+    @patch("app.services.ocr_service.extract_resume_data")
+    @patch("app.services.ocr_service.annotate_resume_data")
+    def test_direct_mode_skips_agents(
+        self,
+        mock_annotate,
+        mock_extract,
+        mock_summary,
+        mock_user_agent,
+        mock_isfile,
+    ):
+        """Test direct mode calls every stage without routing through agents."""
+        mock_isfile.return_value = True
+        calls = []
+        mock_extract.side_effect = lambda *args: calls.append("extract") or {}
+        mock_summary.side_effect = lambda *args: calls.append("summary") or {}
+        mock_annotate.side_effect = lambda *args: calls.append("annotate")
+
+        process_resume("test.png", pipeline_mode="direct")
+
+        assert calls[0] == "extract"
+        assert sorted(calls[1:]) == ["annotate", "summary"]
+        mock_extract.assert_called_once_with(os.path.abspath("test.png"))
+        assert not mock_user_agent.called
+
+    @patch("app.services.ocr_service.os.path.isfile")
+    @patch("app.services.ocr_service.summarize_resume_data")
+    @patch("app.services.ocr_service.extract_resume_data")
+    @patch("app.services.ocr_service.annotate_resume_data")
+    def test_summary_and_annotation_overlap(
+        self, mock_annotate, mock_extract, mock_summary, mock_isfile
+    ):
+        """Test the summary and annotation stages run at the same time."""
+        mock_isfile.return_value = True
+        mock_extract.return_value = {}
+        annotating = threading.Event()
+        mock_annotate.side_effect = lambda *args: annotating.set()
+        # Times out if the stages run one after the other
+        waited = []
+        mock_summary.side_effect = lambda *args: (
+            waited.append(annotating.wait(timeout=5))
+            or {"Summary": "Experienced engineer."}
+        )
+
+        result = process_resume("test.png", pipeline_mode="direct")
+
+        assert waited == [True]
+        assert result["message"] == "Resume processed successfully"
+
+    @patch("app.services.ocr_service.os.path.isfile")
+    @patch("app.services.ocr_service.summarize_resume_data")
+    @patch("app.services.ocr_service.extract_resume_data")
+    @patch("app.services.ocr_service.annotate_resume_data")
+    def test_result_passed_in_memory(
+        self, mock_annotate, mock_extract, mock_summary, mock_isfile, storage
+    ):
+        """Test stage results are merged in memory and saved once, compactly."""
+        mock_isfile.return_value = True
+        mock_extract.return_value = {"pages": {"page1": {"Skills": {}}}}
+        mock_summary.return_value = {"Summary": "Experienced engineer."}
+
+        result = process_resume(
+            "test.png",
+            pipeline_mode="direct",
+            base_url="http://localhost:8000",
+        )
+
+        assert result["pages"][0]["data"] == [
+            {
+                "text": "Experienced engineer.",
+                "label_name": "Summary",
+                "is_visible": False,
+            }
+        ]
+        assert result["image_urls"] == [
+            "http://localhost:8000/api/static/annotations/test/test_annotated.png"
+        ]
+        assert mock_annotate.call_args.args[1] is mock_extract.return_value
+        saved = (storage["EXTRACTION_DIR"] / "test.json").read_text(encoding="utf-8")
+        assert json.loads(saved) == result
+        assert "\n" not in saved
+        assert [path.name for path in storage["EXTRACTION_DIR"].iterdir()] == [
+            "test.json"
+        ]
+        assert not any(storage["LOGS_DIR"].iterdir())
+
+    @patch("app.services.ocr_service.os.path.isfile")
+    @patch("app.services.ocr_service.summarize_resume_data")
+    @patch("app.services.ocr_service.extract_resume_data")
+    @patch("app.services.ocr_service.annotate_resume_data")
+    def test_stage_timings_reported(
+        self, mock_annotate, mock_extract, mock_summary, mock_isfile
+    ):
+        """Test stages timed by the request are reported in the response."""
+        mock_isfile.return_value = True
+
+        def _extract(file_path):
+            record_stage("extraction", 1.5)
+            return {"pages": {"page1": {}}}
+
+        def _annotate(file_path, json_data, output_dir):
+            # Runs on a pool thread, next to the summary
+            record_stage("annotation", 0.5)
+
+        mock_extract.side_effect = _extract
+        mock_annotate.side_effect = _annotate
+        mock_summary.return_value = {}
+
+        result = process_resume("test.png", pipeline_mode="direct")
+
+        metrics = result["metrics"]
+        assert metrics["ocr_time"] == 1.5
+        assert metrics["annotation_time"] == 0.5
+        assert {"extraction", "annotation"} <= set(metrics["stage_times"])
+        assert metrics["total_execution_time"] >= 0
+
+    @patch("app.services.ocr_service.summarize_resume_data")
+    @patch("app.services.ocr_service.extract_resume_data")
+    @patch("app.services.ocr_service.annotate_resume_data")
+    def test_stages_share_document(
+        self, mock_annotate, mock_extract, mock_summary, tmp_path
+    ):
+        """Test every stage reuses the document the request opened."""
+        pdf_path = tmp_path / "resume.pdf"
+        doc = fitz.open()
+        doc.new_page()
+        doc.save(pdf_path)
+        doc.close()
+        documents = []
+
+        def _use_document(*args):
+            with open_document(str(pdf_path)) as document:
+                documents.append(document)
+            return {}
+
+        mock_extract.side_effect = _use_document
+        mock_annotate.side_effect = _use_document
+
+        process_resume(str(pdf_path), pipeline_mode="direct")
+
+        assert len(documents) == 2
+        assert documents[0] is documents[1]
+        assert documents[0]._doc is None
+
+    @patch("app.services.ocr_service.os.path.isfile")
+    @patch("app.services.ocr_service.register_function")
+    @patch("app.services.ocr_service.AssistantAgent")
+    @patch("app.services.ocr_service.UserProxyAgent")
+    @patch("app.services.ocr_service.doc_parser")
+    def test_agents_mode(
+        self,
+        mock_doc_parser,
+        mock_user_agent,
+        mock_assistant,
+        mock_register,
+        mock_isfile,
+    ):
+        """Test agents mode hands every stage to an AutoGen agent."""
+        mock_isfile.return_value = True
+
+        with patch("builtins.open", mock_open()):
+            process_resume("test.png", pipeline_mode=PipelineMode.AGENTS)
+
+        assert mock_user_agent.return_value.initiate_chat.call_count == 3
+        assert mock_register.call_count == 3
+        assert not mock_doc_parser.called
+
+    @patch("app.services.ocr_service.os.path.isfile")
+    def test_unknown_pipeline_mode(self, mock_isfile):
+        """Test an unknown pipeline mode is rejected before any work."""
+        mock_isfile.return_value = True
+
+        with pytest.raises(ValueError):
+            process_resume("test.pdf", pipeline_mode="telepathy")
 
     @patch("app.services.ocr_service.os.path.isfile")
     def test_process_resume_file_not_found(self, mock_isfile):
@@ -271,6 +679,88 @@ class TestProcessResume:
             process_resume("nonexistent.pdf")
 
 
+class TestExtractionCache:
+    """Test process_resume with the extraction cache enabled."""
+
+    @patch("app.services.ocr_service.doc_parser")
+    @patch("app.services.ocr_service.get_extraction_cache")
+    @patch("app.services.ocr_service.get_settings")
+    def test_cache_hit_skips_pipeline(
+        self,
+        mock_get_settings,
+        mock_get_cache,
+        mock_doc_parser,
+        storage,
+        sample_pdf,
+        tmp_path,
+    ):
+        """Test a re-upload under another name is served from the cache."""
+        mock_get_settings.return_value = Settings(EXTRACTION_CACHE_MODE=True)
+        cache = ExtractionCache(str(tmp_path / "cache"), max_bytes=10**6)
+        mock_get_cache.return_value = cache
+
+        annotation = tmp_path / "old_page1.png"
+        annotation.write_bytes(b"png data")
+        key = ocr_service._extraction_cache_key(str(sample_pdf), True, True)
+        cache.put(
+            key,
+            {
+                "file_id": "old",
+                "pages": [{"image_id": "old_page1", "page_num": 1, "data": []}],
+                "image_urls": ["api/static/annotations/old/old_page1.png"],
+                "message": "Resume processed successfully",
+                "summary_generated": True,
+            },
+            {"_page1.png": str(annotation)},
+        )
+
+        result = process_resume(str(sample_pdf))
+
+        assert not mock_doc_parser.called
+        assert result["file_id"] == "sample_resume"
+        assert result["pages"][0]["image_id"] == "sample_resume_page1"
+        assert result["image_urls"] == [
+            "api/static/annotations/sample_resume/sample_resume_page1.png"
+        ]
+        restored = storage["ANNOTATIONS_DIR"] / "sample_resume"
+        assert (restored / "sample_resume_page1.png").read_bytes() == b"png data"
+        assert (storage["EXTRACTION_DIR"] / "sample_resume.json").exists()
+        assert cache.stats()["hits"] == 1
+
+    @patch("app.services.ocr_service.extract_resume_data")
+    @patch("app.services.ocr_service.get_extraction_cache")
+    @patch("app.services.ocr_service.get_settings")
+    def test_evicted_entry_falls_back_to_pipeline(
+        self,
+        mock_get_settings,
+        mock_get_cache,
+        mock_extract,
+        storage,
+        sample_pdf,
+        tmp_path,
+    ):
+        """Test an entry whose files vanish after the lookup counts as a miss."""
+        mock_get_settings.return_value = Settings(EXTRACTION_CACHE_MODE=True)
+        mock_get_cache.return_value = cache = MagicMock()
+        cache.get.return_value = (
+            {
+                "file_id": "old",
+                "pages": [],
+                "image_urls": ["api/static/annotations/old/old_page1.png"],
+            },
+            {"_page1.png": str(tmp_path / "evicted.png")},
+        )
+        mock_extract.return_value = {"pages": {"page1": {"Skills": {}}}}
+
+        result = process_resume(
+            str(sample_pdf), use_annotator=False, generate_summary=False
+        )
+
+        assert mock_extract.called
+        assert result["file_id"] == "sample_resume"
+        assert len(result["pages"]) == 1
+
+
 class TestSummaryGeneration:
     """Test the generate_summary_from_json function."""
 
@@ -315,6 +805,26 @@ class TestSummaryGeneration:
         assert "Summary" in summary_data
         assert "John Doe" in summary_data["Summary"]
 
+    @patch("app.services.ocr_service.get_inference_scheduler")
+    def test_summary_merged_into_result(self, mock_get_scheduler, tmp_path):
+        """Test the summary is added to every page and the file replaced."""
+        json_file = tmp_path / "resume.json"
+        json_file.write_text(
+            json.dumps({"pages": {"page1": {}, "page2": {}}}), encoding="utf-8"
+        )
+        mock_scheduler = MagicMock()
+        mock_scheduler.submit.return_value.result.return_value = (
+            '{"Summary": "Experienced engineer."}'
+        )
+        mock_get_scheduler.return_value = mock_scheduler
+
+        generate_summary_from_json(str(json_file))
+
+        data = json.loads(json_file.read_text(encoding="utf-8"))
+        assert data["pages"]["page1"]["Summary"] == "Experienced engineer."
+        assert data["pages"]["page2"]["Summary"] == "Experienced engineer."
+        assert [path.name for path in tmp_path.iterdir()] == ["resume.json"]
+
     @patch("app.services.ocr_service.os.path.isfile")
     def test_generate_summary_file_not_found(self, mock_isfile):
         """Test generating a summary from a nonexistent JSON file."""
@@ -0,0 +1,172 @@
+import pytest
+import torch
+from transformers import Qwen2_5_VLConfig, Qwen2_5_VLForConditionalGeneration
+
+from app.services.prefix_cache import (
+    PrefixCache,
+    generate_with_prefix,
+    prompt_prefix_length,
+    shared_prefix_length,
+)
+
+IMAGE_TOKEN = 150
+PREFIX = [5, 6, 7, 8, 9, 10, 11]
+
+
+class CharTokenizer:
+    """Tokenizer mapping every character to one token."""
+
+    def __call__(self, text, add_special_tokens=True):
+        return {"input_ids": [ord(char) for char in text]}
+
+
+@pytest.fixture(scope="module")
+def tiny_model():
+    """Create a randomly initialized, CPU-sized Qwen2.5-VL model."""
+    torch.manual_seed(0)
+    config = Qwen2_5_VLConfig(
+        text_config={
+            "vocab_size": 200,
+            "hidden_size": 64,
+            "intermediate_size": 128,
+            "num_hidden_layers": 2,
+            "num_attention_heads": 4,
+            "num_key_value_heads": 2,
+            "max_position_embeddings": 512,
+            "rope_parameters": {
+                "rope_type": "default",
+                "mrope_section": [2, 3, 3],
+                "rope_theta": 10000.0,
+            },
+        },
+        vision_config={
+            "depth": 1,
+            "hidden_size": 32,
+            "intermediate_size": 64,
+            "num_heads": 2,
+            "out_hidden_size": 64,
+            "fullatt_block_indexes": [0],
+        },
+        image_token_id=IMAGE_TOKEN,
+        video_token_id=151,
+        vision_start_token_id=152,
+        vision_end_token_id=153,
+        bos_token_id=None,
+        eos_token_id=199,
+        pad_token_id=0,
+    )
+    model = Qwen2_5_VLForConditionalGeneration(config).eval()
+    model.generation_config.pad_token_id = 0
+    model.generation_config.eos_token_id = 199
+    return model
+
+
+def _batch(suffixes, grids=None):
+    """Build left-padded processor outputs for rows sharing PREFIX."""
+    rows = []
+    for i, suffix in enumerate(suffixes):
+        image = []
+        if grids:
+            t, h, w = grids[i]
+            image = [152] + [IMAGE_TOKEN] * (t * h * w // 4) + [153]
+        rows.append(PREFIX + image + suffix)
+    length = max(map(len, rows))
+    input_ids = torch.tensor([[0] * (length - len(row)) + row for row in rows])
+    inputs = {
+        "input_ids": input_ids,
+        "attention_mask": (input_ids != 0).long(),
+        "mm_token_type_ids": (input_ids == IMAGE_TOKEN).long(),
+    }
+    if grids:
+        inputs["image_grid_thw"] = torch.tensor(grids)
+        patches = sum(t * h * w for t, h, w in grids)
+        inputs["pixel_values"] = torch.randn(patches, 3 * 2 * 14 * 14)
+    return inputs
+
+
+class TestPromptPrefixLength:
+    """Test the prompt_prefix_length function."""
+
+    def test_stops_before_instruction_end(self):
+        """Test the prefix ends one token before the instruction does."""
+        prompt = "<system>Extract data<page>"
+
+        assert prompt_prefix_length(CharTokenizer(), prompt, "Extract data") == 19
+
+    def test_missing_instruction(self):
+        """Test prompts without the instruction have no prefix."""
+        assert prompt_prefix_length(CharTokenizer(), "<system>", "Extract") == 0
+
+
+class TestSharedPrefixLength:
+    """Test the shared_prefix_length function."""
+
+    def test_common_tokens_after_padding(self):
+        """Test left padding is ignored when comparing rows."""
+        inputs = _batch([[20, 21, 22], [20, 23, 24, 25]])
+
+        length = shared_prefix_length(
+            inputs["input_ids"], inputs["attention_mask"], limit=100
+        )
+
+        assert length == len(PREFIX) + 1
+
+    def test_limit(self):
+        """Test the prefix never exceeds the given limit."""
+        inputs = _batch([[20, 21, 22], [20, 23]])
+
+        length = shared_prefix_length(
+            inputs["input_ids"], inputs["attention_mask"], limit=3
+        )
+
+        assert length == 3
+
+
+class TestPrefixCache:
+    """Test the PrefixCache class."""
+
+    def test_prefix_computed_once(self, tiny_model):
+        """Test repeated prefixes are served from the cache."""
+        cache = PrefixCache(max_entries=1)
+        prefix_ids = torch.tensor(PREFIX)
+
+        first = cache.get(tiny_model, prefix_ids)
+        second = cache.get(tiny_model, prefix_ids)
+        cache.get(tiny_model, prefix_ids[:3])
+
+        assert first is not second
+        assert first.get_seq_length() == len(PREFIX)
+        assert cache.stats() == {
+            "hits": 1,
+            "misses": 2,
+            "entries": 1,
+            "max_entries": 1,
+        }
+
+
+class TestGenerateWithPrefix:
+    """Test the generate_with_prefix function."""
+
+    @pytest.mark.parametrize(
+        "grids", [None, [(1, 4, 4), (1, 4, 8)]], ids=["text", "image"]
+    )
+    def test_matches_full_prefill(self, tiny_model, grids):
+        """Test reusing the prefix states gives the same greedy output."""
+        torch.manual_seed(1)
+        inputs = _batch([[20, 21], [22, 23, 24, 25]], grids)
+        kwargs = {"max_new_tokens": 8, "do_sample": False}
+
+        with torch.no_grad():
+            expected = tiny_model.generate(**inputs, **kwargs)
+            expected = expected[:, inputs["input_ids"].shape[1] :]
+            cache = PrefixCache()
+            first = generate_with_prefix(
+                tiny_model, inputs, len(PREFIX), cache, **kwargs
+            )
+            second = generate_with_prefix(
+                tiny_model, inputs, len(PREFIX), cache, **kwargs
+            )
+
+        assert first.tolist() == expected.tolist()
+        assert second.tolist() == expected.tolist()
+        assert cache.hits == 1
@@ -2,6 +2,8 @@ import pytest
 
 from app.services.processing import (
     clean_date,
+    extract_contact_info,
+    merge_contact_info,
     update_image_urls,
     validate_cv_data,
     validate_email,
@@ -140,6 +142,91 @@ class TestCleanDate:
         assert result == expected
 
 
+class TestExtractContactInfo:
+    """Test the extract_contact_info function."""
+
+    def test_extract_all_fields(self):
+        """Test a typical resume header yields every contact field."""
+        text = (
+            "John Doe\n"
+            "john.doe@example.com | +1 (234) 567-8901 | New York, NY\n"
+            "linkedin.com/in/johndoe\n"
+            "Software Engineer, 2018 - 2020"
+        )
+
+        contact = extract_contact_info(text)
+
+        assert contact == {
+            "Email": "john.doe@example.com",
+            "Phone": "+1 (234) 567-8901",
+            "LinkedIn": "linkedin.com/in/johndoe",
+        }
+
+    def test_repeated_value_is_confident(self):
+        """Test the same value written twice is still a single match."""
+        contact = extract_contact_info("JOHN@EXAMPLE.COM\nContact: john@example.com")
+
+        assert contact["Email"] == "JOHN@EXAMPLE.COM"
+
+    def test_ambiguous_values_skipped(self):
+        """Test several distinct candidates are left for the model."""
+        contact = extract_contact_info(
+            "john@example.com jane@example.com 123-456-7890 987-654-3210"
+        )
+
+        assert "Email" not in contact
+        assert "Phone" not in contact
+
+    @pytest.mark.parametrize(
+        "text",
+        ["2018 - 2020", "2019-2021", "Zip 10001", "01.02.2020", "v1.2.3.4567"],
+    )
+    def test_dates_and_numbers_not_phones(self, text):
+        """Test years, date ranges and short numbers are not taken as phones."""
+        assert "Phone" not in extract_contact_info(text)
+
+    def test_no_contact_info(self):
+        """Test text without contact details returns nothing."""
+        assert extract_contact_info("Skills: Python, Docker") == {}
+
+
+class TestMergeContactInfo:
+    """Test the merge_contact_info function."""
+
+    def test_merge_keeps_field_order(self):
+        """Test merged fields appear in the usual PersonalInfo order."""
+        page_data = {"PersonalInfo": {"Name": "John Doe", "Location": "NY"}}
+
+        merge_contact_info(
+            page_data,
+            {"Phone": "+1234567890", "Email": "john@example.com", "LinkedIn": "x"},
+        )
+
+        assert page_data["PersonalInfo"] == {
+            "Name": "John Doe",
+            "Email": "john@example.com",
+            "Phone": "+1234567890",
+            "Location": "NY",
+        }
+
+    def test_merge_without_personal_info(self):
+        """Test missing PersonalInfo is created with Not Found placeholders."""
+        page_data = {"Skills": {}}
+
+        merge_contact_info(page_data, {"Email": "john@example.com"})
+
+        assert page_data["PersonalInfo"]["Email"] == "john@example.com"
+        assert page_data["PersonalInfo"]["Name"] == "Not Found"
+
+    def test_merge_nothing(self):
+        """Test an empty rule result leaves the page untouched."""
+        page_data = {"Skills": {}}
+
+        merge_contact_info(page_data, {"LinkedIn": "linkedin.com/in/x"})
+
+        assert page_data == {"Skills": {}}
+
+
 class TestValidateCVData:
     """Test the validate_cv_data function."""
 
@@ -0,0 +1,138 @@
+import io
+
+import cv2
+import fitz
+import numpy as np
+import pytest
+from PIL import Image
+from qwen_vl_utils import fetch_image
+
+from app.services.rendering import (
+    pixmap_to_bgr,
+    pixmap_to_image,
+    render_page,
+    target_size,
+)
+
+
+@pytest.fixture
+def pdf_page():
+    """Create an in-memory single-page PDF with some text on it."""
+    doc = fitz.open()
+    page = doc.new_page(width=595, height=842)
+    page.insert_text((72, 72), "John Doe", fontsize=24)
+    page.insert_text((72, 110), "john.doe@example.com", fontsize=12)
+    yield page
+    doc.close()
+
+
+class TestPixmapToImage:
+    """Test the pixmap_to_image function."""
+
+    def test_matches_png_round_trip(self, pdf_page):
+        """Test the in-memory image equals the PNG encode/decode result."""
+        pix = pdf_page.get_pixmap(matrix=fitz.Matrix(2, 2))
+
+        image = pixmap_to_image(pix)
+        decoded = Image.open(io.BytesIO(pix.tobytes("png"))).convert("RGB")
+
+        assert image.mode == "RGB"
+        assert image.size == (pix.width, pix.height)
+        assert np.array_equal(np.asarray(image), np.asarray(decoded))
+
+    def test_alpha_pixmap(self, pdf_page):
+        """Test pixmaps with an alpha channel become RGBA images."""
+        pix = pdf_page.get_pixmap(alpha=True)
+
+        image = pixmap_to_image(pix)
+
+        assert image.mode == "RGBA"
+        assert image.size == (pix.width, pix.height)
+
+
+class TestPixmapToBgr:
+    """Test the pixmap_to_bgr function."""
+
+    def test_matches_png_round_trip(self, pdf_page):
+        """Test the converted image equals the PNG encode/decode result."""
+        pix = pdf_page.get_pixmap(matrix=fitz.Matrix(2, 2))
+
+        image = pixmap_to_bgr(pix)
+        decoded = cv2.imdecode(
+            np.frombuffer(pix.tobytes("png"), np.uint8), cv2.IMREAD_COLOR
+        )
+
+        assert image.shape == (pix.height, pix.width, 3)
+        assert np.array_equal(image, decoded)
+
+    @pytest.mark.parametrize(
+        "colorspace, alpha", [(fitz.csGRAY, False), (fitz.csRGB, True)]
+    )
+    def test_other_layouts(self, pdf_page, colorspace, alpha):
+        """Test grayscale and alpha pixmaps become three-channel BGR images."""
+        pix = pdf_page.get_pixmap(colorspace=colorspace, alpha=alpha)
+
+        image = pixmap_to_bgr(pix)
+
+        decoded = cv2.imdecode(
+            np.frombuffer(pix.tobytes("png"), np.uint8), cv2.IMREAD_COLOR
+        )
+
+        assert image.shape == (pix.height, pix.width, 3)
+        assert np.array_equal(image, decoded)
+
+
+class TestRenderPage:
+    """Test the render_page function."""
+
+    def test_render_page_zoom(self, pdf_page):
+        """Test rendering scales the page by the zoom factor."""
+        image = render_page(pdf_page, zoom=2.0)
+
+        assert image.mode == "RGB"
+        assert image.size == (1190, 1684)
+
+    def test_render_page_budget(self, pdf_page):
+        """Test a pixel budget renders the final model input size directly."""
+        image = render_page(pdf_page, zoom=2.0, min_pixels=0, max_pixels=1600 * 960)
+
+        width, height = image.size
+        assert width * height <= 1600 * 960
+        assert width % 28 == 0 and height % 28 == 0
+        # Aspect ratio of the A4 page is kept (960x1600 would distort it)
+        assert abs(width / height - 595 / 842) < 0.02
+
+    def test_processor_does_not_resize(self, pdf_page):
+        """Test qwen_vl_utils keeps the rendered size unchanged."""
+        image = render_page(pdf_page, zoom=2.0, min_pixels=0, max_pixels=1600 * 960)
+
+        resized = fetch_image(
+            {"image": image, "min_pixels": 0, "max_pixels": 1600 * 960}
+        )
+
+        assert resized.size == image.size
+
+
+class TestTargetSize:
+    """Test the target_size function."""
+
+    def test_small_page_not_upscaled(self):
+        """Test pages under the budget keep their zoomed size."""
+        width, height = target_size(fitz.Rect(0, 0, 420, 595), 2.0, 0, 1600 * 960)
+
+        assert (width, height) == (840, 1176)
+
+    def test_landscape_page(self):
+        """Test landscape pages stay landscape."""
+        width, height = target_size(fitz.Rect(0, 0, 842, 595), 2.0, 0, 1600 * 960)
+
+        assert width > height
+        assert width * height <= 1600 * 960
+
+    def test_min_pixels(self):
+        """Test tiny pages are scaled up to the lower bound."""
+        min_pixels = 256 * 28 * 28
+
+        width, height = target_size(fitz.Rect(0, 0, 100, 100), 1.0, min_pixels, 10**6)
+
+        assert width * height >= min_pixels
@@ -0,0 +1,234 @@
+import threading
+import time
+
+import pytest
+
+from app.models.core import ProcessingMetrics
+from app.services.metrics import metrics_scope, record_stage
+from app.services.scheduler import InferenceScheduler
+
+
+class FakeBackend:
+    """CPU-only backend that records the batches it receives."""
+
+    def __init__(
+        self, delay: float = 0.0, fail: bool = False, prepare_delay: float = 0.0
+    ):
+        self.delay = delay
+        self.fail = fail
+        self.prepare_delay = prepare_delay
+        self.batches: list[list[str]] = []
+        self.max_new_tokens: list[int] = []
+        self.json_schemas: list[list] = []
+        self.events: list[tuple[str, float]] = []
+
+    def prepare(self, messages_batch):
+        self.events.append(("prepare", time.perf_counter()))
+        time.sleep(self.prepare_delay)
+        return messages_batch
+
+    def generate(self, messages_batch, max_new_tokens, json_schemas):
+        if self.fail:
+            raise RuntimeError("backend failure")
+        self.events.append(("generate", time.perf_counter()))
+        time.sleep(self.delay)
+        self.events.append(("generated", time.perf_counter()))
+        texts = [messages[0]["content"] for messages in messages_batch]
+        self.batches.append(texts)
+        self.max_new_tokens.append(max_new_tokens)
+        self.json_schemas.append(json_schemas)
+        return [f"out:{text}" for text in texts]
+
+
+def _messages(text):
+    """Build a minimal conversation for the fake backend."""
+    return [{"role": "user", "content": text}]
+
+
+@pytest.fixture
+def make_scheduler():
+    """Create schedulers and shut them down after the test."""
+    schedulers = []
+
+    def _make(backend, **kwargs):
+        scheduler = InferenceScheduler(backend, **kwargs)
+        schedulers.append(scheduler)
+        return scheduler
+
+    yield _make
+    for scheduler in schedulers:
+        scheduler.shutdown()
+
+
+class TestInferenceScheduler:
+    """Test the InferenceScheduler class."""
+
+    def test_results_returned_per_caller(self, make_scheduler):
+        """Test each future resolves to the output for its own input."""
+        scheduler = make_scheduler(FakeBackend(), max_batch_size=4, max_wait_ms=50)
+
+        futures = [scheduler.submit(_messages(f"p{i}")) for i in range(6)]
+
+        assert [f.result(timeout=5) for f in futures] == [f"out:p{i}" for i in range(6)]
+
+    def test_batches_bounded_by_max_batch_size(self, make_scheduler):
+        """Test queued items are grouped into batches of at most max size."""
+        backend = FakeBackend()
+        scheduler = make_scheduler(backend, max_batch_size=3, max_wait_ms=200)
+
+        futures = [scheduler.submit(_messages(f"p{i}")) for i in range(5)]
+        for future in futures:
+            future.result(timeout=5)
+
+        assert [len(batch) for batch in backend.batches] == [3, 2]
+        assert scheduler.stats.batches == 2
+        assert scheduler.stats.items == 5
+        assert scheduler.stats.mean_batch_size == pytest.approx(2.5)
+
+    def test_schemas_passed_per_item(self, make_scheduler):
+        """Test items with different schemas share a batch, each keeping its own."""
+        backend = FakeBackend()
+        scheduler = make_scheduler(backend, max_batch_size=3, max_wait_ms=200)
+        schema = {"type": "string"}
+
+        futures = [
+            scheduler.submit(_messages("p0"), json_schema=schema),
+            scheduler.submit(_messages("p1")),
+            scheduler.submit(_messages("p2"), json_schema=schema),
+        ]
+        for future in futures:
+            future.result(timeout=5)
+
+        assert backend.json_schemas == [[schema, None, schema]]
+
+    def test_wait_window_bounds_latency(self, make_scheduler):
+        """Test a lone item is generated once the wait window closes."""
+        backend = FakeBackend()
+        scheduler = make_scheduler(backend, max_batch_size=8, max_wait_ms=30)
+
+        start = time.perf_counter()
+        assert scheduler.submit(_messages("solo")).result(timeout=5) == "out:solo"
+
+        assert time.perf_counter() - start < 1.0
+        assert backend.batches == [["solo"]]
+        assert scheduler.stats.max_queue_wait_sec >= 0.02
+
+    def test_requests_from_concurrent_callers_share_batches(self, make_scheduler):
+        """Test pages submitted from several threads are batched together."""
+        backend = FakeBackend(delay=0.05)
+        scheduler = make_scheduler(backend, max_batch_size=4, max_wait_ms=100)
+        results = {}
+
+        def caller(name):
+            futures = [scheduler.submit(_messages(f"{name}-{i}")) for i in range(2)]
+            results[name] = [f.result(timeout=5) for f in futures]
+
+        threads = [threading.Thread(target=caller, args=(n,)) for n in "ab"]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert results == {
+            "a": ["out:a-0", "out:a-1"],
+            "b": ["out:b-0", "out:b-1"],
+        }
+        assert len(backend.batches) == 1
+
+    def test_different_budgets_not_mixed(self, make_scheduler):
+        """Test items with different max_new_tokens go to separate batches."""
+        backend = FakeBackend()
+        scheduler = make_scheduler(backend, max_batch_size=4, max_wait_ms=100)
+
+        page = scheduler.submit(_messages("page"), max_new_tokens=1024)
+        summary = scheduler.submit(_messages("summary"), max_new_tokens=512)
+
+        assert page.result(timeout=5) == "out:page"
+        assert summary.result(timeout=5) == "out:summary"
+        assert sorted(backend.max_new_tokens) == [512, 1024]
+
+    def test_backend_error_propagates(self, make_scheduler):
+        """Test a failing batch raises in every caller."""
+        scheduler = make_scheduler(FakeBackend(fail=True), max_wait_ms=10)
+
+        future = scheduler.submit(_messages("p"))
+
+        with pytest.raises(RuntimeError, match="backend failure"):
+            future.result(timeout=5)
+
+    def test_next_batch_prepared_during_generation(self, make_scheduler):
+        """Test a batch is prepared while the previous one is generating."""
+        backend = FakeBackend(delay=0.2, prepare_delay=0.05)
+        scheduler = make_scheduler(backend, max_batch_size=1, max_wait_ms=0)
+
+        futures = [scheduler.submit(_messages(f"p{i}")) for i in range(2)]
+        for future in futures:
+            future.result(timeout=5)
+
+        names = [name for name, _ in backend.events]
+        assert names == [
+            "prepare",
+            "generate",
+            "prepare",
+            "generated",
+            "generate",
+            "generated",
+        ]
+
+    def test_prefetch_disabled(self, make_scheduler):
+        """Test batches are prepared right before generation without prefetch."""
+        backend = FakeBackend(delay=0.05)
+        scheduler = make_scheduler(
+            backend, max_batch_size=1, max_wait_ms=0, prefetch_batches=0
+        )
+
+        futures = [scheduler.submit(_messages(f"p{i}")) for i in range(2)]
+        for future in futures:
+            future.result(timeout=5)
+
+        names = [name for name, _ in backend.events]
+        assert names == ["prepare", "generate", "generated"] * 2
+
+    def test_prepare_error_propagates(self, make_scheduler):
+        """Test a batch whose inputs cannot be built fails its callers."""
+        backend = FakeBackend()
+        backend.prepare = lambda messages_batch: 1 / 0
+        scheduler = make_scheduler(backend, max_wait_ms=10)
+
+        with pytest.raises(ZeroDivisionError):
+            scheduler.submit(_messages("p")).result(timeout=5)
+
+
+class TimedBackend(FakeBackend):
+    """Fake backend that times fixed stage durations, like QwenBackend does."""
+
+    def prepare(self, messages_batch):
+        record_stage("preprocessing", 0.5)
+        return super().prepare(messages_batch)
+
+    def generate(self, messages_batch, max_new_tokens, json_schemas):
+        record_stage("decode", 2.0)
+        return super().generate(messages_batch, max_new_tokens, json_schemas)
+
+
+class TestStageAttribution:
+    """Test scheduler work is timed into the submitting requests."""
+
+    def test_batch_stages_attributed(self, make_scheduler):
+        """Test prepare and generate time reach every request in the batch."""
+        scheduler = make_scheduler(TimedBackend(), max_batch_size=2, max_wait_ms=200)
+        first = ProcessingMetrics(start_time=0.0)
+        second = ProcessingMetrics(start_time=0.0)
+
+        futures = []
+        for metrics, text in ((first, "a"), (second, "b")):
+            with metrics_scope(metrics):
+                futures.append(scheduler.submit(_messages(text)))
+        for future in futures:
+            future.result(timeout=5)
+
+        assert scheduler.stats.batches == 1
+        for metrics in (first, second):
+            assert metrics.stage_times["preprocessing"] == 0.5
+            assert metrics.stage_times["decode"] == 2.0
+            assert metrics.stage_times["queue_wait"] >= 0
@@ -0,0 +1,93 @@
+import fitz
+import pytest
+
+from app.services.text_layer import (
+    extract_page_text,
+    extract_word_locations,
+    has_usable_text,
+)
+
+
+@pytest.fixture
+def pdf_doc():
+    """Create an empty in-memory PDF document."""
+    doc = fitz.open()
+    yield doc
+    doc.close()
+
+
+class TestExtractPageText:
+    """Test the extract_page_text function."""
+
+    def test_born_digital_page(self, pdf_doc):
+        """Test text blocks are returned in reading order."""
+        page = pdf_doc.new_page()
+        page.insert_text((72, 150), "Software Engineer at Tech Company")
+        page.insert_text((72, 72), "John Doe")
+
+        text = extract_page_text(page)
+
+        assert text.index("John Doe") < text.index("Software Engineer")
+
+    def test_image_only_page(self, pdf_doc):
+        """Test a scanned (image-only) page yields no text."""
+        page = pdf_doc.new_page()
+        pix = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 20, 20), False)
+        pix.clear_with(200)
+        page.insert_image(fitz.Rect(0, 0, 200, 200), pixmap=pix)
+
+        assert extract_page_text(page) == ""
+
+
+class TestHasUsableText:
+    """Test the has_usable_text function."""
+
+    def test_enough_text(self):
+        """Test pages over the character threshold are usable."""
+        assert has_usable_text("John Doe " * 30, min_chars=200)
+
+    def test_too_little_text(self):
+        """Test pages under the character threshold fall back to vision."""
+        assert not has_usable_text("Page 1", min_chars=200)
+
+    def test_garbled_text(self):
+        """Test text full of replacement characters falls back to vision."""
+        assert not has_usable_text("��x" * 100, min_chars=200)
+
+
+class TestExtractWordLocations:
+    """Test the extract_word_locations function."""
+
+    def test_phrases_and_words(self, pdf_doc):
+        """Test phrases split at separators and words keep their own boxes."""
+        page = pdf_doc.new_page(width=600, height=800)
+        page.insert_text((60, 80), "John Doe | john.doe@example.com", fontsize=12)
+
+        locs = extract_word_locations(page, min_chars=5)
+
+        assert "john doe" in locs
+        assert "john.doe@example.com" in locs
+        assert "|" not in " ".join(locs)
+        x1, y1, x2, y2 = locs["john doe"]
+        assert 0.09 < x1 < 0.11 and 0.08 < y1 < y2 < 0.11
+        # Words get their own, tighter boxes
+        assert locs["john"][2] < locs["doe"][2] == x2
+
+    def test_rotated_page(self, pdf_doc):
+        """Test boxes follow the page rotation, like the rendered image."""
+        page = pdf_doc.new_page(width=600, height=800)
+        page.insert_text((60, 80), "John Doe", fontsize=12)
+        page.set_rotation(90)
+
+        x1, y1, x2, y2 = extract_word_locations(page, min_chars=5)["john doe"]
+
+        # The top-left text ends up along the right edge
+        assert x1 > 0.85 and y1 < 0.2
+        assert 0 <= x1 < x2 <= 1 and 0 <= y1 < y2 <= 1
+
+    def test_scanned_page(self, pdf_doc):
+        """Test pages without a usable text layer are left to OCR."""
+        page = pdf_doc.new_page()
+        page.insert_text((72, 72), "JD")
+
+        assert extract_word_locations(page, min_chars=5) is None